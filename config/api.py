@@ -1,7 +1,20 @@
 #config/api.py
 from ninja import NinjaAPI
 from society.api import router as society_router
+from society.api_async import router as society_async_router
+from society.renderers import ORJSONRenderer
 
-api = NinjaAPI(title="Somtam Society API")
-
+api = NinjaAPI(title="Somtam Society API", renderer=ORJSONRenderer())
 api.add_router("", society_router)
+
+# ASGI deployments: the async versions of the hot endpoints. society/urls.py mounts them
+# in front of `api` (SOCIETY_ASYNC_VIEWS) so their URLs win, everything else falls
+# through to the sync router. Same paths and schemas, so no docs of their own.
+async_api = NinjaAPI(
+    title="Somtam Society API (async)",
+    urls_namespace="society_async",
+    renderer=ORJSONRenderer(),
+    docs_url=None,
+    openapi_url=None,
+)
+async_api.add_router("", society_async_router)
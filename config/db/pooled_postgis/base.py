@@ -0,0 +1,26 @@
+# config/db/pooled_postgis/base.py
+from django.contrib.gis.db.backends.postgis.base import DatabaseWrapper as PostGISDatabaseWrapper
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(PostGISDatabaseWrapper):
+    """
+    PostGIS backend whose connections come from an in-process pool (pool.py).
+    Configured by the "POOL" key of the DATABASES entry, see config/settings.py.
+    """
+
+    def _pool(self, conn_params):
+        return get_pool(self.alias, conn_params, self.settings_dict.get("POOL"))
+
+    def get_new_connection(self, conn_params):
+        connection = self._pool(conn_params).acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # A reused connection skipped the parent's get_new_connection(), which sets this
+        self.isolation_level = IsolationLevel(self.settings_dict["OPTIONS"].get("isolation_level", IsolationLevel.READ_COMMITTED))
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pool(self.get_connection_params()).release(self.connection)
@@ -0,0 +1,198 @@
+# config/db/pooled_postgis/pool.py
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+# In-process connection pool behind the pooled_postgis backend.
+#
+# Django opens a connection per thread and (with CONN_MAX_AGE=0) closes it at the end of
+# every request. The backend hands those close()s back here instead, so a request reuses
+# a warm connection (no TCP + TLS + auth round trips) and the number of server
+# connections per process stays between MIN_SIZE and MAX_SIZE.
+
+DEFAULTS = {
+    "MIN_SIZE": 1,  # idle connections that are never trimmed
+    "MAX_SIZE": 10,
+    "TIMEOUT": 10.0,  # seconds to wait for a free connection before failing the request
+    "MAX_IDLE": 300.0,  # close idle connections above MIN_SIZE after this many seconds
+    "MAX_LIFETIME": 3600.0,  # recycle connections after this many seconds
+    "CHECK_INTERVAL": 30.0,  # SELECT 1 before reuse when idle longer than this (0 = always)
+}
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No connection became free within TIMEOUT (Django re-raises it as OperationalError)."""
+
+
+class _Conn:
+    __slots__ = ("raw", "created_at", "released_at")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = self.released_at = time.monotonic()
+
+
+class ConnectionPool:
+    def __init__(self, name: str, options: Optional[Dict] = None):
+        self.name = name
+        self.options = {**DEFAULTS, **(options or {})}
+        if self.options["MIN_SIZE"] > self.options["MAX_SIZE"]:
+            raise ValueError("POOL MIN_SIZE can't be larger than MAX_SIZE")
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._in_use: Dict[int, _Conn] = {}
+        self._size = 0  # idle + in use + being opened
+        self._waiting = 0
+        self.counters = {"acquired": 0, "opened": 0, "closed": 0, "timeouts": 0, "failed_checks": 0, "wait_ms": 0.0}
+
+    # -- checkout / return -------------------------------------------------
+
+    def acquire(self, connect: Callable):
+        """A healthy connection, reused if possible, else opened with connect()."""
+        deadline = time.monotonic() + self.options["TIMEOUT"]
+        started = time.monotonic()
+
+        while True:
+            conn = None
+            with self._cond:
+                while not self._idle and self._size >= self.options["MAX_SIZE"]:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"connection pool '{self.name}' exhausted: {self._size} in use, "
+                            f"waited {self.options['TIMEOUT']}s"
+                        )
+                    self._waiting += 1
+                    self._cond.wait(remaining)
+                    self._waiting -= 1
+
+                if self._idle:
+                    conn = self._idle.pop()  # most recently used = least likely to be stale
+                else:
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = _Conn(connect())
+                except Exception:
+                    self._forget()
+                    raise
+                self.counters["opened"] += 1
+            elif not self._healthy(conn):
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._in_use[id(conn.raw)] = conn
+                self.counters["acquired"] += 1
+                self.counters["wait_ms"] += (time.monotonic() - started) * 1000
+            return conn.raw
+
+    def release(self, raw) -> None:
+        with self._cond:
+            conn = self._in_use.pop(id(raw), None)
+        if conn is None:
+            # not ours (opened before the pool existed / already discarded)
+            raw.close()
+            return
+
+        if not raw.closed and raw.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                raw.rollback()
+            except psycopg2.Error:
+                pass
+
+        now = time.monotonic()
+        if raw.closed or raw.info.transaction_status != TRANSACTION_STATUS_IDLE or self._too_old(conn, now):
+            self._discard(conn)
+            return
+
+        conn.released_at = now
+        with self._cond:
+            self._idle.append(conn)
+            self._trim(now)
+            self._cond.notify()
+
+    # -- housekeeping ------------------------------------------------------
+
+    def _healthy(self, conn: _Conn) -> bool:
+        now = time.monotonic()
+        if conn.raw.closed or self._too_old(conn, now):
+            return False
+        if now - conn.released_at < self.options["CHECK_INTERVAL"]:
+            return True
+        try:
+            with conn.raw.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            self.counters["failed_checks"] += 1
+            return False
+
+    def _too_old(self, conn: _Conn, now: float) -> bool:
+        return now - conn.created_at > self.options["MAX_LIFETIME"]
+
+    def _trim(self, now: float) -> None:
+        # Oldest idle connections are at the left; keep at least MIN_SIZE open
+        while self._idle and self._size > self.options["MIN_SIZE"] and now - self._idle[0].released_at > self.options["MAX_IDLE"]:
+            conn = self._idle.popleft()
+            self._size -= 1
+            self._close(conn)
+
+    def _discard(self, conn: _Conn) -> None:
+        self._close(conn)
+        self._forget()
+
+    def _forget(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _close(self, conn: _Conn) -> None:
+        self.counters["closed"] += 1
+        try:
+            conn.raw.close()
+        except psycopg2.Error:
+            pass
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                **self.options,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting,
+                **self.counters,
+            }
+
+
+# One pool per (process, alias, connection parameters): gunicorn forks workers, and the
+# test runner switches NAME to the test database.
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, conn_params: Dict, options: Optional[Dict]) -> ConnectionPool:
+    key = (os.getpid(), alias, tuple(sorted((k, str(v)) for k, v in conn_params.items())))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(alias, options)
+    return pool
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Stats of this process's pools by database alias (e.g. for /health/db)."""
+    pid = os.getpid()
+    return {key[1]: pool.stats() for key, pool in list(_pools.items()) if key[0] == pid}
@@ -2,6 +2,7 @@
 import os
 import platform
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 
@@ -68,6 +69,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
     "corsheaders",
     "ninja",
     "society",
@@ -122,30 +124,147 @@ import dj_database_url
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Connection handling, the same for both config paths below:
+# - DB_POOL=true: config/db/pooled_postgis keeps an in-process pool per worker
+#   (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections, see config/db/pooled_postgis/pool.py).
+#   Django hands connections back after every request (CONN_MAX_AGE=0), so size
+#   MAX_SIZE to the threads per worker; pool stats are on /api/society/health/db.
+# - otherwise: persistent per-thread connections (DB_CONN_MAX_AGE seconds).
+# Either way a connection is checked before it's reused.
+DB_POOL = os.getenv("DB_POOL", "false").lower() == "true"
+
+
+def database_options(db: dict) -> dict:
+    if DB_POOL:
+        db["ENGINE"] = "config.db.pooled_postgis"
+        db["CONN_MAX_AGE"] = 0
+        db["POOL"] = {
+            "MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "MAX_IDLE": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            "MAX_LIFETIME": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+            "CHECK_INTERVAL": float(os.getenv("DB_POOL_CHECK_INTERVAL", "30")),
+        }
+    else:
+        db["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+        db["CONN_HEALTH_CHECKS"] = True
+    return db
+
+
 if DATABASE_URL:
     DATABASES = {
-        "default": dj_database_url.parse(
-            DATABASE_URL,
-            engine="django.contrib.gis.db.backends.postgis",
-            conn_max_age=600,
-            ssl_require=True,  # Render usually needs SSL
+        "default": database_options(
+            dj_database_url.parse(
+                DATABASE_URL,
+                engine="django.contrib.gis.db.backends.postgis",
+                ssl_require=True,  # Render usually needs SSL
+            )
         )
     }
 else:
     DATABASES = {
-        "default": {
-            "ENGINE": "django.contrib.gis.db.backends.postgis",
-            "NAME": os.getenv("POSTGRES_DB"),
-            "USER": os.getenv("POSTGRES_USER"),
-            "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
-            "HOST": os.getenv("POSTGRES_HOST"),
-            "PORT": os.getenv("POSTGRES_PORT", "5432"),
-        }
+        "default": database_options(
+            {
+                "ENGINE": "django.contrib.gis.db.backends.postgis",
+                "NAME": os.getenv("POSTGRES_DB"),
+                "USER": os.getenv("POSTGRES_USER"),
+                "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
+                "HOST": os.getenv("POSTGRES_HOST"),
+                "PORT": os.getenv("POSTGRES_PORT", "5432"),
+            }
+        )
     }
 
+# Read replicas: DATABASE_REPLICA_URLS=postgres://...,postgres://... (connection options go
+# in the URL, e.g. ?sslmode=require&connect_timeout=2 so a dead replica fails fast). API GET reads of locations/events go there, see society/db_router.py.
+# Locally: two Postgres databases, the second one a streaming replica (or just a copy).
+DATABASE_REPLICAS = []
+for i, url in enumerate(u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()):
+    alias = f"replica_{i + 1}"
+    DATABASES[alias] = database_options(dj_database_url.parse(url, engine="django.contrib.gis.db.backends.postgis"))
+    # tests run against the primary only
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+SOCIETY_REPLICA_STICKY_SECONDS = int(os.getenv("SOCIETY_REPLICA_STICKY_SECONDS", "5"))  # >= expected replica lag
+SOCIETY_REPLICA_CHECK_SECONDS = int(os.getenv("SOCIETY_REPLICA_CHECK_SECONDS", "30"))  # skip a failed replica this long
+SOCIETY_REPLICA_PATH_PREFIX = "/api/"
+
+# Server-Timing header + query budget / N+1 warnings (logger "society.querybudget"),
+# see society/querybudget.py. Off in production by default: the header tells anyone the
+# query counts, and every statement goes through the recorder.
+SOCIETY_QUERY_BUDGET = os.getenv("SOCIETY_QUERY_BUDGET", str(DEBUG)).lower() == "true"
+if SOCIETY_QUERY_BUDGET:
+    MIDDLEWARE.insert(0, "society.querybudget.QueryBudgetMiddleware")
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["society.db_router.ReplicaRouter"]
+    MIDDLEWARE.append("society.db_router.ReplicaMiddleware")
 
 
 
+
+# Cache
+# society/cache.py keeps rendered list responses in the "society" cache.
+# Local memory by default (one cache per worker process, TTL bounds staleness across workers);
+# point SOCIETY_CACHE_BACKEND / SOCIETY_CACHE_LOCATION at redis or memcached to share it.
+
+SOCIETY_CACHE_ENABLED = os.getenv("SOCIETY_CACHE_ENABLED", "true").lower() == "true"
+SOCIETY_CACHE_BACKEND = os.getenv("SOCIETY_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "society": {
+        "BACKEND": SOCIETY_CACHE_BACKEND,
+        "LOCATION": os.getenv("SOCIETY_CACHE_LOCATION", "society"),
+        "TIMEOUT": int(os.getenv("SOCIETY_CACHE_TTL", "300")),
+    },
+}
+
+# Vector tile bodies (society/tiles.py): on disk by default, shared by the workers of a host.
+# Their version keys live in the "society" cache, so share that one for writes on one host to
+# reach the others. The TTL bounds the drift of the upcoming event counts.
+SOCIETY_TILE_CACHE_BACKEND = os.getenv("SOCIETY_TILE_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache")
+CACHES["tiles"] = {
+    "BACKEND": SOCIETY_TILE_CACHE_BACKEND,
+    "LOCATION": os.getenv("SOCIETY_TILE_CACHE_LOCATION", "/tmp/society-tiles"),
+    "TIMEOUT": int(os.getenv("SOCIETY_TILE_CACHE_TTL", "3600")),
+}
+
+# MAX_ENTRIES is only understood by the locmem / file / db backends
+if SOCIETY_CACHE_BACKEND.rsplit(".", 1)[-1] in ("LocMemCache", "FileBasedCache", "DatabaseCache"):
+    CACHES["society"]["OPTIONS"] = {"MAX_ENTRIES": int(os.getenv("SOCIETY_CACHE_MAX_ENTRIES", "1000"))}
+if SOCIETY_TILE_CACHE_BACKEND.rsplit(".", 1)[-1] in ("LocMemCache", "FileBasedCache", "DatabaseCache"):
+    CACHES["tiles"]["OPTIONS"] = {"MAX_ENTRIES": int(os.getenv("SOCIETY_TILE_CACHE_MAX_ENTRIES", "20000"))}
+
+# With replicas, the primary pin after writes (society/db_router.py) lives in the "society"
+# cache: a per-process or per-host cache would only pin the worker that wrote.
+if DATABASE_REPLICAS and SOCIETY_CACHE_BACKEND.rsplit(".", 1)[-1] in ("LocMemCache", "FileBasedCache", "DummyCache"):
+    raise ImproperlyConfigured(
+        "DATABASE_REPLICA_URLS needs a shared SOCIETY_CACHE_BACKEND (redis, memcached or the database cache)"
+    )
+
+
+# In-process spatial index for /events/nearby (society/spatial.py), PostGIS is used while it's cold
+SOCIETY_SPATIAL_INDEX = os.getenv("SOCIETY_SPATIAL_INDEX", "false").lower() == "true"
+SOCIETY_SPATIAL_INDEX_TTL = int(os.getenv("SOCIETY_SPATIAL_INDEX_TTL", "600"))  # seconds before a full rebuild
+
+# Upcoming-only /events and /events/paged read the flattened UpcomingEvent table (society/readmodel.py);
+# run `manage.py refresh_upcoming_events` every few minutes to drop started events
+SOCIETY_UPCOMING_READ_MODEL = os.getenv("SOCIETY_UPCOMING_READ_MODEL", "true").lower() == "true"
+
+# Default ?count_strategy= of /events/paged: exact | cached | estimated | none (society/counts.py)
+SOCIETY_COUNT_STRATEGY = os.getenv("SOCIETY_COUNT_STRATEGY", "exact")
+
+# SERVER_MODE=asgi (Dockerfile) runs uvicorn workers; the async versions of the hot
+# endpoints (society/api_async.py) are served there by default.
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+SOCIETY_ASYNC_VIEWS = os.getenv("SOCIETY_ASYNC_VIEWS", "true" if SERVER_MODE == "asgi" else "false").lower() == "true"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,12 @@
+# config/urls_async.py
+from django.contrib import admin
+from django.urls import path, include
+
+from society.urls import async_urlpatterns
+
+# config/urls.py with the async society views mounted whatever SOCIETY_ASYNC_VIEWS says:
+# for bench_endpoints' asgi driver and the tests of society/api_async.py.
+urlpatterns = [
+    path("admin/", admin.site.urls),
+    path("api/society/", include(async_urlpatterns)),
+]
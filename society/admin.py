@@ -20,9 +20,11 @@ class EventAdmin(admin.ModelAdmin):
     list_display = ("title", "event_type", "start_date", "location","design_template_external_id","event_external_id")
     list_filter = ("event_type", "start_date")
     search_fields = ("title", "description", "location__name")
+    list_select_related = ("location",)  # list_display shows the location on every row
 
 
 @admin.register(MemberProfile)
 class MemberProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "home_city")
+    list_select_related = ("user",)
 
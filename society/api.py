@@ -1,22 +1,63 @@
 # society/api.py
+import time
 from typing import List, Optional
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
 from ninja import Router
 from django.contrib.gis.geos import Point
 from django.contrib.gis.db.models.functions import Distance
 from django.contrib.gis.measure import D
-from .models import Location, Event, MemberProfile
+from django.db import DatabaseError, connections
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Substr
+from ninja.errors import HttpError
+from .models import Location, Event, EventChange, MemberProfile, UpcomingEvent
 from .schemas import LocationOut, EventOut, MemberProfileOut
 from .schemas import PaginatedEventsOut
+from .schemas import LocationClusterOut, EventClusterOut
+from .schemas import CursorEventsOut, CursorLocationsOut, PaginatedLocationsOut
+from .schemas import MemberProfileExpandedOut, TrendingEventOut, EventChangesOut
+from .search import search_events, search_locations
+from .geo import Lat, Lng, bbox_polygon, filter_bbox, zoom_to_precision
+from .pagination import keyset_page, id_page, encode_cursor, NEXT, PREV
+from .renderers import json_response, render
+from .serializers import event_values, event_row, event_rows, location_values, location_rows
+from .serializers import parse_event_fields, parse_location_fields, EVENT_COMPACT_FIELDS
+from .querybudget import query_budget
+from . import cache, changes, conditional, counts, export, readmodel, spatial, tiles
+from config.db.pooled_postgis.pool import pool_stats
 
 router = Router(tags=["society"])
 
 @router.get("/health")
+@query_budget(0)
 def health(request):
     return {"ok": True, "service": "society"}
 
 
+@router.get("/health/db")
+@query_budget(4)
+def health_db(request):
+    """
+    Round trip to every configured database, plus this worker's connection pool
+    stats when DB_POOL is on (size / idle / in_use / waiting / timeouts...).
+    """
+    databases = {}
+    ok = True
+    for alias in connections:
+        started = time.perf_counter()
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            databases[alias] = {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        except DatabaseError as e:
+            ok = False
+            databases[alias] = {"ok": False, "error": str(e)}
+
+    return json_response(render({"ok": ok, "databases": databases, "pools": pool_stats()}), status=200 if ok else 503)
+
+
 def _loc_lat(loc: Location) -> Optional[float]:
     if not loc.coordinates:
         return None
@@ -29,20 +70,6 @@ def _loc_lng(loc: Location) -> Optional[float]:
     return float(loc.coordinates.x)
 
 
-def location_to_out(loc: Location) -> LocationOut:
-    return LocationOut(
-        id=loc.id,
-        name=loc.name,
-        category=loc.category,
-        address=loc.address or "",
-        website=loc.website,
-        country_code=loc.country_code,
-        related_store_external_id=loc.related_store_external_id or "",
-        lat=_loc_lat(loc),
-        lng=_loc_lng(loc),
-    )
-
-
 def event_to_out(e: Event, distance_km: Optional[float] = None) -> EventOut:
     loc = e.location
     return EventOut(
@@ -58,8 +85,8 @@ def event_to_out(e: Event, distance_km: Optional[float] = None) -> EventOut:
         location_id=loc.id,
         location_name=loc.name,
         location_category=loc.category,
-        location_address=loc.category,
-        location_website=loc.category,
+        location_address=loc.address,
+        location_website=loc.website,
         country_code=loc.country_code,
         lat=_loc_lat(loc),
         lng=_loc_lng(loc),
@@ -74,7 +101,26 @@ def event_to_out(e: Event, distance_km: Optional[float] = None) -> EventOut:
 
 
 @router.get("/locations", response=List[LocationOut])
-def list_locations(request, country_code: Optional[str] = None, category: Optional[str] = None, q: Optional[str] = None):
+@query_budget(2)
+def list_locations(
+    request,
+    country_code: Optional[str] = None,
+    category: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+):
+    selected = parse_location_fields(fields, exclude)
+
+    def build():
+        qs = _locations_qs(country_code, category, q)
+        return location_rows(location_values(qs, fields=selected), fields=selected)
+
+    params = {"country_code": _norm_cc(country_code), "category": category, "q": q, "fields": _norm_fields(selected)}
+    return conditional.conditional_json(request, "locations", params, [cache.LOCATIONS], build, EventChange.Kind.LOCATION)
+
+def _locations_qs(country_code, category, q):
+    # Querysets shared with the async views (society/api_async.py)
     qs = Location.objects.all().order_by("country_code", "name")
 
     if country_code:
@@ -83,33 +129,194 @@ def list_locations(request, country_code: Optional[str] = None, category: Option
         qs = qs.filter(category=category)
     if q:
         qs = qs.filter(name__icontains=q)
+    return qs
+
+
+def _norm_cc(country_code: Optional[str]) -> Optional[str]:
+    # iexact filter, so "de" and "DE" share a cache entry
+    return country_code.strip().upper() if country_code else None
+
+
+def _norm_fields(selected) -> Optional[str]:
+    # parse_*_fields() already put them in schema order
+    return ",".join(selected) if selected is not None else None
+
+
+def _norm_ids(ids: Optional[str]) -> Optional[str]:
+    if not ids:
+        return None
+    return ",".join(str(i) for i in sorted({int(i) for i in ids.split(",") if i.isdigit()}))
+
+
+def _filter_events(
+    qs,
+    country_code: Optional[str] = None,
+    event_type: Optional[str] = None,
+    ids: Optional[str] = None,
+    location_id: Optional[int] = None,
+):
+    # Shared by /events and /events/paged so both endpoints filter the same way.
+    # qs is over Event or UpcomingEvent (which has country_code inline)
+    if country_code:
+        lookup = "country_code__iexact" if qs.model is UpcomingEvent else "location__country_code__iexact"
+        qs = qs.filter(**{lookup: country_code})
+    if event_type:
+        qs = qs.filter(event_type=event_type)
+    if ids:
+        id_list = [int(i) for i in ids.split(",") if i.isdigit()]
+        qs = qs.filter(id__in=id_list)
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    return qs
+
+
+def _events_source(upcoming_only: bool, read_model: bool = True):
+    # Upcoming lists read the flattened read model (society/readmodel.py), no join.
+    # Same upcoming predicate on either model, so the fallback lists the same rows
+    model = UpcomingEvent if upcoming_only and read_model and readmodel.enabled() else Event
+    if upcoming_only:
+        return model.objects.filter(start_date__gte=timezone.now())
+    return model.objects.all()
+
+
+def _list_events_qs(country_code, event_type, location_id, upcoming_only: bool, read_model: bool = True):
+    # /events and /events/export (the export is the whole catalogue, always from Event)
+    qs = _events_source(upcoming_only, read_model)
+    qs = _filter_events(qs, country_code=country_code, event_type=event_type, location_id=location_id)
+    return qs.order_by("start_date" if upcoming_only else "-start_date")
 
-    return [location_to_out(loc) for loc in qs]
 
 @router.get("/events", response=List[EventOut])
+@query_budget(2)
 def list_events(
     request,
     country_code: Optional[str] = None,
     event_type: Optional[str] = None,
     location_id: Optional[int] = None,
     upcoming_only: bool = True,
-    
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
 ):
-    qs = Event.objects.select_related("location").order_by("-start_date")
-    if country_code:
-        qs = qs.filter(location__country_code__iexact=country_code) 
-    if event_type: 
-        qs = qs.filter(event_type=event_type) 
-    if location_id: 
-        qs = qs.filter(location_id=location_id) 
-        
-    qs = qs.order_by("start_date" if upcoming_only else "-start_date") 
-    return [event_to_out(e) for e in qs]
+    """
+    ?fields=id,title,start_date,banner_image (or ?exclude=description,description_thai)
+    returns only those keys and only reads those columns. Same for /events/paged,
+    /events/nearby and /locations.
+    """
+    selected = parse_event_fields(fields, exclude)
+
+    def build():
+        qs = _list_events_qs(country_code, event_type, location_id, upcoming_only)
+        return event_rows(event_values(qs, fields=selected), fields=selected)
+
+    params = {
+        "country_code": _norm_cc(country_code),
+        "event_type": event_type,
+        "location_id": location_id,
+        "upcoming_only": upcoming_only,
+        "fields": _norm_fields(selected),
+    }
+    return conditional.conditional_json(
+        request, "events", params, [cache.EVENTS], build, EventChange.Kind.EVENT, upcoming_only
+    )
+
+
+@router.get("/events/export")
+@query_budget(1)
+def export_events(
+    request,
+    format: str = "ndjson",
+    country_code: Optional[str] = None,
+    event_type: Optional[str] = None,
+    location_id: Optional[int] = None,
+    upcoming_only: bool = True,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+):
+    """
+    The whole catalogue (same filters as /events) as NDJSON (one EventOut per line)
+    or CSV, streamed from a server-side cursor. For nightly partner pulls.
+    """
+    if format not in export.CONTENT_TYPES:
+        raise HttpError(400, f"format must be one of: {', '.join(export.CONTENT_TYPES)}")
+    selected = parse_event_fields(fields, exclude)
+
+    qs = _list_events_qs(country_code, event_type, location_id, upcoming_only, read_model=False)
+    # id as tie-breaker, so two exports of the same data come out in the same order
+    qs = qs.order_by("start_date", "id") if upcoming_only else qs.order_by("-start_date", "-id")
+    return export.export_response(request, qs, format, fields=selected)
+
+
+def _paged_events_qs(country_code, event_type, ids, location_id, upcoming_only: bool):
+    # Filters (same as /events); ordering is applied separately, with id as tie-breaker
+    return _filter_events(
+        _events_source(upcoming_only), country_code=country_code, event_type=event_type, ids=ids, location_id=location_id
+    )
+
+
+def _ordered_events(qs, upcoming_only: bool):
+    if upcoming_only:
+        return qs.order_by("start_date", "id")
+    return qs.order_by("-start_date", "-id")
+
+
+def _cursor_page_out(rows, count, limit, next_cursor, prev_cursor, selected, count_is_estimate=False) -> dict:
+    return {
+        "items": event_rows(rows, fields=selected),
+        "count": count,
+        "count_is_estimate": count_is_estimate,
+        "limit": limit,
+        "offset": 0,
+        "next_offset": None,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
+def _offset_page_out(rows, count, limit, offset, selected, count_is_estimate=False) -> dict:
+    """rows: up to limit + 1 rows from offset (the extra one only says there is more)."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_offset = offset + limit if has_more else None
+    next_cursor = encode_cursor(rows[-1]["start_date"], rows[-1]["id"], NEXT) if has_more else None
+    prev_cursor = encode_cursor(rows[0]["start_date"], rows[0]["id"], PREV) if rows and offset > 0 else None
+
+    return {
+        "items": event_rows(rows, fields=selected),
+        "count": count,
+        "count_is_estimate": count_is_estimate,
+        "limit": limit,
+        "offset": offset,
+        "next_offset": next_offset,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
 
 
 # This is a paginated version of /events. You can use it if you expect a lot of results and want to load them in chunks.
+#
+# Two modes:
+# - offset mode (default): ?limit=12&offset=24, same as before
+# - cursor mode: pass the next_cursor / prev_cursor from a previous page as ?cursor=...
+#   Keyset on (start_date, id), so deep pages are as cheap as the first one.
+#   Use with_count=false to skip the COUNT(*) (infinite scroll doesn't need it).
+#
+# ?count_strategy=exact|cached|estimated|none picks how `count` is computed (society/counts.py);
+# count_is_estimate is true when it's a planner estimate. Default: SOCIETY_COUNT_STRATEGY.
+
+def _count_filters(country_code, event_type, ids, location_id, upcoming_only) -> dict:
+    # What the count depends on (not the page, limit or fields): the memo key for "cached"
+    return {
+        "country_code": _norm_cc(country_code),
+        "event_type": event_type,
+        "ids": _norm_ids(ids),
+        "location_id": location_id,
+        "upcoming_only": upcoming_only,
+    }
+
 
 @router.get("/events/paged", response=PaginatedEventsOut)
+@query_budget(4)
 def list_events_paged(
     request,
     country_code: Optional[str] = None,
@@ -119,7 +326,15 @@ def list_events_paged(
     upcoming_only: bool = True,
     limit: int = 12,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    with_count: bool = True,
+    count_strategy: Optional[str] = None,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
 ):
+    selected = parse_event_fields(fields, exclude)
+    strategy = counts.parse_strategy(count_strategy, with_count)
+
     # Guardrails
     if limit < 1:
         limit = 12
@@ -128,44 +343,134 @@ def list_events_paged(
     if offset < 0:
         offset = 0
 
-    qs = Event.objects.select_related("location")
+    def build():
+        qs = _paged_events_qs(country_code, event_type, ids, location_id, upcoming_only)
+        count, estimated = counts.count_events(qs, strategy, filters)
+
+        if cursor:
+            rows, next_cursor, prev_cursor = keyset_page(
+                event_values(qs, "start_date", fields=selected), cursor, limit, ascending=upcoming_only
+            )
+            return _cursor_page_out(rows, count, limit, next_cursor, prev_cursor, selected, estimated)
+
+        # One extra row tells us if there is a next page without needing the count
+        # start_date is needed for the cursors even when it isn't in ?fields=
+        page = _ordered_events(qs, upcoming_only)
+        rows = list(event_values(page, "start_date", fields=selected)[offset : offset + limit + 1])
+        return _offset_page_out(rows, count, limit, offset, selected, estimated)
+
+    filters = _count_filters(country_code, event_type, ids, location_id, upcoming_only)
+    params = {
+        **filters,
+        "limit": limit,
+        "offset": offset,
+        "cursor": cursor,
+        "count_strategy": strategy,
+        "fields": _norm_fields(selected),
+    }
+    return conditional.conditional_json(
+        request, "events_paged", params, [cache.EVENTS], build, EventChange.Kind.EVENT, upcoming_only
+    )
 
-    # Filters (same as /events)
-    if country_code:
-        qs = qs.filter(location__country_code__iexact=country_code)
-    if event_type:
-        qs = qs.filter(event_type=event_type)
-    if ids:
-        id_list = [int(i) for i in ids.split(",") if i.isdigit()]
-        qs = qs.filter(id__in=id_list)
-    if location_id:
-        qs = qs.filter(location_id=location_id)
 
-    # Ordering + upcoming filter
-    if upcoming_only:
-        qs = qs.filter(start_date__gte=timezone.now()).order_by("start_date")
-    else:
-        qs = qs.order_by("-start_date")
 
-    count = qs.count()
-    page_qs = qs[offset : offset + limit]
-    items = [event_to_out(e) for e in page_qs]
 
-    next_offset = offset + limit if (offset + limit) < count else None
 
-    return {
-        "items": items,
-        "count": count,
+@router.get("/events/changes", response=EventChangesOut)
+@query_budget(3)
+def event_changes(request, since: Optional[str] = None, limit: int = 500):
+    """
+    Delta sync: events created / updated since the `since` token plus the ids of deleted
+    events and locations. Start with no token (or since=0): the answer is reset=true and a
+    token to sync from after loading /events. Keep calling while has_more.
+    """
+    # not cached: tokens are per client, and the rows are read from the primary
+    return json_response(render(changes.feed(since, limit)))
+
+
+@router.get("/tiles/{z}/{x}/{y}.mvt")
+@query_budget(1)
+def location_tile(request, z: int, x: int, y: int):
+    """
+    Mapbox Vector Tile of the locations (layer "locations": name, category, upcoming_events),
+    z <= 16. 204 when no location is in the tile.
+    """
+    tiles.check_tile(z, x, y)
+    data = tiles.get_tile(z, x, y)
+    if not data:
+        return HttpResponse(status=204)
+    return HttpResponse(data, content_type=tiles.CONTENT_TYPE)
+
+
+TRENDING_MAX_LIMIT = 50
+
+
+@router.get("/events/trending", response=List[TrendingEventOut])
+@query_budget(1)
+def trending_events(
+    request,
+    country_code: Optional[str] = None,
+    event_type: Optional[str] = None,
+    upcoming_only: bool = True,
+    limit: int = 20,
+):
+    """
+    Most saved events, recent saves weighted higher (3 day half-life, see society/popularity.py).
+    Reads the indexed Event.trending_score, no counting.
+    """
+    limit = min(max(limit, 1), TRENDING_MAX_LIMIT)
+
+    def build():
+        qs = _filter_events(Event.objects.filter(saved_count__gt=0), country_code=country_code, event_type=event_type)
+        if upcoming_only:
+            qs = qs.filter(start_date__gte=timezone.now())
+        qs = qs.order_by("-trending_score", "id")[:limit]
+
+        out = []
+        for values in event_values(qs, "saved_count", "trending_score"):
+            row = event_row(values)
+            row["saved_count"] = values["saved_count"]
+            row["trending_score"] = values["trending_score"]
+            out.append(row)
+        return out
+
+    params = {
+        "country_code": _norm_cc(country_code),
+        "event_type": event_type,
+        "upcoming_only": upcoming_only,
         "limit": limit,
-        "offset": offset,
-        "next_offset": next_offset,
     }
+    # saves only bump the members namespace
+    return cache.cached_json("events_trending", params, [cache.EVENTS, cache.MEMBERS], build)
 
 
+def _nearby_indexed_qs(distances, event_type: Optional[str], selected=None):
+    qs = Event.objects.filter(location_id__in=list(distances))
+    if event_type:
+        qs = qs.filter(event_type=event_type)
+    return event_values(qs, "start_date", "location_id", fields=selected)
 
 
+def _events_nearby_indexed(hits, event_type: Optional[str], upcoming_only: bool, selected=None) -> List[dict]:
+    distances = dict(hits)
+    if not distances:
+        return []
+    rows = list(_nearby_indexed_qs(distances, event_type, selected))
+    return _nearby_indexed_out(rows, distances, upcoming_only, selected)
+
+
+def _nearby_indexed_out(rows, distances, upcoming_only: bool, selected=None) -> List[dict]:
+    # Same ordering as the PostGIS path
+    if upcoming_only:
+        rows.sort(key=lambda r: (r["start_date"], distances[r["location_id"]]))
+    else:
+        rows.sort(key=lambda r: (distances[r["location_id"]], -r["start_date"].timestamp()))
+
+    return [event_row(r, distance_km=distances[r["location_id"]], fields=selected) for r in rows]
+
 
 @router.get("/events/nearby", response=List[EventOut])
+@query_budget(1)
 def events_nearby(
     request,
     lat: float,
@@ -173,16 +478,31 @@ def events_nearby(
     km: float = 25.0,
     event_type: Optional[str] = None,
     upcoming_only: bool = True,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
 ):
     """
     Finds events near a lat/lng within radius km.
     Works great because Location.coordinates uses geography=True.
+
+    With SOCIETY_SPATIAL_INDEX on, the location ids + distances come from the
+    in-process index (society/spatial.py) and Postgres only fetches the events.
     """
+    selected = parse_event_fields(fields, exclude)
+
+    hits = spatial.index.within(lat, lng, km)
+    if hits is not None:
+        return json_response(render(_events_nearby_indexed(hits, event_type, upcoming_only, selected)))
+
+    out = [_nearby_row(row, selected) for row in _nearby_qs(lat, lng, km, event_type, upcoming_only, selected)]
+    return json_response(render(out))
+
+
+def _nearby_qs(lat: float, lng: float, km: float, event_type, upcoming_only: bool, selected=None):
     user_point = Point(lng, lat, srid=4326)
 
     qs = (
-        Event.objects.select_related("location")
-        .filter(location__coordinates__isnull=False)
+        Event.objects.filter(location__coordinates__isnull=False)
         .annotate(distance=Distance("location__coordinates", user_point))
         .filter(location__coordinates__distance_lte=(user_point, D(km=km)))
     )
@@ -195,28 +515,370 @@ def events_nearby(
     else:
         qs = qs.order_by("distance", "-start_date")
 
-    out: List[EventOut] = []
-    for e in qs:
-        dist = getattr(e, "distance", None)
+    return event_values(qs, "distance", fields=selected)
+
+
+def _nearby_row(row, selected=None) -> dict:
+    dist = row["distance"]
+
+    # With geography=True, dist usually supports .m (meters)
+    distance_km = (dist.m / 1000.0) if dist is not None and hasattr(dist, "m") else None
+    return event_row(row, distance_km=distance_km, fields=selected)
+
+def _bbox(min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+    try:
+        return bbox_polygon(min_lat, min_lng, max_lat, max_lng)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+
+def _fold_clusters(rows, kind: str):
+    """
+    rows: one per (cell, kind) with n / lat_sum / lng_sum
+    -> one cluster per cell, centroid = mean of the points, dominant kind = largest n
+    """
+    cells = {}
+    for row in rows:
+        c = cells.setdefault(row["cell"], {"count": 0, "lat_sum": 0.0, "lng_sum": 0.0, "best": (0, "")})
+        c["count"] += row["n"]
+        c["lat_sum"] += row["lat_sum"] or 0.0
+        c["lng_sum"] += row["lng_sum"] or 0.0
+        c["best"] = max(c["best"], (row["n"], row[kind]))
+
+    return [
+        {
+            "cell": cell,
+            "count": c["count"],
+            "lat": c["lat_sum"] / c["count"],
+            "lng": c["lng_sum"] / c["count"],
+            kind: c["best"][1],
+        }
+        for cell, c in sorted(cells.items())
+    ]
+
+
+# Search: ranked full-text (search_vector GIN) + trigram substring/fuzzy matching.
+# Thai queries match through the trigram indexes on the Thai columns.
+
+SEARCH_MAX_LIMIT = 50
+
+
+def _search_page(qs, limit: int, offset: int):
+    limit = min(max(limit, 1), SEARCH_MAX_LIMIT)
+    offset = max(offset, 0)
+    count = qs.count()
+    rows = list(qs[offset : offset + limit])
+    next_offset = offset + limit if (offset + limit) < count else None
+    return rows, count, limit, offset, next_offset
+
+
+@router.get("/events/search", response=PaginatedEventsOut)
+@query_budget(2)
+def events_search(
+    request,
+    q: str,
+    country_code: Optional[str] = None,
+    event_type: Optional[str] = None,
+    upcoming_only: bool = False,
+    limit: int = 20,
+    offset: int = 0,
+):
+    q = q.strip()
+    if not q:
+        raise HttpError(400, "q is required")
+
+    qs = _filter_events(Event.objects.all(), country_code=country_code, event_type=event_type)
+    if upcoming_only:
+        qs = qs.filter(start_date__gte=timezone.now())
+
+    rows, count, limit, offset, next_offset = _search_page(event_values(search_events(qs, q)), limit, offset)
+    return json_response(
+        render(
+            {
+                "items": event_rows(rows),
+                "count": count,
+                "count_is_estimate": False,
+                "limit": limit,
+                "offset": offset,
+                "next_offset": next_offset,
+                "next_cursor": None,
+                "prev_cursor": None,
+            }
+        )
+    )
+
+
+@router.get("/locations/search", response=PaginatedLocationsOut)
+@query_budget(2)
+def locations_search(
+    request,
+    q: str,
+    country_code: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    q = q.strip()
+    if not q:
+        raise HttpError(400, "q is required")
+
+    qs = Location.objects.all()
+    if country_code:
+        qs = qs.filter(country_code__iexact=country_code)
+    if category:
+        qs = qs.filter(category=category)
+
+    rows, count, limit, offset, next_offset = _search_page(location_values(search_locations(qs, q)), limit, offset)
+    return json_response(
+        render(
+            {
+                "items": location_rows(rows),
+                "count": count,
+                "limit": limit,
+                "offset": offset,
+                "next_offset": next_offset,
+            }
+        )
+    )
+
+
+# Viewport queries: coordinates::geometry && the bbox envelope (geo.filter_bbox) uses the
+# GiST index on it (migration 0014), so panning the map is one indexed query.
+
+BBOX_MAX_LIMIT = 500
+
+
+def _bbox_events_qs(bbox, event_type, upcoming_only: bool):
+    qs = filter_bbox(Event.objects.all(), "location__coordinates", bbox)
+    if event_type:
+        qs = qs.filter(event_type=event_type)
+    if upcoming_only:
+        qs = qs.filter(start_date__gte=timezone.now())
+    return qs
+
+
+@router.get("/events/in_bbox", response=CursorEventsOut)
+@query_budget(1)
+def events_in_bbox(
+    request,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    event_type: Optional[str] = None,
+    upcoming_only: bool = True,
+    limit: int = 200,
+    cursor: Optional[str] = None,
+):
+    bbox = _bbox(min_lat, min_lng, max_lat, max_lng)
+    limit = min(max(limit, 1), BBOX_MAX_LIMIT)
+
+    qs = _bbox_events_qs(bbox, event_type, upcoming_only)
+    rows, next_cursor, prev_cursor = keyset_page(event_values(qs), cursor, limit, ascending=upcoming_only)
+    return json_response(
+        render(
+            {
+                "items": event_rows(rows),
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        )
+    )
+
+
+@router.get("/locations/in_bbox", response=CursorLocationsOut)
+@query_budget(1)
+def locations_in_bbox(
+    request,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    category: Optional[str] = None,
+    limit: int = 200,
+    cursor: Optional[str] = None,
+):
+    bbox = _bbox(min_lat, min_lng, max_lat, max_lng)
+    limit = min(max(limit, 1), BBOX_MAX_LIMIT)
+
+    qs = filter_bbox(Location.objects.all(), "coordinates", bbox)
+    if category:
+        qs = qs.filter(category=category)
+
+    rows, next_cursor = id_page(location_values(qs), cursor, limit)
+    return json_response(
+        render(
+            {
+                "items": location_rows(rows),
+                "limit": limit,
+                "next_cursor": next_cursor,
+            }
+        )
+    )
+
+
+# Map clusters: one GROUP BY on the geohash prefix for the zoom level,
+# instead of shipping every marker to the phone.
 
-        # With geography=True, dist usually supports .m (meters)
-        distance_km = (dist.m / 1000.0) if dist is not None and hasattr(dist, "m") else None
-        out.append(event_to_out(e, distance_km=distance_km))
+@router.get("/locations/clusters", response=List[LocationClusterOut])
+@query_budget(1)
+def location_clusters(
+    request,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    zoom: int,
+    category: Optional[str] = None,
+    country_code: Optional[str] = None,
+):
+    bbox = _bbox(min_lat, min_lng, max_lat, max_lng)
+    precision = zoom_to_precision(zoom)
+
+    def build():
+        qs = filter_bbox(Location.objects.all(), "coordinates", bbox)
+        if category:
+            qs = qs.filter(category=category)
+        if country_code:
+            qs = qs.filter(country_code__iexact=country_code)
+
+        rows = (
+            qs.annotate(cell=Substr("geohash", 1, precision))
+            .values("cell", "category")
+            .annotate(n=Count("id"), lat_sum=Sum(Lat("coordinates")), lng_sum=Sum(Lng("coordinates")))
+            .order_by()
+        )
+        return _fold_clusters(rows, "category")
+
+    params = {
+        "bbox": [min_lat, min_lng, max_lat, max_lng],
+        "precision": precision,
+        "category": category,
+        "country_code": _norm_cc(country_code),
+    }
+    return cache.cached_json("location_clusters", params, [cache.LOCATIONS], build)
+
+
+@router.get("/events/clusters", response=List[EventClusterOut])
+@query_budget(1)
+def event_clusters(
+    request,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    zoom: int,
+    event_type: Optional[str] = None,
+    upcoming_only: bool = True,
+):
+    bbox = _bbox(min_lat, min_lng, max_lat, max_lng)
+    precision = zoom_to_precision(zoom)
+
+    def build():
+        qs = filter_bbox(Event.objects.all(), "location__coordinates", bbox)
+        if event_type:
+            qs = qs.filter(event_type=event_type)
+        if upcoming_only:
+            qs = qs.filter(start_date__gte=timezone.now())
+
+        rows = (
+            qs.annotate(cell=Substr("location__geohash", 1, precision))
+            .values("cell", "event_type")
+            .annotate(
+                n=Count("id"),
+                lat_sum=Sum(Lat("location__coordinates")),
+                lng_sum=Sum(Lng("location__coordinates")),
+            )
+            .order_by()
+        )
+        return _fold_clusters(rows, "event_type")
+
+    params = {
+        "bbox": [min_lat, min_lng, max_lat, max_lng],
+        "precision": precision,
+        "event_type": event_type,
+        "upcoming_only": upcoming_only,
+    }
+    return cache.cached_json("event_clusters", params, [cache.EVENTS], build)
+
+
+# Batch profiles for the community dashboard: one query for the profiles, one for the
+# saved_events through table (+ one for the events with expand=saved_events),
+# however many profiles are asked for.
+
+MEMBER_BATCH_MAX = 500
+EXPAND_SAVED_EVENTS = "saved_events"
+
+
+@router.get("/member_profiles", response=List[MemberProfileExpandedOut])
+@query_budget(3)
+def list_member_profiles(
+    request,
+    ids: Optional[str] = None,
+    user_ids: Optional[str] = None,
+    expand: Optional[str] = None,
+):
+    profile_ids, member_user_ids = _norm_ids(ids), _norm_ids(user_ids)
+    if not profile_ids and not member_user_ids:
+        raise HttpError(400, "ids or user_ids is required")
+    if len((profile_ids or "").split(",")) + len((member_user_ids or "").split(",")) > MEMBER_BATCH_MAX:
+        raise HttpError(400, f"At most {MEMBER_BATCH_MAX} profiles per request")
+    if expand not in (None, "", EXPAND_SAVED_EVENTS):
+        raise HttpError(400, f"expand must be {EXPAND_SAVED_EVENTS}")
+    expanded = expand == EXPAND_SAVED_EVENTS
+
+    def build():
+        match = Q()
+        if profile_ids:
+            match |= Q(id__in=profile_ids.split(","))
+        if member_user_ids:
+            match |= Q(user_id__in=member_user_ids.split(","))
+
+        profiles = list(
+            MemberProfile.objects.filter(match).values("id", "user_id", "home_city", "interests").order_by("id")
+        )
+
+        saved = {p["id"]: [] for p in profiles}
+        through = MemberProfile.saved_events.through.objects.filter(memberprofile_id__in=list(saved))
+        for profile_id, event_id in through.order_by("id").values_list("memberprofile_id", "event_id"):
+            saved[profile_id].append(event_id)
+
+        events = {}
+        if expanded:
+            event_ids = {event_id for event_ids in saved.values() for event_id in event_ids}
+            rows = event_values(Event.objects.filter(id__in=event_ids), fields=EVENT_COMPACT_FIELDS)
+            events = {row["id"]: event_row(row, fields=EVENT_COMPACT_FIELDS) for row in rows}
+
+        out = []
+        for p in profiles:
+            item = {**p, "saved_event_ids": saved[p["id"]]}
+            if expanded:
+                item["saved_events"] = [events[i] for i in saved[p["id"]] if i in events]
+            out.append(item)
+        return out
+
+    params = {"ids": profile_ids, "user_ids": member_user_ids, "expand": expanded}
+    namespaces = [cache.MEMBERS, cache.EVENTS] if expanded else [cache.MEMBERS]
+    return cache.cached_json("member_profiles", params, namespaces, build)
 
-    return out
 
 @router.get("/member_profiles/{profile_id}", response=MemberProfileOut)
+@query_budget(2)
 def get_member_profile(
     request, profile_id: int):
-    profile = get_object_or_404(MemberProfile, id=profile_id)
-
-    return MemberProfileOut(
-        id=profile.id,
-        user_id=profile.user_id,
-        home_city=profile.home_city,
-        interests=profile.interests,
-        saved_event_ids=list(profile.saved_events.values_list("id", flat=True)),
-    )
+    def build():
+        profile = get_object_or_404(MemberProfile, id=profile_id)
+
+        return MemberProfileOut(
+            id=profile.id,
+            user_id=profile.user_id,
+            home_city=profile.home_city,
+            interests=profile.interests,
+            saved_event_ids=list(profile.saved_events.values_list("id", flat=True)),
+        )
+
+    return cache.cached_json("member_profile", {"id": profile_id}, [cache.MEMBERS], build)
 
 
 
@@ -0,0 +1,210 @@
+# society/api_async.py
+from typing import List, Optional
+
+from asgiref.sync import sync_to_async
+from ninja import Router
+
+from .api import (
+    _bbox,
+    _bbox_events_qs,
+    _count_filters,
+    _cursor_page_out,
+    _list_events_qs,
+    _locations_qs,
+    _nearby_indexed_out,
+    _nearby_indexed_qs,
+    _nearby_qs,
+    _nearby_row,
+    _norm_cc,
+    _norm_fields,
+    _offset_page_out,
+    _ordered_events,
+    _paged_events_qs,
+    BBOX_MAX_LIMIT,
+)
+from .models import EventChange
+from .pagination import keyset_filter, keyset_rows
+from .renderers import json_response, render
+from .schemas import CursorEventsOut, EventOut, LocationOut, PaginatedEventsOut
+from .serializers import event_rows, event_values, location_rows, location_values
+from .serializers import parse_event_fields, parse_location_fields
+from .querybudget import query_budget
+from . import cache, conditional, counts, spatial
+
+
+# Async versions of the hot read endpoints, for the ASGI deployment (SERVER_MODE=asgi).
+# Same querysets, cache keys and output as society/api.py, only the ORM calls are
+# awaited (async iteration / acount), so a slow PostGIS query parks a coroutine
+# instead of blocking a whole worker.
+#
+# society/urls.py mounts this router (async_api in config/api.py) in front of the sync
+# one when SOCIETY_ASYNC_VIEWS is on; every other endpoint still resolves to society/api.py.
+
+router = Router(tags=["society"])
+
+
+async def _fetch(qs) -> list:
+    return [row async for row in qs]
+
+
+@router.get("/locations", response=List[LocationOut])
+@query_budget(2)
+async def list_locations(
+    request,
+    country_code: Optional[str] = None,
+    category: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+):
+    selected = parse_location_fields(fields, exclude)
+
+    async def build():
+        qs = _locations_qs(country_code, category, q)
+        return location_rows(await _fetch(location_values(qs, fields=selected)), fields=selected)
+
+    params = {"country_code": _norm_cc(country_code), "category": category, "q": q, "fields": _norm_fields(selected)}
+    return await conditional.aconditional_json(request, "locations", params, [cache.LOCATIONS], build, EventChange.Kind.LOCATION)
+
+
+@router.get("/events", response=List[EventOut])
+@query_budget(2)
+async def list_events(
+    request,
+    country_code: Optional[str] = None,
+    event_type: Optional[str] = None,
+    location_id: Optional[int] = None,
+    upcoming_only: bool = True,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+):
+    selected = parse_event_fields(fields, exclude)
+
+    async def build():
+        qs = _list_events_qs(country_code, event_type, location_id, upcoming_only)
+        return event_rows(await _fetch(event_values(qs, fields=selected)), fields=selected)
+
+    params = {
+        "country_code": _norm_cc(country_code),
+        "event_type": event_type,
+        "location_id": location_id,
+        "upcoming_only": upcoming_only,
+        "fields": _norm_fields(selected),
+    }
+    return await conditional.aconditional_json(
+        request, "events", params, [cache.EVENTS], build, EventChange.Kind.EVENT, upcoming_only
+    )
+
+
+@router.get("/events/paged", response=PaginatedEventsOut)
+@query_budget(4)
+async def list_events_paged(
+    request,
+    country_code: Optional[str] = None,
+    event_type: Optional[str] = None,
+    ids: Optional[str] = None,
+    location_id: Optional[int] = None,
+    upcoming_only: bool = True,
+    limit: int = 12,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    with_count: bool = True,
+    count_strategy: Optional[str] = None,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+):
+    selected = parse_event_fields(fields, exclude)
+    strategy = counts.parse_strategy(count_strategy, with_count)
+
+    # Guardrails
+    if limit < 1:
+        limit = 12
+    limit = min(limit, 50)
+
+    if offset < 0:
+        offset = 0
+
+    async def build():
+        qs = _paged_events_qs(country_code, event_type, ids, location_id, upcoming_only)
+        if strategy == counts.EXACT:
+            count, estimated = await qs.acount(), False
+        else:
+            # EXPLAIN / the count memo are sync
+            count, estimated = await sync_to_async(counts.count_events)(qs, strategy, filters)
+
+        if cursor:
+            page, direction = keyset_filter(event_values(qs, "start_date", fields=selected), cursor, ascending=upcoming_only)
+            rows, next_cursor, prev_cursor = keyset_rows(await _fetch(page[: limit + 1]), cursor, direction, limit)
+            return _cursor_page_out(rows, count, limit, next_cursor, prev_cursor, selected, estimated)
+
+        page = _ordered_events(qs, upcoming_only)
+        rows = await _fetch(event_values(page, "start_date", fields=selected)[offset : offset + limit + 1])
+        return _offset_page_out(rows, count, limit, offset, selected, estimated)
+
+    filters = _count_filters(country_code, event_type, ids, location_id, upcoming_only)
+    params = {
+        **filters,
+        "limit": limit,
+        "offset": offset,
+        "cursor": cursor,
+        "count_strategy": strategy,
+        "fields": _norm_fields(selected),
+    }
+    return await conditional.aconditional_json(
+        request, "events_paged", params, [cache.EVENTS], build, EventChange.Kind.EVENT, upcoming_only
+    )
+
+
+@router.get("/events/nearby", response=List[EventOut])
+@query_budget(1)
+async def events_nearby(
+    request,
+    lat: float,
+    lng: float,
+    km: float = 25.0,
+    event_type: Optional[str] = None,
+    upcoming_only: bool = True,
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+):
+    selected = parse_event_fields(fields, exclude)
+
+    # the index checks its freshness in the cache (sync I/O), off the event loop
+    hits = await sync_to_async(spatial.index.within)(lat, lng, km)
+    if hits is not None:
+        distances = dict(hits)
+        rows = await _fetch(_nearby_indexed_qs(distances, event_type, selected)) if distances else []
+        return json_response(render(_nearby_indexed_out(rows, distances, upcoming_only, selected)))
+
+    rows = await _fetch(_nearby_qs(lat, lng, km, event_type, upcoming_only, selected))
+    return json_response(render([_nearby_row(row, selected) for row in rows]))
+
+
+@router.get("/events/in_bbox", response=CursorEventsOut)
+@query_budget(1)
+async def events_in_bbox(
+    request,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    event_type: Optional[str] = None,
+    upcoming_only: bool = True,
+    limit: int = 200,
+    cursor: Optional[str] = None,
+):
+    bbox = _bbox(min_lat, min_lng, max_lat, max_lng)
+    limit = min(max(limit, 1), BBOX_MAX_LIMIT)
+
+    page, direction = keyset_filter(event_values(_bbox_events_qs(bbox, event_type, upcoming_only)), cursor, ascending=upcoming_only)
+    rows, next_cursor, prev_cursor = keyset_rows(await _fetch(page[: limit + 1]), cursor, direction, limit)
+    return json_response(
+        render(
+            {
+                "items": event_rows(rows),
+                "limit": limit,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        )
+    )
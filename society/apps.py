@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SocietyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'society'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (connects cache invalidation)
@@ -0,0 +1,105 @@
+# society/cache.py
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from .db_router import pin_primary
+from .renderers import json_response, render
+
+
+# Response cache for the read-heavy society endpoints.
+#
+# Entries are keyed by endpoint + normalized query params + the current version of
+# every "namespace" the response depends on. Writes bump the namespace version
+# (see society/signals.py), so stale entries are simply never read again and age
+# out through the backend's TTL / MAX_ENTRIES eviction.
+
+CACHE_ALIAS = "society"
+
+LOCATIONS = "locations"
+EVENTS = "events"
+MEMBERS = "members"
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(namespace: str) -> str:
+    return f"society:ns:{namespace}"
+
+
+def namespace_versions(*namespaces: str) -> list:
+    cache = get_cache()
+    keys = [_version_key(ns) for ns in namespaces]
+    found = cache.get_many(keys)
+
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            # Seed from the clock, so an evicted counter can never come back
+            # with a value that old entries were stored under.
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        versions.append(version)
+    return versions
+
+
+def invalidate(*namespaces: str) -> None:
+    # Replicas may not have the write yet: keep API reads on the primary for a
+    # moment so the next fill doesn't cache the old rows (no-op without replicas)
+    pin_primary()
+
+    cache = get_cache()
+    for ns in namespaces:
+        key = _version_key(ns)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def make_key(endpoint: str, params: Dict[str, Any], namespaces: Iterable[str]) -> str:
+    normalized = {k: v for k, v in sorted(params.items()) if v is not None}
+    digest = hashlib.md5(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+    versions = ".".join(str(v) for v in namespace_versions(*namespaces))
+    return f"society:{endpoint}:{versions}:{digest}"
+
+
+def cached_json(endpoint: str, params: Dict[str, Any], namespaces: Iterable[str], build: Callable[[], Any]) -> HttpResponse:
+    """
+    Returns the rendered JSON for endpoint+params, calling build() only on a miss.
+    A hit skips the ORM, the *_to_out() conversion and the schema validation.
+    """
+    if not settings.SOCIETY_CACHE_ENABLED:
+        return json_response(render(build()))
+
+    cache = get_cache()
+    key = make_key(endpoint, params, namespaces)
+    content = cache.get(key)
+    if content is None:
+        content = render(build())
+        cache.set(key, content)
+    return json_response(content)
+
+
+async def acached_json(
+    endpoint: str, params: Dict[str, Any], namespaces: Iterable[str], build: Callable[[], Awaitable[Any]]
+) -> HttpResponse:
+    """cached_json() for the async views (society/api_async.py): build is a coroutine function."""
+    if not settings.SOCIETY_CACHE_ENABLED:
+        return json_response(render(await build()))
+
+    cache = get_cache()
+    key = await sync_to_async(make_key)(endpoint, params, namespaces)
+    content = await cache.aget(key)
+    if content is None:
+        content = render(await build())
+        await cache.aset(key, content)
+    return json_response(content)
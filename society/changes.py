@@ -0,0 +1,189 @@
+# society/changes.py
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import F, Max, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.query import QuerySet
+from ninja.errors import HttpError
+
+from .models import Event, EventChange
+from .serializers import event_rows, event_values
+
+
+# Delta sync for the mobile app (/events/changes?since=<token>).
+#
+# Every Event / Location write and delete inserts an EventChange row in the same
+# transaction (society/signals.py, and the bulk importers / seeding that skip signals).
+# A Location edit records an upsert for each of its events, since EventOut embeds it.
+# Location upserts themselves aren't served by the feed; they move the /locations
+# validator (society/conditional.py).
+#
+# Ordering: ids come from a sequence, so a transaction that commits late can make a
+# *smaller* id visible after bigger ones were served. The feed therefore orders by
+# (txid, id) and only serves rows of transactions older than the snapshot xmin
+# (every transaction below it has finished), so nothing can appear behind a token.
+#
+# Token = "<txid>.<id>" of the last row served (opaque to clients, only grows).
+# since=0 (or no since, or a token older than the pruned part of the log) answers
+# reset=true with a fresh token: reload /events, then sync from that token.
+
+EVENT = EventChange.Kind.EVENT
+LOCATION = EventChange.Kind.LOCATION
+LOG = EventChange.Kind.LOG
+
+UPSERT = EventChange.Op.UPSERT
+DELETE = EventChange.Op.DELETE
+PRUNED = EventChange.Op.PRUNED
+
+FEED_MAX_LIMIT = 2000
+
+_TABLE = EventChange._meta.db_table
+_INSERT = f"INSERT INTO {_TABLE} (kind, op, object_id, txid, changed_at)"
+
+Token = Tuple[int, int]
+
+
+# -- recording ---------------------------------------------------------------------------
+
+
+def _record(kind: str, objects, op: str) -> None:
+    # objects: ids, or a queryset (recorded with one INSERT ... SELECT)
+    with connection.cursor() as cursor:
+        if isinstance(objects, QuerySet):
+            sql, params = objects.order_by().values("id").query.sql_with_params()
+            cursor.execute(
+                f"{_INSERT} SELECT %s, %s, ids.id, txid_current(), now() FROM ({sql}) AS ids", [kind, op, *params]
+            )
+            return
+        ids = list(objects)
+        if ids:
+            cursor.execute(f"{_INSERT} SELECT %s, %s, UNNEST(%s::bigint[]), txid_current(), now()", [kind, op, ids])
+
+
+def record_events(events, op: str = UPSERT) -> None:
+    """events: ids, or an Event queryset."""
+    _record(EVENT, events, op)
+
+
+def record_locations(locations, op: str = UPSERT) -> None:
+    """locations: ids, or a Location queryset."""
+    _record(LOCATION, locations, op)
+
+
+def record_location_events(location_ids: Iterable[int]) -> None:
+    """Locations changed: every event at them changed too (as seen by clients)."""
+    location_ids = list(location_ids)
+    if location_ids:
+        record_events(Event.objects.filter(location_id__in=location_ids))
+
+
+def record_location_deletes(location_ids: Iterable[int]) -> None:
+    record_locations(location_ids, DELETE)
+
+
+def prune(before: datetime) -> int:
+    """Delete rows written before `before`; tokens from that range get reset=true from now on."""
+    with transaction.atomic():
+        old = EventChange.objects.filter(changed_at__lt=before).exclude(kind=LOG)
+        horizon = old.aggregate(txid=Max("txid"))["txid"]
+        if horizon is None:
+            return 0
+        # whole transactions share changed_at (now() is the transaction start), so no
+        # transaction is left half-pruned
+        deleted, _ = old.delete()
+        EventChange.objects.filter(kind=LOG).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{_INSERT} VALUES (%s, %s, %s, txid_current(), now())", [LOG, PRUNED, horizon])
+    return deleted
+
+
+# -- the feed ----------------------------------------------------------------------------
+
+
+def encode_token(token: Token) -> str:
+    return f"{token[0]}.{token[1]}"
+
+
+def decode_token(value: Optional[str]) -> Optional[Token]:
+    """None for a reset request (no token / "0")."""
+    if value is None or value.strip() in ("", "0"):
+        return None
+    try:
+        txid, pk = value.strip().split(".")
+        token = int(txid), int(pk)
+    except ValueError:
+        raise HttpError(400, "Invalid since token")
+    if token[0] < 0 or token[1] < 0:
+        raise HttpError(400, "Invalid since token")
+    return token
+
+
+def _settled():
+    # rows of transactions that can't commit anymore (below the oldest running one)
+    return EventChange.objects.alias(
+        xmin=RawSQL("txid_snapshot_xmin(txid_current_snapshot())", [])
+    ).filter(txid__lt=F("xmin"))
+
+
+def _served():
+    # location upserts only feed the /locations validator
+    return _settled().exclude(kind=LOG).exclude(kind=LOCATION, op=UPSERT)
+
+
+def _reset(horizon: Optional[int]) -> Dict:
+    last = _served().order_by("-txid", "-id").values_list("txid", "id").first()
+    if last is None:
+        # empty (or fully pruned) log: start past the prune horizon, or this resets forever
+        last = (horizon + 1, 0) if horizon is not None else (0, 0)
+    return {
+        "events": [],
+        "deleted_event_ids": [],
+        "deleted_location_ids": [],
+        "next_token": encode_token(last),
+        "has_more": False,
+        "reset": True,
+    }
+
+
+def feed(since: Optional[str], limit: int) -> Dict:
+    """The /events/changes payload (EventChangesOut)."""
+    token = decode_token(since)
+    limit = min(max(limit, 1), FEED_MAX_LIMIT)
+
+    horizon = EventChange.objects.filter(kind=LOG).values_list("object_id", flat=True).first()
+    if token is None or (horizon is not None and token[0] <= horizon):
+        return _reset(horizon)
+
+    txid, pk = token
+    rows = list(
+        _served()
+        .filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=pk))
+        .order_by("txid", "id")
+        .values_list("txid", "id", "kind", "op", "object_id")[: limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # Latest op per object wins
+    latest: Dict[Tuple[str, int], str] = {}
+    for _, _, kind, op, object_id in rows:
+        latest[(kind, object_id)] = op
+
+    upserted = sorted(oid for (kind, oid), op in latest.items() if kind == EVENT and op == UPSERT)
+    events: List[Dict] = []
+    if upserted:
+        # Current state from the primary: a lagging replica could hand out the old row for a
+        # change the token then moves past. Events deleted since show up as a later delete.
+        qs = Event.objects.db_manager(DEFAULT_DB_ALIAS).filter(id__in=upserted).order_by("id")
+        events = event_rows(event_values(qs))
+
+    return {
+        "events": events,
+        "deleted_event_ids": sorted(oid for (kind, oid), op in latest.items() if kind == EVENT and op == DELETE),
+        "deleted_location_ids": sorted(oid for (kind, oid), op in latest.items() if kind == LOCATION and op == DELETE),
+        "next_token": encode_token(rows[-1][:2]) if rows else encode_token(token),
+        "has_more": has_more,
+        "reset": False,
+    }
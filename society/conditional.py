@@ -0,0 +1,103 @@
+# society/conditional.py
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import connections, router
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+
+from . import cache
+from .models import Event, EventChange, Location
+
+
+# Conditional GETs (ETag -> 304) for the list endpoints.
+#
+# The ETag comes from index probes, never from the result set:
+# - the newest settled EventChange row of the endpoint's kind (society/changes.py). Every
+#   write and delete logs one, bulk imports included, and "settled" (below the snapshot
+#   xmin) means a transaction committing late can't slip in behind it.
+# - how many rows of that kind are visible above the xmin. Any long transaction in the
+#   cluster (reconcile_popularity, seed_with_copy) holds the xmin back, and writes that
+#   commit meanwhile only show up here. Rows leave this set only when the xmin moves,
+#   which moves the settled row above, so a commit always changes one of the two.
+# - for upcoming_only lists, the newest start_date that has passed: an event that starts
+#   drops out of the list without any write.
+# The result is conservative (any event change revalidates every event list), shared by
+# all processes, and answered before the list query / serialization.
+#
+# No Last-Modified: neither input is a timestamp that only grows.
+
+_VALIDATOR_SQL = f"""
+SELECT
+    (SELECT txid || '.' || id FROM {EventChange._meta.db_table}
+     WHERE kind = %(kind)s AND txid < txid_snapshot_xmin(txid_current_snapshot())
+     ORDER BY txid DESC, id DESC LIMIT 1),
+    (SELECT count(*) FROM {EventChange._meta.db_table}
+     WHERE kind = %(kind)s AND txid >= txid_snapshot_xmin(txid_current_snapshot())),
+    (SELECT max(start_date) FROM {Event._meta.db_table} WHERE %(upcoming)s AND start_date <= %(now)s)
+"""
+
+Validator = Tuple[Optional[str], int, Optional[Any]]
+
+
+def validator(kind: str, upcoming_only: bool = False) -> Validator:
+    """(change-log high-water mark, unsettled rows, last passed start_date or None). One query."""
+    model = Event if kind == EventChange.Kind.EVENT else Location
+    # the database the list itself is read from, so a lagging replica can't pair an old
+    # body with a new mark
+    with connections[router.db_for_read(model)].cursor() as cursor:
+        cursor.execute(_VALIDATOR_SQL, {"kind": kind, "upcoming": upcoming_only, "now": timezone.now()})
+        return cursor.fetchone()
+
+
+def make_etag(endpoint: str, params: Dict[str, Any], mark: Validator) -> str:
+    normalized = {k: v for k, v in sorted(params.items()) if v is not None}
+    raw = json.dumps([endpoint, normalized, *mark], default=str)
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def _stamp(response: HttpResponse, etag: str) -> HttpResponse:
+    response["ETag"] = etag
+    # clients may keep the body but must revalidate it
+    response.setdefault("Cache-Control", "no-cache")
+    return response
+
+
+def conditional_json(
+    request,
+    endpoint: str,
+    params: Dict[str, Any],
+    namespaces: Iterable[str],
+    build: Callable[[], Any],
+    kind: str,
+    upcoming_only: bool = False,
+) -> HttpResponse:
+    """
+    cache.cached_json() behind If-None-Match. kind: the EventChange kind the response is
+    built from, upcoming_only: whether it hides started events.
+    """
+    etag = make_etag(endpoint, params, validator(kind, upcoming_only))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = cache.cached_json(endpoint, params, namespaces, build)
+    return _stamp(response, etag)
+
+
+async def aconditional_json(
+    request,
+    endpoint: str,
+    params: Dict[str, Any],
+    namespaces: Iterable[str],
+    build: Callable[[], Awaitable[Any]],
+    kind: str,
+    upcoming_only: bool = False,
+) -> HttpResponse:
+    """conditional_json() for society/api_async.py: build is a coroutine function."""
+    etag = make_etag(endpoint, params, await sync_to_async(validator)(kind, upcoming_only))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = await cache.acached_json(endpoint, params, namespaces, build)
+    return _stamp(response, etag)
@@ -0,0 +1,77 @@
+# society/counts.py
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from ninja.errors import HttpError
+
+from . import cache
+
+
+# Count strategies for the paginated listings (?count_strategy= on /events/paged).
+#
+# - exact:     COUNT(*) over the filtered queryset, every page (the old behaviour)
+# - cached:    exact, memoized per normalized filter set until the next Event write
+#              (or the cache TTL: upcoming_only counts drift as events start)
+# - estimated: the planner's row estimate (EXPLAIN, no rows read). Small results are
+#              counted exactly anyway, estimates are worst there and a count is cheap
+# - none:      no count (same as with_count=false)
+#
+# count_events() returns (count, is_estimate).
+
+EXACT = "exact"
+CACHED = "cached"
+ESTIMATED = "estimated"
+NONE = "none"
+
+STRATEGIES = (EXACT, CACHED, ESTIMATED, NONE)
+
+# Below this many estimated rows, count exactly
+ESTIMATE_EXACT_BELOW = 1000
+
+
+def parse_strategy(value: Optional[str], with_count: bool = True) -> str:
+    if not with_count:
+        return NONE
+    value = (value or getattr(settings, "SOCIETY_COUNT_STRATEGY", EXACT)).strip().lower()
+    if value not in STRATEGIES:
+        raise HttpError(400, f"count_strategy must be one of: {', '.join(STRATEGIES)}")
+    return value
+
+
+def estimate_rows(qs) -> int:
+    """Planner estimate of how many rows qs returns."""
+    sql, params = qs.order_by().values("pk").query.sql_with_params()
+    with connections[qs.db].cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_events(qs, strategy: str, filters: Dict[str, Any]) -> Tuple[Optional[int], bool]:
+    """
+    qs: the filtered (unsliced) queryset. filters: the normalized filter params that
+    define it, the memo key for CACHED.
+    """
+    if strategy == NONE:
+        return None, False
+
+    if strategy == ESTIMATED:
+        estimate = estimate_rows(qs)
+        if estimate >= ESTIMATE_EXACT_BELOW:
+            return estimate, True
+        return qs.count(), False
+
+    if strategy == CACHED and settings.SOCIETY_CACHE_ENABLED:
+        store = cache.get_cache()
+        key = cache.make_key("events_count", filters, [cache.EVENTS])
+        count = store.get(key)
+        if count is None:
+            count = qs.count()
+            store.set(key, count)
+        return count, False
+
+    return qs.count(), False
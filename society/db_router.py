@@ -0,0 +1,160 @@
+# society/db_router.py
+import random
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+
+# Read replicas for the society API (DATABASE_REPLICA_URLS, see config/settings.py).
+#
+# - Only Location / Event (and UpcomingEvent) reads made while serving an API GET go to a replica
+#   (ReplicaMiddleware flags the request). Writes, the admin, management commands and
+#   background threads always use the primary.
+# - Read-your-writes: a client that just wrote (admin save, POST...) gets a cookie that
+#   keeps its reads on the primary for SOCIETY_REPLICA_STICKY_SECONDS. Any write that
+#   invalidates the response cache, including the CSV imports, pins *every* API read
+#   to the primary for the same window (through the "society" cache, which therefore has
+#   to be shared: config/settings.py refuses replicas with a per-process cache), so a
+#   lagging replica can't put old rows back into the response cache.
+# - One replica per request, picked on its first replica read: replicas lag differently,
+#   and a request mixing two could pair rows (or an ETag) from different points in time.
+# - A replica that fails to connect is skipped for SOCIETY_REPLICA_CHECK_SECONDS,
+#   reads fall back to the primary.
+
+REPLICA_MODELS = {"society.location", "society.event", "society.upcomingevent"}
+
+STICKY_COOKIE = "society_primary_until"
+_PIN_KEY = "society:db:primary_until"
+
+# None: the request reads from the primary. Otherwise {"alias": ...} once a replica is picked
+_request_db: ContextVar[Optional[Dict[str, str]]] = ContextVar("society_request_db", default=None)
+
+# alias -> monotonic time until which it's considered down (per process)
+_down_until = {}
+
+
+def replicas_enabled() -> bool:
+    return bool(getattr(settings, "DATABASE_REPLICAS", None))
+
+
+def pin_primary(seconds: Optional[float] = None) -> None:
+    """Send every API read to the primary for a while (after writes / bulk imports)."""
+    if not replicas_enabled():
+        return
+    seconds = settings.SOCIETY_REPLICA_STICKY_SECONDS if seconds is None else seconds
+    caches["society"].set(_PIN_KEY, time.time() + seconds, timeout=int(seconds) + 1)
+
+
+def _pinned() -> bool:
+    until = caches["society"].get(_PIN_KEY)
+    return until is not None and until > time.time()
+
+
+def mark_down(alias: str) -> None:
+    _down_until[alias] = time.monotonic() + settings.SOCIETY_REPLICA_CHECK_SECONDS
+
+
+def _healthy(alias: str) -> bool:
+    until = _down_until.get(alias)
+    if until is not None and until > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except OperationalError:
+        mark_down(alias)
+        return False
+    _down_until.pop(alias, None)
+    return True
+
+
+def choose_replica() -> Optional[str]:
+    candidates = list(settings.DATABASE_REPLICAS)
+    random.shuffle(candidates)
+    for alias in candidates:
+        if _healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_db.get()
+        if state is None or model._meta.label_lower not in REPLICA_MODELS:
+            return None
+        if "alias" not in state:
+            state["alias"] = choose_replica() or DEFAULT_DB_ALIAS
+        return state["alias"]
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """Flags API GETs as replica-safe, and sets the sticky cookie after writes."""
+
+    # Sync and async, so the async views (society/api_async.py) don't get a thread hop
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _request_db.set({} if self._replica_safe(request) else None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_db.reset(token)
+        return self._sticky(request, response)
+
+    async def __acall__(self, request):
+        # the dict is shared with the sync_to_async threads (they get a copy of the
+        # context, not of the dict), so they all read from the replica picked first
+        token = _request_db.set({} if self._replica_safe(request) else None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_db.reset(token)
+        return self._sticky(request, response)
+
+    def _sticky(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS"):
+            until = time.time() + settings.SOCIETY_REPLICA_STICKY_SECONDS
+            response.set_cookie(STICKY_COOKIE, str(until), max_age=settings.SOCIETY_REPLICA_STICKY_SECONDS, httponly=True)
+        return response
+
+    def process_exception(self, request, exception):
+        # A replica that died mid-request: skip it from the next request on
+        if isinstance(exception, OperationalError):
+            for alias in settings.DATABASE_REPLICAS:
+                conn = connections[alias]
+                if conn.connection is not None and not conn.is_usable():
+                    mark_down(alias)
+        return None
+
+    def _replica_safe(self, request) -> bool:
+        if request.method not in ("GET", "HEAD") or not request.path.startswith(settings.SOCIETY_REPLICA_PATH_PREFIX):
+            return False
+        try:
+            if float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time():
+                return False
+        except ValueError:
+            pass
+        return not _pinned()
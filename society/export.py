@@ -0,0 +1,106 @@
+# society/export.py
+import csv
+from typing import AsyncIterator, Iterator, Optional, Sequence
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from .renderers import render
+from .serializers import EVENT_SELECTABLE, event_row, event_values
+
+
+# Full catalogue export (/events/export). Rows come off a server-side cursor
+# (.iterator(chunk_size)) and are written out chunk by chunk, so worker memory stays
+# flat however big the catalogue is and the first bytes go out right away.
+#
+# Under ASGI a sync iterator gets drained into a list by Django before the first byte
+# goes out (StreamingHttpResponse.__aiter__), so there the chunks are pulled one at a
+# time from the request's sync thread instead (_achunks).
+
+EXPORT_CHUNK_SIZE = 2000
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+CONTENT_TYPES = {
+    NDJSON: "application/x-ndjson",
+    CSV: "text/csv; charset=utf-8",
+}
+
+
+class _Echo:
+    """csv.writer target that hands the line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    # datetimes etc. formatted exactly like in the JSON responses
+    return render(value).decode().strip('"')
+
+
+def _rows(qs, fields, chunk_size: int) -> Iterator[dict]:
+    for values in event_values(qs, fields=fields).iterator(chunk_size=chunk_size):
+        yield event_row(values, fields=fields)
+
+
+def ndjson_chunks(qs, fields: Optional[Sequence[str]], chunk_size: int) -> Iterator[bytes]:
+    lines = []
+    for row in _rows(qs, fields, chunk_size):
+        lines.append(render(row))
+        if len(lines) >= chunk_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+def csv_chunks(qs, fields: Optional[Sequence[str]], chunk_size: int) -> Iterator[bytes]:
+    # distance_km is only meaningful for /events/nearby
+    columns = [name for name in (fields or EVENT_SELECTABLE) if name != "distance_km"]
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow(columns).encode()
+    lines = []
+    for row in _rows(qs, fields, chunk_size):
+        lines.append(writer.writerow([_csv_value(row[name]) for name in columns]))
+        if len(lines) >= chunk_size:
+            yield "".join(lines).encode()
+            lines = []
+    if lines:
+        yield "".join(lines).encode()
+
+
+async def _achunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    # thread_sensitive: every step on the same thread, so the same connection and the
+    # server-side cursor stay usable between chunks
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            # a default instead of StopIteration, which can't cross into a coroutine
+            chunk = await step(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # client gone mid-export: close the cursor now, not at garbage collection
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def export_response(
+    request, qs, fmt: str, fields: Optional[Sequence[str]] = None, chunk_size: int = EXPORT_CHUNK_SIZE
+):
+    chunks = (csv_chunks if fmt == CSV else ndjson_chunks)(qs, fields, chunk_size)
+    if isinstance(request, ASGIRequest):
+        chunks = _achunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="events.{fmt}"'
+    # don't let a proxy buffer the whole thing
+    response["X-Accel-Buffering"] = "no"
+    return response
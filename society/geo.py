@@ -0,0 +1,120 @@
+# society/geo.py
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.db.models import FloatField, Func, Q
+
+
+# Geohash cells for server-side clustering.
+# Location.geohash is stored at GEOHASH_PRECISION (~5 m cells); a cluster at a given
+# zoom is just the first N characters, so clustering = GROUP BY substr(geohash, 1, N).
+
+GEOHASH_PRECISION = 9
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash interleaves lng, lat, lng, ...
+
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+# Map zoom (0 = world, ~20 = building) -> geohash prefix length.
+# Roughly one cell per few hundred screen pixels.
+_ZOOM_PRECISION = [
+    (2, 1),
+    (4, 2),
+    (7, 3),
+    (9, 4),
+    (12, 5),
+    (14, 6),
+    (16, 7),
+]
+
+
+def zoom_to_precision(zoom: int) -> int:
+    for max_zoom, precision in _ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            return precision
+    return 8
+
+
+def bbox_polygon(min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+    """
+    Viewport -> (multi)polygon in 4326. Raises ValueError on an invalid box.
+    min_lng > max_lng means the viewport crosses the antimeridian (two boxes).
+    """
+    if not (-90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise ValueError("Latitude must be between -90 and 90")
+    if not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+        raise ValueError("Longitude must be between -180 and 180")
+    if min_lat >= max_lat:
+        raise ValueError("min_lat must be smaller than max_lat")
+    if min_lng == max_lng:
+        raise ValueError("min_lng and max_lng must differ")
+
+    if min_lng > max_lng:
+        geom = MultiPolygon(
+            Polygon.from_bbox((min_lng, min_lat, 180, max_lat)),
+            Polygon.from_bbox((-180, min_lat, max_lng, max_lat)),
+        )
+    else:
+        geom = Polygon.from_bbox((min_lng, min_lat, max_lng, max_lat))
+    geom.srid = 4326
+    return geom
+
+
+class AsGeometry(Func):
+    """A geography point column as geometry: coordinates::geometry, what location_coords_geom_idx indexes."""
+
+    template = "%(expressions)s::geometry"
+    output_field = GeometryField(srid=4326)
+
+
+def filter_bbox(qs, field: str, bbox):
+    """
+    Rows whose point `field` lies in bbox (from bbox_polygon()), edges included.
+    Compares on geometry: on the geography column a box's edges are geodesics, so a wide
+    viewport bulges (lat 35-72 over Europe misses Athens) and a world box is rejected.
+    """
+    boxes = list(bbox) if isinstance(bbox, MultiPolygon) else [bbox]
+    inside = Q()
+    for box in boxes:
+        inside |= Q(bbox_point__bboverlaps=box)
+    return qs.alias(bbox_point=AsGeometry(field)).filter(inside)
+
+
+class Lat(Func):
+    """Latitude of a geography point column (ST_Y needs geometry)."""
+
+    template = "ST_Y(%(expressions)s::geometry)"
+    output_field = FloatField()
+
+
+class Lng(Func):
+    """Longitude of a geography point column (ST_X needs geometry)."""
+
+    template = "ST_X(%(expressions)s::geometry)"
+    output_field = FloatField()
@@ -0,0 +1,129 @@
+# society/loadtest.py
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import httpx
+
+
+# Small HTTP load generator for comparing deployments (`manage.py bench_async_views`)
+# and for the in-process endpoint benchmarks (`manage.py bench_endpoints`).
+# One asyncio client keeps `concurrency` requests in flight, so the client side is
+# never the bottleneck for a handful of server workers. Pass an httpx transport
+# (ASGITransport / WSGITransport) to drive the app in-process instead of over TCP.
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> Dict:
+    latencies = sorted(latencies)
+    done = len(latencies) + errors
+    return {
+        "requests": done,
+        "errors": errors,
+        "seconds": seconds,
+        "rps": len(latencies) / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def _load(urls: Sequence[str], total: int, concurrency: int, timeout: float, transport) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, transport=transport) as client:
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(urls[i % len(urls)])
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        seconds = time.perf_counter() - started
+
+    return summarize(latencies, errors, seconds)
+
+
+def run_load(
+    urls: Sequence[str],
+    total: int,
+    concurrency: int,
+    timeout: float = 30.0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict:
+    """GET urls round-robin, `total` requests with `concurrency` in flight. Returns summarize()."""
+    return asyncio.run(_load(list(urls), total, concurrency, timeout, transport))
+
+
+def run_threaded(
+    urls: Sequence[str],
+    total: int,
+    concurrency: int,
+    timeout: float = 30.0,
+    transport: Optional[httpx.BaseTransport] = None,
+    on_thread_exit=None,
+) -> Dict:
+    """
+    Same as run_load() with `concurrency` threads and blocking clients, for WSGI apps
+    (httpx.WSGITransport has no async version). on_thread_exit() runs in every worker
+    thread when it's done, e.g. to close its database connections.
+    """
+    urls = list(urls)
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def worker():
+        nonlocal errors
+        try:
+            with httpx.Client(timeout=timeout, transport=transport) as client:
+                while True:
+                    with lock:
+                        i = next(counter, None)
+                    if i is None:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        response = client.get(urls[i % len(urls)])
+                        ok = response.status_code < 400
+                    except httpx.HTTPError:
+                        ok = False
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        if ok:
+                            latencies.append(elapsed)
+                        else:
+                            errors += 1
+        finally:
+            if on_thread_exit is not None:
+                on_thread_exit()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    seconds = time.perf_counter() - started
+
+    return summarize(latencies, errors, seconds)
@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from society.loadtest import run_load
+
+
+DEFAULT_PATHS = [
+    "/api/society/events/nearby?lat=52.52&lng=13.405&km=25",
+    "/api/society/events/paged?limit=24&with_count=false",
+    "/api/society/events/in_bbox?min_lat=47&min_lng=5&max_lat=55&max_lng=15",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares throughput of a sync (gunicorn) and an async (SERVER_MODE=asgi) deployment "
+        "under high concurrency. Start both against the same Postgres first, e.g.\n"
+        "  gunicorn config.wsgi:application -w 4 -b :8000\n"
+        "  SERVER_MODE=asgi gunicorn config.asgi:application -k uvicorn_worker.UvicornWorker -w 4 -b :8001"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sync-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--async-url", default="http://127.0.0.1:8001")
+        parser.add_argument("--path", action="append", dest="paths", help="Request path (repeatable), round-robin.")
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=200, help="Requests per server before measuring.")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **opts):
+        paths = opts["paths"] or DEFAULT_PATHS
+        results = {}
+        for name, base in (("sync", opts["sync_url"]), ("async", opts["async_url"])):
+            urls = [base.rstrip("/") + path for path in paths]
+            if opts["warmup"]:
+                run_load(urls, opts["warmup"], min(opts["concurrency"], opts["warmup"]))
+            results[name] = run_load(urls, opts["requests"], opts["concurrency"])
+            if not results[name]["requests"] - results[name]["errors"]:
+                raise CommandError(f"Every request to {base} failed, is it running?")
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{opts['requests']} requests, concurrency {opts['concurrency']}, {len(paths)} path(s)")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<6} {r['rps']:>8.1f} req/s  p50={r['p50_ms']:.1f}ms p95={r['p95_ms']:.1f}ms "
+                f"p99={r['p99_ms']:.1f}ms errors={r['errors']}"
+            )
+        ratio = results["async"]["rps"] / results["sync"]["rps"] if results["sync"]["rps"] else 0.0
+        self.stdout.write(self.style.SUCCESS(f"async/sync throughput: {ratio:.2f}x"))
@@ -0,0 +1,225 @@
+import json
+import platform
+import time
+
+import django
+import httpx
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from society.loadtest import run_load, run_threaded, summarize
+from society.models import Event, Location
+from society.querybudget import QueryRecorder
+from society.seeding import seed_with_orm
+
+
+# name -> request path; the coordinates are in the middle of a seeding.py city cluster
+ENDPOINTS = {
+    "events": "/api/society/events?country_code=DE",
+    "events_paged": "/api/society/events/paged?limit=24",
+    "events_paged_type": "/api/society/events/paged?limit=24&event_type=RELIGIOUS&with_count=false",
+    "events_paged_estimated": "/api/society/events/paged?limit=24&count_strategy=estimated",
+    "events_nearby": "/api/society/events/nearby?lat=52.52&lng=13.405&km=25",
+    "tile": "/api/society/tiles/12/2200/1343.mvt",
+}
+
+DRIVERS = ("client", "wsgi", "asgi")
+
+BASE_URL = "http://testserver"
+
+
+def _close_connections():
+    for conn in connections.all():
+        conn.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the API endpoints in-process: Django test client (sequential), WSGI app "
+        "(threads) and ASGI app (asyncio, serving the async views) at --concurrency. Reports p50/p95/p99 latency, "
+        "throughput and queries per request, writes them as JSON (--output) and compares "
+        "against a stored baseline (--baseline). Run it against a local PostGIS; "
+        "--seed-events commits synthetic rows, so only pass it on a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            help=f"Endpoint name ({', '.join(ENDPOINTS)}) or a request path (repeatable, default: all).",
+        )
+        parser.add_argument("--driver", action="append", dest="drivers", choices=DRIVERS, help="Repeatable, default: all.")
+        parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint and driver.")
+        parser.add_argument("--concurrency", type=int, default=16, help="In-flight requests for the wsgi/asgi drivers.")
+        parser.add_argument("--warmup", type=int, default=20, help="Requests per endpoint before measuring.")
+        parser.add_argument("--cache", action="store_true", help="Keep the response cache on (default: measure the DB path).")
+        parser.add_argument("--seed-locations", type=int, default=2000, help="With --seed-events.")
+        parser.add_argument(
+            "--seed-events",
+            type=int,
+            default=0,
+            help="Commit this many synthetic events once before measuring (default: use the data as is).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--baseline", help="Compare against a JSON file written by --output.")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=0.2,
+            help="Fail when p95 grows or throughput drops by more than this fraction vs the baseline.",
+        )
+
+    def handle(self, *args, **opts):
+        endpoints = {}
+        for name in opts["endpoints"] or ENDPOINTS:
+            if name in ENDPOINTS:
+                endpoints[name] = ENDPOINTS[name]
+            elif name.startswith("/"):
+                endpoints[name] = name
+            else:
+                raise CommandError(f"Unknown endpoint '{name}', use one of {', '.join(ENDPOINTS)} or a path")
+        drivers = opts["drivers"] or list(DRIVERS)
+
+        self._seed(opts)
+        if not Event.objects.exists():
+            raise CommandError("No events to benchmark, pass --seed-events N (on a scratch database)")
+
+        overrides = {
+            "SOCIETY_CACHE_ENABLED": opts["cache"] and settings.SOCIETY_CACHE_ENABLED,
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        }
+        with override_settings(**overrides):
+            results = {name: self._bench(path, drivers, opts) for name, path in endpoints.items()}
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "events": Event.objects.count(),
+                "locations": Location.objects.count(),
+                "requests": opts["requests"],
+                "concurrency": opts["concurrency"],
+                "cache": overrides["SOCIETY_CACHE_ENABLED"],
+            },
+            "endpoints": endpoints,
+            "results": results,
+        }
+        self._print(results)
+
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Wrote {opts['output']}")
+
+        if opts["baseline"]:
+            self._compare(results, opts["baseline"], opts["max_regression"])
+
+    def _seed(self, opts):
+        if not opts["seed_events"] or Event.objects.filter(event_external_id__startswith="SEED-EVT-").exists():
+            return
+        started = time.perf_counter()
+        seed_with_orm(max(opts["seed_locations"], 1), opts["seed_events"], seed=opts["seed"])
+        self.stdout.write(
+            f"Seeded {opts['seed_locations']} locations / {opts['seed_events']} events "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _bench(self, path, drivers, opts):
+        url = BASE_URL + path
+        result = {}
+
+        # Sequential pass through the test client: doubles as the warm-up and measures the
+        # queries per request (the other drivers run queries on connections in other threads)
+        client = Client()
+        queries = []
+        latencies = []
+        errors = 0
+        runs = opts["requests"] if "client" in drivers else max(opts["warmup"], 1)
+        started = time.perf_counter()
+        for _ in range(runs):
+            with QueryRecorder() as recorder:
+                t = time.perf_counter()
+                response = client.get(path)
+                elapsed = time.perf_counter() - t
+            if response.status_code >= 400:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            queries.append(recorder.count)
+        if not latencies:
+            raise CommandError(f"Every request to {path} failed (last status {response.status_code})")
+
+        if "client" in drivers:
+            result["client"] = summarize(latencies, errors, time.perf_counter() - started)
+        result["queries_per_request"] = sum(queries) / len(queries)
+
+        if "wsgi" in drivers:
+            transport = httpx.WSGITransport(app=get_wsgi_application())
+            threaded = dict(transport=transport, on_thread_exit=_close_connections)
+            if opts["warmup"]:
+                run_threaded([url], opts["warmup"], min(opts["concurrency"], opts["warmup"]), **threaded)
+            result["wsgi"] = run_threaded([url], opts["requests"], opts["concurrency"], **threaded)
+
+        if "asgi" in drivers:
+            app = get_asgi_application()
+            # the async views (society/api_async.py), whatever SOCIETY_ASYNC_VIEWS says
+            with override_settings(ROOT_URLCONF="config.urls_async"):
+                if opts["warmup"]:
+                    run_load([url], opts["warmup"], min(opts["concurrency"], opts["warmup"]), transport=httpx.ASGITransport(app=app))
+                result["asgi"] = run_load([url], opts["requests"], opts["concurrency"], transport=httpx.ASGITransport(app=app))
+
+        return result
+
+    def _print(self, results):
+        for name, result in results.items():
+            self.stdout.write(f"{name}  ({result['queries_per_request']:.1f} queries/request)")
+            for driver in DRIVERS:
+                r = result.get(driver)
+                if r is None:
+                    continue
+                self.stdout.write(
+                    f"  {driver:<6} {r['rps']:>8.1f} req/s  p50={r['p50_ms']:.1f}ms p95={r['p95_ms']:.1f}ms "
+                    f"p99={r['p99_ms']:.1f}ms errors={r['errors']}"
+                )
+
+    def _compare(self, results, path, max_regression):
+        with open(path) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = []
+        self.stdout.write(f"vs {path}:")
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                self.stdout.write(f"  {name}: not in the baseline")
+                continue
+
+            if result["queries_per_request"] > base["queries_per_request"]:
+                regressions.append(
+                    f"{name}: {result['queries_per_request']:.1f} queries/request, was {base['queries_per_request']:.1f}"
+                )
+
+            for driver in DRIVERS:
+                new, old = result.get(driver), base.get(driver)
+                if new is None or old is None:
+                    continue
+                p95 = new["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+                rps = new["rps"] / old["rps"] - 1 if old["rps"] else 0.0
+                self.stdout.write(f"  {name} {driver:<6} p95 {p95:+.1%}  throughput {rps:+.1%}")
+                if p95 > max_regression:
+                    regressions.append(f"{name} {driver}: p95 {old['p95_ms']:.1f}ms -> {new['p95_ms']:.1f}ms")
+                if rps < -max_regression:
+                    regressions.append(f"{name} {driver}: {old['rps']:.1f} -> {new['rps']:.1f} req/s")
+
+        if regressions:
+            raise CommandError("Regressions vs baseline:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions vs baseline"))
@@ -0,0 +1,81 @@
+import json
+import time
+from typing import List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from ninja.renderers import JSONRenderer
+from pydantic import TypeAdapter
+
+from society.api import event_to_out
+from society.models import Event
+from society.renderers import render
+from society.schemas import EventOut
+from society.seeding import seed_with_orm
+from society.serializers import event_rows, event_values
+
+
+class Rollback(Exception):
+    pass
+
+
+def model_path(qs, adapter) -> bytes:
+    """What /events used to do: instances + select_related, EventOut per row, ninja's validation and JSONRenderer."""
+    items = [event_to_out(e) for e in qs.select_related("location")]
+    return JSONRenderer().render(None, adapter.dump_python(adapter.validate_python(items)), response_status=200)
+
+
+def fast_path(qs) -> bytes:
+    return render(event_rows(event_values(qs)))
+
+
+class Command(BaseCommand):
+    help = "Times the EventOut model path against the .values() fast path and checks both render the same values."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000, help="Serialize this many events per run.")
+        parser.add_argument("--repeat", type=int, default=5, help="Best of N runs.")
+        parser.add_argument("--seed-locations", type=int, default=0, help="Seed this many locations first (rolled back).")
+        parser.add_argument("--seed-events", type=int, default=0, help="Seed this many events first (rolled back).")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                if opts["seed_locations"] or opts["seed_events"]:
+                    seed_with_orm(max(opts["seed_locations"], 1), opts["seed_events"], seed=opts["seed"])
+                self.run(opts)
+                # never keep seeded rows
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def run(self, opts):
+        qs = Event.objects.order_by("start_date", "id")[: opts["rows"]]
+        n = qs.count()
+        if not n:
+            raise CommandError("No events to serialize, pass --seed-locations/--seed-events")
+
+        adapter = TypeAdapter(List[EventOut])
+        # not byte-identical (separators, \u escapes), so compare what clients parse
+        old, new = model_path(qs, adapter), fast_path(qs)
+        if json.loads(old) != json.loads(new):
+            raise CommandError("Fast path output differs from the EventOut model path")
+
+        timings = {}
+        for name, fn in (("model", lambda: model_path(qs, adapter)), ("fast", lambda: fast_path(qs))):
+            best = None
+            for _ in range(opts["repeat"]):
+                started = time.perf_counter()
+                fn()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+        for name, seconds in timings.items():
+            self.stdout.write(f"{name:<6} {seconds * 1000:>9.1f} ms  {n / seconds:>10.0f} rows/s")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{n} events, {len(new)} bytes (was {len(old)}), same values, {timings['model'] / timings['fast']:.1f}x faster"
+            )
+        )
@@ -0,0 +1,222 @@
+import json
+
+from django.contrib.gis.geos import Point
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import Substr
+from django.utils import timezone
+
+from society.api import _filter_events
+from society.geo import Lat, bbox_polygon, filter_bbox
+from society.models import Event, Location, UpcomingEvent
+from society.pagination import keyset_filter, keyset_page
+from society.search import search_events, search_locations
+from society.serializers import event_values, location_values
+from society.seeding import seed_with_orm
+
+
+WATCHED_TABLES = {"society_event", "society_location", "society_upcomingevent"}
+
+
+class Rollback(Exception):
+    pass
+
+
+def walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def build_cases(sample):
+    """
+    (name, queryset, tables allowed to be seq-scanned), one per endpoint access path.
+    Querysets are shaped like the ones in society/api.py.
+    """
+    now = timezone.now()
+    # the list endpoints select through the .values() fast path (society/serializers.py)
+    events = event_values(Event.objects.all())
+    point = Point(sample["lng"], sample["lat"], srid=4326)
+    bbox = bbox_polygon(sample["lat"] - 0.2, sample["lng"] - 0.3, sample["lat"] + 0.2, sample["lng"] + 0.3)
+
+    keyset_qs = events.filter(start_date__gte=now)
+    upcoming = event_values(UpcomingEvent.objects.filter(start_date__gte=now))
+    _, next_cursor, _ = keyset_page(keyset_qs, None, 12, ascending=True)
+
+    cases = [
+        # /locations?country_code=de
+        (
+            "locations_by_country",
+            location_values(Location.objects.filter(country_code__iexact=sample["country_code"].lower())).order_by("country_code", "name"),
+            set(),
+        ),
+        # /locations/search?q=
+        ("locations_search", location_values(search_locations(Location.objects.all(), sample["word"]))[:20], set()),
+        # /events?country_code= (location side is a small table)
+        (
+            "events_by_country",
+            _filter_events(events, country_code=sample["country_code"]).order_by("start_date"),
+            {"society_location"},
+        ),
+        # /events?event_type=  /events/paged?event_type=
+        (
+            "events_by_type",
+            _filter_events(events, event_type=sample["event_type"]).filter(start_date__gte=now).order_by("start_date")[:13],
+            set(),
+        ),
+        # /events?location_id=
+        ("events_by_location", _filter_events(events, location_id=sample["location_id"]).order_by("start_date"), set()),
+        # /events/paged, first page and a cursor page
+        ("events_paged_first", keyset_filter(keyset_qs, None, ascending=True)[0][:13], set()),
+        # the COUNT(*) is over the same filter, explain its inner scan
+        ("events_paged_count", Event.objects.filter(start_date__gte=now).values("id"), set()),
+        ("events_paged_ids", _filter_events(events, ids=",".join(str(i) for i in sample["event_ids"])), set()),
+        # /events/nearby
+        (
+            "events_nearby",
+            event_values(
+                Event.objects.annotate(distance=Distance("location__coordinates", point))
+                .filter(location__coordinates__distance_lte=(point, D(km=25)))
+                .order_by("start_date", "distance"),
+                "distance",
+            ),
+            set(),
+        ),
+        # /events/in_bbox
+        (
+            "events_in_bbox",
+            filter_bbox(events, "location__coordinates", bbox).filter(start_date__gte=now).order_by("start_date", "id")[:201],
+            set(),
+        ),
+        # /events/clusters
+        (
+            "events_clusters",
+            filter_bbox(Event.objects.all(), "location__coordinates", bbox).filter(start_date__gte=now)
+            .annotate(cell=Substr("location__geohash", 1, 5))
+            .values("cell", "event_type")
+            .annotate(n=Count("id"), lat=Lat("location__coordinates"))
+            .order_by(),
+            set(),
+        ),
+        # /events/search?q=
+        ("events_search", event_values(search_events(Event.objects.all(), sample["word"]))[:20], set()),
+        # upcoming_only=true lists read the UpcomingEvent read model (society/readmodel.py)
+        (
+            "upcoming_by_country",
+            _filter_events(upcoming, country_code=sample["country_code"]).order_by("start_date"),
+            set(),
+        ),
+        ("upcoming_paged_first", upcoming.order_by("start_date", "id")[:13], set()),
+    ]
+    if next_cursor:
+        cases.append(("events_paged_cursor", keyset_filter(keyset_qs, next_cursor, ascending=True)[0][:13], set()))
+    return cases
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN (ANALYZE, FORMAT JSON) every society endpoint queryset and fail on seq scans "
+        "of the event/location tables or plans above --max-cost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed-locations", type=int, default=0, help="Seed this many locations first (rolled back).")
+        parser.add_argument("--seed-events", type=int, default=0, help="Seed this many events first (rolled back).")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--max-cost", type=float, default=5000.0, help="Fail when a plan's total cost is above this.")
+        parser.add_argument("--no-analyze", action="store_true", help="Plain EXPLAIN (don't execute the queries).")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **opts):
+        results = []
+        try:
+            with transaction.atomic():
+                if opts["seed_locations"] or opts["seed_events"]:
+                    seed_with_orm(max(opts["seed_locations"], 1), opts["seed_events"], seed=opts["seed"])
+                    with connection.cursor() as cursor:
+                        cursor.execute("ANALYZE society_location")
+                        cursor.execute("ANALYZE society_event")
+
+                results = self.run_checks(opts)
+                # never keep seeded rows (and EXPLAIN ANALYZE ran the queries for real)
+                raise Rollback()
+        except Rollback:
+            pass
+
+        failures = [r for r in results if r["problems"]]
+        if opts["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            for r in results:
+                style = self.style.ERROR if r["problems"] else self.style.SUCCESS
+                line = f"{r['name']:<24} cost={r['cost']:>10.1f}"
+                if r["time_ms"] is not None:
+                    line += f" time={r['time_ms']:>8.2f}ms"
+                line += f" {', '.join(r['scans'])}"
+                self.stdout.write(style(line))
+                for problem in r["problems"]:
+                    self.stdout.write(self.style.ERROR(f"    {problem}"))
+
+        if failures:
+            raise CommandError(f"{len(failures)} of {len(results)} query plans regressed")
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} query plans OK"))
+
+    def sample(self):
+        # Filter values from the rarest country / event type: those are the selective filters
+        # where an index must win. (Broad filters may legitimately scan.)
+        country = (
+            Location.objects.values("country_code").annotate(n=Count("id")).order_by("n").values_list("country_code", flat=True).first()
+        )
+        if country is None:
+            raise CommandError("No locations to check against, pass --seed-locations/--seed-events")
+        loc = Location.objects.filter(country_code=country).annotate(n=Count("events")).order_by("-n").first()
+        event_type = (
+            Event.objects.values("event_type").annotate(n=Count("id")).order_by("n").values_list("event_type", flat=True).first()
+            or Event.EventType.CONCERT
+        )
+        # longest word of the name is the most selective search term
+        word = max(loc.name.split(), key=len)
+        return {
+            "country_code": loc.country_code,
+            "location_id": loc.id,
+            "lat": loc.coordinates.y,
+            "lng": loc.coordinates.x,
+            "event_type": event_type,
+            "event_ids": list(Event.objects.order_by("?").values_list("id", flat=True)[:10]) or [0],
+            "word": word,
+        }
+
+    def run_checks(self, opts):
+        results = []
+        for name, qs, allowed in build_cases(self.sample()):
+            raw = qs.explain(format="json", analyze=not opts["no_analyze"])
+            plan = json.loads(raw)[0]
+            root = plan["Plan"]
+
+            problems = []
+            scans = []
+            for node in walk(root):
+                relation = node.get("Relation Name")
+                if node["Node Type"] == "Seq Scan" and relation in WATCHED_TABLES and relation not in allowed:
+                    problems.append(f"Seq Scan on {relation}")
+                if node.get("Index Name"):
+                    scans.append(f"{node['Node Type']}({node['Index Name']})")
+                elif relation:
+                    scans.append(f"{node['Node Type']}({relation})")
+
+            if root["Total Cost"] > opts["max_cost"]:
+                problems.append(f"total cost {root['Total Cost']:.1f} > {opts['max_cost']:.1f}")
+
+            results.append(
+                {
+                    "name": name,
+                    "cost": root["Total Cost"],
+                    "time_ms": plan.get("Execution Time"),
+                    "scans": scans,
+                    "problems": problems,
+                }
+            )
+        return results
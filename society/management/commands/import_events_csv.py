@@ -1,12 +1,17 @@
 import csv
+from collections import defaultdict
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
+from society import cache, changes, readmodel, tiles
 from society.models import Event, Location
+from society.search import fuzzy_location
 
 
 def norm(s: str) -> str:
@@ -82,91 +87,278 @@ def resolve_location(row: dict) -> Location:
     if not loc_name:
         raise ValueError("Missing location (or location_external_id)")
 
-    # First: exact match
-    qs = Location.objects.filter(name__iexact=loc_name)
-    if qs.count() == 1:
-        return qs.first()
+    # First: exact match (2 rows are enough to know if it's unique)
+    matches = list(Location.objects.filter(name__iexact=loc_name)[:2])
+    if len(matches) == 1:
+        return matches[0]
 
     # Second: try contains (helps if CSV adds city like "(Cheshire)")
-    qs = Location.objects.filter(name__icontains=loc_name.split("(")[0].strip())
-    if qs.count() == 1:
-        return qs.first()
-
-    if qs.count() == 0:
+    matches = list(Location.objects.filter(name__icontains=base_name(loc_name))[:2])
+    if len(matches) == 1:
+        return matches[0]
+
+    if not matches:
+        # Third: similar spelling (typos, transliterations), pg_trgm index on name
+        fuzzy = fuzzy_location(base_name(loc_name))
+        if fuzzy:
+            return fuzzy
         raise ValueError(f"Location not found by name: '{loc_name}'. Add location_external_id column for reliability.")
     raise ValueError(f"Multiple locations matched '{loc_name}'. Add location_external_id column to disambiguate.")
 
 
+def base_name(name: str) -> str:
+    """'Wat Phra Singh UK (Cheshire)' -> 'Wat Phra Singh UK'"""
+    return norm(name).split("(")[0].strip()
+
+
+class LocationIndex:
+    """
+    All Locations loaded once for --bulk, so resolving a row is a dict lookup
+    instead of up to four queries. Same rules as resolve_location():
+
+    - location_external_id
+    - exact name (case-insensitive)
+    - substring match on the name without the "(City)" part
+    - similar spelling via the trigram index (one query per distinct unknown name)
+    """
+
+    def __init__(self, locations):
+        self.by_ext = defaultdict(list)
+        self.by_name = defaultdict(list)
+        self.locations = list(locations)
+        self._contains = {}
+        self._fuzzy = {}
+
+        for loc in self.locations:
+            if loc.related_store_external_id:
+                self.by_ext[loc.related_store_external_id].append(loc)
+            self.by_name[loc.name.lower()].append(loc)
+
+    @classmethod
+    def load(cls):
+        return cls(Location.objects.only("id", "name", "related_store_external_id"))
+
+    def _name_contains(self, needle: str):
+        # memoized: a CSV usually repeats the same few temple names
+        if needle not in self._contains:
+            self._contains[needle] = [loc for loc in self.locations if needle in loc.name.lower()]
+        return self._contains[needle]
+
+    def resolve(self, row: dict) -> Location:
+        loc_ext = norm(row.get("location_external_id"))
+        if loc_ext:
+            matches = self.by_ext.get(loc_ext, [])
+            if not matches:
+                raise Location.DoesNotExist("Location matching query does not exist.")
+            if len(matches) > 1:
+                raise Location.MultipleObjectsReturned(
+                    f"get() returned more than one Location -- it returned {len(matches)}!"
+                )
+            return matches[0]
+
+        loc_name = norm(row.get("location"))
+        if not loc_name:
+            raise ValueError("Missing location (or location_external_id)")
+
+        matches = self.by_name.get(loc_name.lower(), [])
+        if len(matches) == 1:
+            return matches[0]
+
+        # Every location containing it, like resolve_location()'s icontains: an exact
+        # base-name hit is still ambiguous when other names contain it too
+        base = base_name(loc_name).lower()
+        matches = self._name_contains(base)
+        if len(matches) == 1:
+            return matches[0]
+
+        if not matches:
+            if base not in self._fuzzy:
+                self._fuzzy[base] = fuzzy_location(base_name(loc_name))
+            if self._fuzzy[base]:
+                return self._fuzzy[base]
+            raise ValueError(f"Location not found by name: '{loc_name}'. Add location_external_id column for reliability.")
+        raise ValueError(f"Multiple locations matched '{loc_name}'. Add location_external_id column to disambiguate.")
+
+
+def parse_event_row(row: dict, resolve=resolve_location) -> dict:
+    """
+    Validates one CSV row and returns the Event field values.
+    Raises ValueError (or Location lookup errors) with the message shown per line.
+    """
+    event_external_id = norm(row.get("event_external_id"))
+    if not event_external_id:
+        raise ValueError("Missing event_external_id")
+
+    title = norm(row.get("title"))
+    if not title:
+        raise ValueError("Missing title")
+
+    location = resolve(row)
+
+    start_date = parse_dt_flexible(row.get("start_date"))
+    if not start_date:
+        raise ValueError("Missing start_date")
+
+    # Your CSV uses 'end_data' (typo). Support both.
+    end_raw = norm(row.get("end_date")) or norm(row.get("end_data"))
+    end_date = parse_dt_flexible(end_raw) if end_raw else None
+
+    # Your CSV uses human labels. Map them.
+    raw_type = norm(row.get("event_type")).lower()
+    event_type = EVENT_TYPE_MAP.get(raw_type)
+    if not event_type:
+        raise ValueError(
+            f"Invalid event_type '{row.get('event_type')}'. "
+            f"Use one of: {list(EVENT_TYPE_MAP.keys())}"
+        )
+
+    return {
+        "event_external_id": event_external_id,
+        "title": title,
+        "location": location,
+        "start_date": start_date,
+        "end_date": end_date,
+        "event_type": event_type,
+        "description": norm(row.get("description")),
+        "banner_image": normalize_url(row.get("banner_image")),
+        "design_template_external_id": norm(row.get("design_template_external_id")),
+    }
+
+
+# Fields rewritten on conflict in --bulk mode (everything the CSV provides)
+UPSERT_FIELDS = [
+    "title",
+    "location",
+    "start_date",
+    "end_date",
+    "event_type",
+    "description",
+    "banner_image",
+    "design_template_external_id",
+    "updated_at",  # auto_now fills it on the insert side, EXCLUDED.updated_at on conflict
+]
+
+
 class Command(BaseCommand):
     help = "Import Events from CSV (idempotent via event_external_id)."
 
     def add_arguments(self, parser):
         parser.add_argument("csv_path", type=str)
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Resolve locations from an in-memory index and upsert in chunks (for large files).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
 
     def handle(self, *args, **opts):
         csv_path = Path(opts["csv_path"])
         if not csv_path.exists():
             raise SystemExit(f"File not found: {csv_path}")
 
-        created = updated = skipped = 0
-
         with csv_path.open(newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
+            rows = enumerate(reader, start=2)
 
-            for line_no, row in enumerate(reader, start=2):
-                try:
-                    event_external_id = norm(row.get("event_external_id"))
-                    if not event_external_id:
-                        raise ValueError("Missing event_external_id")
-
-                    title = norm(row.get("title"))
-                    if not title:
-                        raise ValueError("Missing title")
-
-                    location = resolve_location(row)
-
-                    start_date = parse_dt_flexible(row.get("start_date"))
-                    if not start_date:
-                        raise ValueError("Missing start_date")
-
-                    # Your CSV uses 'end_data' (typo). Support both.
-                    end_raw = norm(row.get("end_date")) or norm(row.get("end_data"))
-                    end_date = parse_dt_flexible(end_raw) if end_raw else None
-
-                    # Your CSV uses human labels. Map them.
-                    raw_type = norm(row.get("event_type")).lower()
-                    event_type = EVENT_TYPE_MAP.get(raw_type)
-                    if not event_type:
-                        raise ValueError(
-                            f"Invalid event_type '{row.get('event_type')}'. "
-                            f"Use one of: {list(EVENT_TYPE_MAP.keys())}"
-                        )
-
-                    description = norm(row.get("description"))
-                    banner_image = normalize_url(row.get("banner_image"))
-                    design_template_external_id = norm(row.get("design_template_external_id"))
-
-                    obj, was_created = Event.objects.update_or_create(
-                        event_external_id=event_external_id,
-                        defaults={
-                            
-                            "event_external_id": event_external_id,
-                            "title": title,
-                            "location": location,
-                            "start_date": start_date,
-                            "end_date": end_date,
-                            "event_type": event_type,
-                            "description": description,
-                            "banner_image": banner_image,
-                            "design_template_external_id": design_template_external_id,
-                        },
-                    )
-
-                    created += int(was_created)
-                    updated += int(not was_created)
+            if opts["bulk"]:
+                created, updated, skipped = self.import_bulk(rows, max(1, opts["chunk_size"]))
+            else:
+                created, updated, skipped = self.import_rows(rows)
 
+        self.stdout.write(self.style.SUCCESS(f"Done. created={created}, updated={updated}, skipped={skipped}"))
+
+    def skip(self, line_no, error):
+        self.stdout.write(self.style.ERROR(f"Line {line_no}: {error} → skip"))
+
+    def import_rows(self, rows):
+        created = updated = skipped = 0
+
+        for line_no, row in rows:
+            try:
+                fields = parse_event_row(row)
+                obj, was_created = Event.objects.update_or_create(
+                    event_external_id=fields["event_external_id"],
+                    defaults=fields,
+                )
+
+                created += int(was_created)
+                updated += int(not was_created)
+
+            except Exception as e:
+                skipped += 1
+                self.skip(line_no, e)
+
+        return created, updated, skipped
+
+    def import_bulk(self, rows, chunk_size):
+        created = updated = skipped = 0
+        index = LocationIndex.load()
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+
+            parsed = []  # (line_no, fields) in file order
+            for line_no, row in chunk:
+                try:
+                    parsed.append((line_no, parse_event_row(row, resolve=index.resolve)))
                 except Exception as e:
                     skipped += 1
-                    self.stdout.write(self.style.ERROR(f"Line {line_no}: {e} → skip"))
-
-        self.stdout.write(self.style.SUCCESS(f"Done. created={created}, updated={updated}, skipped={skipped}"))
+                    self.skip(line_no, e)
+
+            if not parsed:
+                continue
+
+            try:
+                c, u = self.upsert_chunk(parsed)
+            except Exception as e:
+                # The whole chunk was rolled back, report every line of it
+                for line_no, _ in parsed:
+                    self.skip(line_no, e)
+                skipped += len(parsed)
+                continue
+
+            created += c
+            updated += u
+
+        # bulk_create doesn't send post_save, so drop cached /events pages ourselves
+        cache.invalidate(cache.EVENTS)
+        return created, updated, skipped
+
+    def upsert_chunk(self, parsed):
+        ext_ids = {fields["event_external_id"] for _, fields in parsed}
+
+        with transaction.atomic():
+            existing = dict(
+                Event.objects.filter(event_external_id__in=ext_ids).values_list("event_external_id", "location_id")
+            )
+
+            # Count like the row-by-row path would: first sighting of a new id is a create,
+            # any later row with the same id (in the DB or earlier in the file) is an update.
+            created = updated = 0
+            latest = {}
+            for _, fields in parsed:
+                ext_id = fields["event_external_id"]
+                if ext_id in existing or ext_id in latest:
+                    updated += 1
+                else:
+                    created += 1
+                latest[ext_id] = fields  # last row wins, ON CONFLICT can't touch a row twice
+
+            Event.objects.bulk_create(
+                [Event(**fields) for fields in latest.values()],
+                update_conflicts=True,
+                unique_fields=["event_external_id"],
+                update_fields=UPSERT_FIELDS,
+            )
+            # no post_save either, refresh their UpcomingEvent rows and feed entries here
+            touched = Event.objects.filter(event_external_id__in=ext_ids)
+            readmodel.refresh_events(touched.values_list("id", flat=True))
+            changes.record_events(touched)
+
+            # upcoming counts on the map, at the old and the new locations
+            location_ids = {*existing.values(), *(fields["location"].pk for fields in latest.values())}
+            transaction.on_commit(lambda: tiles.invalidate_locations(location_ids))
+
+        return created, updated
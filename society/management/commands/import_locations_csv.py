@@ -1,19 +1,51 @@
 import csv
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 
+import django
 from django.core.management.base import BaseCommand
 from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.utils import timezone
 
+from society import cache, changes, readmodel, tiles
+from society.geo import encode_geohash
 from society.models import Location
 
 
 CATEGORY_MAP = {
     "temple": Location.Category.TEMPLE,
     "market": Location.Category.MARKET,
-    "restaurant": Location.Category.RESTAURANT,
+    "exhibition": Location.Category.EXHIBITION,
     "partner": Location.Category.PARTNER,
+    # old dumps still have restaurants, they are partner venues now
+    "restaurant": Location.Category.PARTNER,
+
+    # labels, as shown in the admin
+    "temple day tracker": Location.Category.TEMPLE,
+    "market/food festival": Location.Category.MARKET,
+    "music/exhibition venue": Location.Category.EXHIBITION,
+    "partner venue": Location.Category.PARTNER,
 }
 
+# Fields written on update (everything the CSV provides)
+UPSERT_FIELDS = [
+    "name",
+    "category",
+    "address",
+    "coordinates",
+    "geohash",
+    "website",
+    "country_code",
+    "related_store_external_id",
+    "updated_at",  # bulk_update skips auto_now, upsert_batch sets it
+]
+
 
 def normalize_website(url: str):
     url = (url or "").strip()
@@ -25,10 +57,10 @@ def normalize_website(url: str):
     return url
 
 
-def parse_point_lat_lng(s: str) -> Point:
+def parse_lat_lng(s: str):
     """
     CSV stores: 'lat, lng'
-    GeoDjango Point expects: (lon, lat)
+    Returns (lat, lng) as floats, validated.
     """
     raw = (s or "").strip()
     if not raw:
@@ -38,72 +70,253 @@ def parse_point_lat_lng(s: str) -> Point:
         raise ValueError(f"Invalid coordinates format: {raw}")
     lat = float(parts[0])
     lng = float(parts[1])
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        raise ValueError(f"Invalid coordinates: {raw}")
+    if not -90 <= lat <= 90:
+        raise ValueError(f"Latitude out of range: {lat}")
+    if not -180 <= lng <= 180:
+        raise ValueError(f"Longitude out of range: {lng}")
+    return lat, lng
+
+
+def parse_point_lat_lng(s: str) -> Point:
+    """
+    GeoDjango Point expects: (lon, lat)
+    """
+    lat, lng = parse_lat_lng(s)
     return Point(lng, lat, srid=4326)
 
 
+def parse_location_row(row: dict) -> dict:
+    """
+    Validates one CSV row. Plain values only (no GEOS objects),
+    so it can run in a worker process and be pickled back.
+    """
+    name = (row.get("name") or "").strip()
+    if not name:
+        raise ValueError("missing name")
+    if len(name) > 200:
+        raise ValueError("name longer than 200 characters")
+
+    category_raw = (row.get("category") or "").strip().lower()
+    if category_raw:
+        category = CATEGORY_MAP.get(category_raw)
+        if not category:
+            raise ValueError(f"Invalid category '{row.get('category')}'. Use one of: {list(CATEGORY_MAP.keys())}")
+    else:
+        category = Location.Category.TEMPLE
+
+    country_code = (row.get("country_code") or "").strip().upper()
+    if len(country_code) != 2 or not country_code.isalpha():
+        raise ValueError(f"Invalid country_code '{row.get('country_code')}'")
+
+    website = normalize_website(row.get("website") or "")
+    if website and len(website) > 200:
+        raise ValueError("website longer than 200 characters")
+
+    ext_id = (row.get("related_store_external_id") or "").strip()
+    if len(ext_id) > 100:
+        raise ValueError("related_store_external_id longer than 100 characters")
+
+    lat, lng = parse_lat_lng(row.get("coordinates") or "")
+
+    return {
+        "name": name,
+        "category": str(category),
+        "address": (row.get("address") or "").strip(),
+        "lat": lat,
+        "lng": lng,
+        # bulk writes skip Location.save(), so the clustering cell is computed here
+        "geohash": encode_geohash(lat, lng),
+        "website": website,
+        "country_code": country_code,
+        "related_store_external_id": ext_id,
+    }
+
+
+def parse_chunk(chunk):
+    """Stage 2 (runs in the pool): [(line_no, row)] -> [(line_no, values, error)]"""
+    out = []
+    for line_no, row in chunk:
+        try:
+            out.append((line_no, parse_location_row(row), None))
+        except Exception as e:
+            out.append((line_no, None, str(e)))
+    return out
+
+
+def read_chunks(reader, chunk_size):
+    """Stage 1: stream the CSV as [(line_no, row)] chunks, never the whole file."""
+    rows = enumerate(reader, start=2)  # header is line 1
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_in_pool(chunks, workers):
+    """
+    Runs parse_chunk over a process pool, keeping only a few chunks in flight
+    (Executor.map would submit the whole file up front). Yields results in file order.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(parse_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def location_key(values: dict):
+    # Unique key (preferred), fallback: avoid duplicates if ext_id missing
+    if values["related_store_external_id"]:
+        return ("ext", values["related_store_external_id"])
+    return ("name", values["name"], values["country_code"])
+
+
+def upsert_batch(parsed):
+    """
+    Stage 3: [(line_no, values)] -> (created, updated), one transaction per batch.
+    Same keys as the old update_or_create: related_store_external_id, else (name, country_code).
+    """
+    ext_ids = {v["related_store_external_id"] for _, v in parsed if v["related_store_external_id"]}
+    names = {v["name"] for _, v in parsed if not v["related_store_external_id"]}
+
+    with transaction.atomic():
+        existing = {}
+        if ext_ids:
+            for loc in Location.objects.filter(related_store_external_id__in=ext_ids).order_by("-id"):
+                existing[("ext", loc.related_store_external_id)] = loc
+        if names:
+            for loc in Location.objects.filter(name__in=names).order_by("-id"):
+                existing[("name", loc.name, loc.country_code)] = loc
+        # order_by("-id") -> on duplicates the oldest row wins, like .get() would have failed on
+
+        created = updated = 0
+        to_create = {}
+        to_update = {}
+        moved_from = []  # old coordinates of the updated rows, for the map tiles
+        for _, values in parsed:
+            key = location_key(values)
+            fields = {k: v for k, v in values.items() if k not in ("lat", "lng")}
+            fields["coordinates"] = Point(values["lng"], values["lat"], srid=4326)
+
+            obj = existing.get(key) or to_create.get(key)
+            if obj is None:
+                to_create[key] = Location(**fields)
+                created += 1
+                continue
+
+            if obj.pk and obj.pk not in to_update:
+                moved_from.append(obj.coordinates)
+            for field, value in fields.items():
+                setattr(obj, field, value)
+            if obj.pk:
+                to_update[obj.pk] = obj
+            updated += 1
+
+        if to_update:
+            now = timezone.now()
+            for obj in to_update.values():
+                obj.updated_at = now
+            Location.objects.bulk_update(list(to_update.values()), UPSERT_FIELDS)
+            # their events' UpcomingEvent rows embed the location (new ones have no events yet)
+            readmodel.refresh_locations(to_update)
+            changes.record_location_events(to_update)
+        if to_create:
+            Location.objects.bulk_create(list(to_create.values()))
+        changes.record_locations([obj.pk for obj in (*to_update.values(), *to_create.values())])
+
+        points = moved_from + [obj.coordinates for obj in (*to_update.values(), *to_create.values())]
+        transaction.on_commit(lambda: tiles.invalidate_points(points))
+
+    return created, updated
+
+
 class Command(BaseCommand):
     help = "Import Locations from a CSV file (idempotent via related_store_external_id)."
 
     def add_arguments(self, parser):
         parser.add_argument("csv_path", type=str)
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows per parse chunk / upsert batch.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help="Parser processes (1 = parse in this process).",
+        )
+        parser.add_argument("--rejects", type=str, help="Write rejected rows (line, error) to this CSV instead of the console.")
 
     def handle(self, *args, **opts):
         csv_path = Path(opts["csv_path"])
         if not csv_path.exists():
             raise SystemExit(f"File not found: {csv_path}")
 
+        chunk_size = max(1, opts["chunk_size"])
+        workers = max(1, opts["workers"])
+
         created = 0
         updated = 0
         skipped = 0
+        started = time.monotonic()
 
-        with csv_path.open(newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+        rejects_file = open(opts["rejects"], "w", newline="", encoding="utf-8") if opts["rejects"] else None
+        rejects = csv.writer(rejects_file) if rejects_file else None
+        if rejects:
+            rejects.writerow(["line", "error"])
 
-            for i, row in enumerate(reader, start=2):  # header is line 1
-                try:
-                    name = (row.get("name") or "").strip()
-                    if not name:
-                        self.stdout.write(self.style.WARNING(f"Line {i}: missing name → skip"))
-                        skipped += 1
-                        continue
-
-                    category_raw = (row.get("category") or "").strip().lower()
-                    category = CATEGORY_MAP.get(category_raw, Location.Category.TEMPLE)
-
-                    address = (row.get("address") or "").strip()
-                    country_code = (row.get("country_code") or "").strip().upper()
-                    website = normalize_website(row.get("website") or "")
+        def reject(line_no, error):
+            if rejects:
+                rejects.writerow([line_no, error])
+            else:
+                self.stdout.write(self.style.ERROR(f"Line {line_no}: {error} → skip"))
 
-                    coords = parse_point_lat_lng(row.get("coordinates") or "")
+        try:
+            with csv_path.open(newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
 
-                    # Unique key (preferred)
-                    ext_id = (row.get("related_store_external_id") or "").strip()
+                for results in parse_in_pool(read_chunks(reader, chunk_size), workers):
+                    parsed = []
+                    for line_no, values, error in results:
+                        if error:
+                            reject(line_no, error)
+                            skipped += 1
+                        else:
+                            parsed.append((line_no, values))
 
-                    if ext_id:
-                        lookup = {"related_store_external_id": ext_id}
-                    else:
-                        # Fallback: avoid duplicates if ext_id missing
-                        lookup = {"name": name, "country_code": country_code}
+                    if not parsed:
+                        continue
 
-                    obj, was_created = Location.objects.update_or_create(
-                        **lookup,
-                        defaults={
-                            "name": name,
-                            "category": category,
-                            "address": address,
-                            "coordinates": coords,
-                            "website": website,
-                            "country_code": country_code,
-                            "related_store_external_id": ext_id,  # <-- IMPORTANT: save it too
-                        },
-                    )
+                    try:
+                        c, u = upsert_batch(parsed)
+                    except Exception as e:
+                        # batch rolled back as a whole
+                        for line_no, _ in parsed:
+                            reject(line_no, e)
+                        skipped += len(parsed)
+                        continue
 
-                    created += int(was_created)
-                    updated += int(not was_created)
+                    created += c
+                    updated += u
+        finally:
+            if rejects_file:
+                rejects_file.close()
 
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Line {i}: {e} → skip"))
-                    skipped += 1
+        # bulk_create / bulk_update don't send signals
+        cache.invalidate(cache.LOCATIONS, cache.EVENTS)
 
+        elapsed = time.monotonic() - started
+        total = created + updated + skipped
+        rate = total / elapsed if elapsed > 0 else 0.0
         self.stdout.write(self.style.SUCCESS(f"Done. created={created}, updated={updated}, skipped={skipped}"))
-
+        self.stdout.write(f"{total} rows in {elapsed:.1f}s ({rate:,.0f} rows/s), rejected={skipped}")
+        if rejects and skipped:
+            self.stdout.write(self.style.WARNING(f"Rejected rows written to {opts['rejects']}"))
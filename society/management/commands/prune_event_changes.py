@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from society import changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes /events/changes log rows older than --days (run daily, e.g. from cron). "
+        "Clients whose token is older than that get reset=true and reload /events."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Keep this many days of changes.")
+
+    def handle(self, *args, **opts):
+        deleted = changes.prune(timezone.now() - timedelta(days=opts["days"]))
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} change rows"))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+
+from society import cache, popularity
+from society.models import Event, MemberProfile, SavedEventStamp
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds Event.saved_count / trending_score from the saved_events table. "
+        "Run periodically (e.g. nightly) to fix drift from writes that bypassed the m2m signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--dry-run", action="store_true", help="Only report the drift.")
+
+    def handle(self, *args, **opts):
+        through = MemberProfile.saved_events.through
+
+        # saves without a stamp (raw SQL, bulk imports...) and stamps whose save is gone
+        missing = through.objects.filter(
+            ~Exists(SavedEventStamp.objects.filter(member_id=OuterRef("memberprofile_id"), event_id=OuterRef("event_id")))
+        )
+        orphans = SavedEventStamp.objects.filter(
+            ~Exists(through.objects.filter(memberprofile_id=OuterRef("member_id"), event_id=OuterRef("event_id")))
+        )
+        drifted = Event.objects.annotate(n=Count("interested_members")).exclude(saved_count=F("n"))
+
+        self.stdout.write(
+            f"missing stamps={missing.count()} orphan stamps={orphans.count()} events with a wrong saved_count={drifted.count()}"
+        )
+        if opts["dry_run"]:
+            return
+
+        with transaction.atomic():
+            # the real save time is unknown, count them as saved now
+            now = timezone.now()
+            batch = []
+            for member_id, event_id in missing.values_list("memberprofile_id", "event_id").iterator(chunk_size=opts["batch_size"]):
+                batch.append(SavedEventStamp(member_id=member_id, event_id=event_id, saved_at=now))
+                if len(batch) >= opts["batch_size"]:
+                    SavedEventStamp.objects.bulk_create(batch, ignore_conflicts=True)
+                    batch = []
+            if batch:
+                SavedEventStamp.objects.bulk_create(batch, ignore_conflicts=True)
+
+            orphans.delete()
+            updated = popularity.recompute(batch_size=opts["batch_size"])
+
+        cache.invalidate(cache.MEMBERS)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed popularity for {updated} events"))
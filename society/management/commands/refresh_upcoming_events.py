@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from society import cache, readmodel, tiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes started events from the UpcomingEvent read model (run every few minutes, e.g. from cron). "
+        "--rebuild rewrites the whole table from Event instead (after raw SQL writes, or to fix drift)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true")
+
+    def handle(self, *args, **opts):
+        if opts["rebuild"]:
+            written = readmodel.rebuild()
+            cache.invalidate(cache.EVENTS)
+            # tiles count upcoming events from the table too
+            tiles.invalidate_all()
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt the upcoming events table: {written} rows"))
+            return
+
+        # readers already skip started rows, no cached page changes
+        expired = readmodel.expire()
+        self.stdout.write(self.style.SUCCESS(f"Expired {expired} started events"))
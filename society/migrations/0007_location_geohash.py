@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-16 22:32
+
+from django.db import migrations, models
+
+from society.geo import encode_geohash
+
+
+def backfill_geohash(apps, schema_editor):
+    Location = apps.get_model("society", "Location")
+    batch = []
+    for loc in Location.objects.exclude(coordinates__isnull=True).iterator(chunk_size=2000):
+        loc.geohash = encode_geohash(loc.coordinates.y, loc.coordinates.x)
+        batch.append(loc)
+        if len(batch) >= 2000:
+            Location.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0006_event_start_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.27 on 2026-10-16 22:35
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+import django.db.models.functions.text
+
+
+# search_vector columns live outside the Django model (never loaded by list queries).
+# Triggers keep them current for save(), bulk_create/bulk_update and COPY alike; updates
+# that don't touch the searched columns (saved_count, trending_score, ...) skip them.
+# English config for English text; 'simple' for names and Thai, so Thai isn't stemmed/dropped.
+
+EVENT_SEARCH_SQL = """
+ALTER TABLE society_event ADD COLUMN search_vector tsvector;
+
+CREATE FUNCTION society_event_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.sub_title_thai, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(NEW.hightlight, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(NEW.hightlight_thai, '')), 'B')
+        || setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C')
+        || setweight(to_tsvector('simple', coalesce(NEW.description_thai, '')), 'C')
+        || setweight(to_tsvector('simple', coalesce(NEW.organizer_name, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER society_event_search_vector_trg
+    BEFORE INSERT OR UPDATE OF title, sub_title_thai, hightlight, hightlight_thai,
+        description, description_thai, organizer_name ON society_event
+    FOR EACH ROW EXECUTE FUNCTION society_event_search_vector();
+
+UPDATE society_event SET title = title;
+
+CREATE INDEX event_search_gin ON society_event USING gin (search_vector);
+"""
+
+EVENT_SEARCH_REVERSE_SQL = """
+DROP INDEX IF EXISTS event_search_gin;
+DROP TRIGGER IF EXISTS society_event_search_vector_trg ON society_event;
+DROP FUNCTION IF EXISTS society_event_search_vector();
+ALTER TABLE society_event DROP COLUMN IF EXISTS search_vector;
+"""
+
+LOCATION_SEARCH_SQL = """
+ALTER TABLE society_location ADD COLUMN search_vector tsvector;
+
+CREATE FUNCTION society_location_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(NEW.address, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER society_location_search_vector_trg
+    BEFORE INSERT OR UPDATE OF name, address ON society_location
+    FOR EACH ROW EXECUTE FUNCTION society_location_search_vector();
+
+UPDATE society_location SET name = name;
+
+CREATE INDEX location_search_gin ON society_location USING gin (search_vector);
+"""
+
+LOCATION_SEARCH_REVERSE_SQL = """
+DROP INDEX IF EXISTS location_search_gin;
+DROP TRIGGER IF EXISTS society_location_search_vector_trg ON society_location;
+DROP FUNCTION IF EXISTS society_location_search_vector();
+ALTER TABLE society_location DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0007_location_geohash'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunSQL(EVENT_SEARCH_SQL, EVENT_SEARCH_REVERSE_SQL),
+        migrations.RunSQL(LOCATION_SEARCH_SQL, LOCATION_SEARCH_REVERSE_SQL),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), name='event_title_up_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('sub_title_thai'), name='gin_trgm_ops'), name='event_subtitle_th_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('description_thai'), name='gin_trgm_ops'), name='event_desc_th_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='location_name_up_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='location_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.27 on 2026-10-16 22:36
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0008_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_type', 'start_date'], name='event_type_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['location', 'start_date'], name='event_location_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(django.db.models.functions.text.Upper('country_code'), models.F('name'), name='location_cc_upper_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.27 on 2026-10-16 22:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# Existing saves have no timestamp: count them as saved at migration time.
+# Same formula as society/popularity.py (EPOCH 2025-01-01, half-life 3 days = 259200 s).
+BACKFILL_SQL = """
+INSERT INTO society_savedeventstamp (member_id, event_id, saved_at)
+SELECT memberprofile_id, event_id, now() FROM society_memberprofile_saved_events
+ON CONFLICT DO NOTHING;
+
+UPDATE society_event AS e
+SET saved_count = c.n,
+    trending_score = EXTRACT(EPOCH FROM now() - '2025-01-01T00:00:00Z'::timestamptz) / 259200 + LN(c.n) / LN(2)
+FROM (SELECT event_id, COUNT(*) AS n FROM society_memberprofile_saved_events GROUP BY event_id) AS c
+WHERE e.id = c.event_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0009_endpoint_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='saved_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0.0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='SavedEventStamp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('saved_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='society.event')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='society.memberprofile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='savedeventstamp',
+            constraint=models.UniqueConstraint(fields=('member', 'event'), name='saved_event_stamp_unique'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.27 on 2026-10-16 22:55
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+# Same statement as society/readmodel.py rebuild() (before updated_at was added in 0012)
+BACKFILL_SQL = """
+INSERT INTO society_upcomingevent (
+    id, title, sub_title_thai, description, description_thai, banner_image, event_type, start_date, end_date,
+    location_id, location_name, location_category, location_address, location_website, country_code, lat, lng,
+    hightlight, hightlight_thai, organizer_name, contact_info, event_website
+)
+SELECT
+    e.id, e.title, e.sub_title_thai, e.description, e.description_thai, e.banner_image, e.event_type, e.start_date, e.end_date,
+    l.id, l.name, l.category, l.address, l.website, l.country_code, ST_Y(l.coordinates::geometry), ST_X(l.coordinates::geometry),
+    e.hightlight, e.hightlight_thai, e.organizer_name, e.contact_info, e.event_website
+FROM society_event AS e JOIN society_location AS l ON l.id = e.location_id
+WHERE e.start_date >= now()
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0010_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpcomingEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('sub_title_thai', models.CharField(blank=True, default='', max_length=255)),
+                ('description', models.TextField()),
+                ('description_thai', models.TextField(blank=True, default='')),
+                ('banner_image', models.URLField(blank=True)),
+                ('event_type', models.CharField(max_length=20)),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('location_id', models.BigIntegerField()),
+                ('location_name', models.CharField(max_length=200)),
+                ('location_category', models.CharField(max_length=20)),
+                ('location_address', models.TextField(blank=True)),
+                ('location_website', models.URLField(blank=True, null=True)),
+                ('country_code', models.CharField(max_length=2)),
+                ('lat', models.FloatField(null=True)),
+                ('lng', models.FloatField(null=True)),
+                ('hightlight', models.CharField(blank=True, default='', max_length=255)),
+                ('hightlight_thai', models.CharField(blank=True, default='', max_length=255)),
+                ('organizer_name', models.CharField(blank=True, default='', max_length=255)),
+                ('contact_info', models.CharField(blank=True, default='', max_length=255)),
+                ('event_website', models.URLField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['start_date', 'id'], name='upcoming_start_id_idx'), models.Index(fields=['event_type', 'start_date'], name='upcoming_type_start_idx'), models.Index(fields=['location_id', 'start_date'], name='upcoming_location_start_idx'), models.Index(django.db.models.functions.text.Upper('country_code'), models.F('start_date'), name='upcoming_cc_upper_start_idx')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('event', 'Event'), ('location', 'Location'), ('log', 'Log')], max_length=10)),
+                ('op', models.CharField(choices=[('upsert', 'Upsert'), ('delete', 'Delete'), ('pruned', 'Pruned')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('txid', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['txid', 'id'], name='event_change_txid_id_idx')],
+            },
+        ),
+    ]
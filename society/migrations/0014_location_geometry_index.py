@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-16 23:20
+
+from django.db import migrations
+
+
+# /tiles/{z}/{x}/{y}.mvt (society/tiles.py) filters on coordinates::geometry against the
+# tile envelope in 4326; the geography index can't serve that (its boxes are geocentric)
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0013_event_changes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX location_coords_geom_idx ON society_location USING GIST ((coordinates::geometry))",
+            "DROP INDEX IF EXISTS location_coords_geom_idx",
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('society', '0014_location_geometry_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventchange',
+            index=models.Index(fields=['kind', 'txid', 'id'], name='event_change_kind_txid_idx'),
+        ),
+    ]
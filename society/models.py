@@ -1,8 +1,13 @@
 
 from django.contrib.gis.db import models  # Essential for GeoDjango
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .geo import encode_geohash
+
 class Location(models.Model):
 
     class Category(models.TextChoices):
@@ -25,6 +30,35 @@ class Location(models.Model):
 
     related_store_external_id = models.CharField(max_length=100, blank=True)   #
 
+    # Precomputed from coordinates for /clusters (GROUP BY prefix), kept up to date in save()
+    # and by import_locations_csv (bulk writes skip save()).
+    geohash = models.CharField(max_length=12, blank=True, editable=False, db_index=True)
+
+    # When the row last changed. auto_now covers save(); bulk writes (imports, seeding) set it
+    # themselves.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Full-text search: society_location.search_vector is a tsvector column kept up to date by a
+    # trigger (migration 0008), not a model field, so list queries never load it. See society/search.py.
+
+    class Meta:
+        indexes = [
+            # name__icontains is UPPER(name) LIKE UPPER('%q%') -> needs the UPPER() expression
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="location_name_up_trgm"),
+            # name__trigram_similar / TrigramSimilarity (fuzzy matching)
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="location_name_trgm"),
+            # country_code__iexact is UPPER(country_code) = UPPER('de'), /locations orders by it + name
+            models.Index(Upper("country_code"), "name", name="location_cc_upper_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.coordinates:
+            self.geohash = encode_geohash(self.coordinates.y, self.coordinates.x)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "coordinates" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} ({self.country_code})"
 
@@ -60,9 +94,115 @@ class Event(models.Model):
 
     design_template_external_id = models.CharField(max_length=100, blank=True)
 
+    # Popularity, kept up to date from the saved_events m2m signals (see society/popularity.py)
+    saved_count = models.PositiveIntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0.0, editable=False, db_index=True)
+
+    # Like Location.updated_at. Not touched by the popularity updates (not in EventOut)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # society_event.search_vector: tsvector kept by a trigger, like Location (see society/search.py)
+
+    class Meta:
+        indexes = [
+            # keyset pagination on /events/paged walks (start_date, id)
+            models.Index(fields=["start_date", "id"], name="event_start_id_idx"),
+            # ?event_type= and ?location_id= filters, both ordered by start_date
+            models.Index(fields=["event_type", "start_date"], name="event_type_start_idx"),
+            models.Index(fields=["location", "start_date"], name="event_location_start_idx"),
+            # substring search (Thai has no word breaks, so tsvector alone is not enough)
+            GinIndex(OpClass(Upper("title"), name="gin_trgm_ops"), name="event_title_up_trgm"),
+            GinIndex(OpClass(Upper("sub_title_thai"), name="gin_trgm_ops"), name="event_subtitle_th_trgm"),
+            GinIndex(OpClass(Upper("description_thai"), name="gin_trgm_ops"), name="event_desc_th_trgm"),
+        ]
+
+    def __str__(self):
+        return self.title
+
+class UpcomingEvent(models.Model):
+    """
+    Read model for the upcoming-only /events and /events/paged: one row per event that
+    hasn't started yet, with the EventOut columns flattened (location included), so the
+    list queries scan one small table without a join. Kept in sync by society/readmodel.py.
+    """
+
+    id = models.BigIntegerField(primary_key=True)  # Event.id
+
+    title = models.CharField(max_length=255)
+    sub_title_thai = models.CharField(max_length=255, blank=True, default="")
+    description = models.TextField()
+    description_thai = models.TextField(blank=True, default="")
+    banner_image = models.URLField(blank=True)
+    event_type = models.CharField(max_length=20)
+    start_date = models.DateTimeField()
+    end_date = models.DateTimeField(null=True, blank=True)
+
+    location_id = models.BigIntegerField()
+    location_name = models.CharField(max_length=200)
+    location_category = models.CharField(max_length=20)
+    location_address = models.TextField(blank=True)
+    location_website = models.URLField(blank=True, null=True)
+    country_code = models.CharField(max_length=2)
+    lat = models.FloatField(null=True)
+    lng = models.FloatField(null=True)
+
+    hightlight = models.CharField(max_length=255, blank=True, default="")
+    hightlight_thai = models.CharField(max_length=255, blank=True, default="")
+    organizer_name = models.CharField(max_length=255, blank=True, default="")
+    contact_info = models.CharField(max_length=255, blank=True, default="")
+    event_website = models.URLField(blank=True, default="")
+
+    # newest of the event's and its location's updated_at
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # same access paths as the Event indexes, minus the join
+            models.Index(fields=["start_date", "id"], name="upcoming_start_id_idx"),
+            models.Index(fields=["event_type", "start_date"], name="upcoming_type_start_idx"),
+            models.Index(fields=["location_id", "start_date"], name="upcoming_location_start_idx"),
+            models.Index(Upper("country_code"), "start_date", name="upcoming_cc_upper_start_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
+
+class EventChange(models.Model):
+    """
+    Change log behind /events/changes (society/changes.py) and the list endpoints' ETags
+    (society/conditional.py): one row per event or location written or deleted, or log
+    prune. Rows are inserted with raw SQL in the writing transaction.
+    """
+
+    class Kind(models.TextChoices):
+        EVENT = "event"
+        LOCATION = "location"
+        LOG = "log"  # prune marker, object_id = newest pruned txid
+
+    class Op(models.TextChoices):
+        UPSERT = "upsert"
+        DELETE = "delete"
+        PRUNED = "pruned"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    op = models.CharField(max_length=10, choices=Op.choices)
+    object_id = models.BigIntegerField()
+    txid = models.BigIntegerField()  # txid_current() of the writing transaction
+    changed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            # the feed walks (txid, id)
+            models.Index(fields=["txid", "id"], name="event_change_txid_id_idx"),
+            # newest row per kind (conditional.validator())
+            models.Index(fields=["kind", "txid", "id"], name="event_change_kind_txid_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} {self.op}"
+
+
 class MemberProfile(models.Model):
 
     user = models.OneToOneField(
@@ -79,4 +219,20 @@ class MemberProfile(models.Model):
     )
 
     def __str__(self):
-        return f"Profile for {self.user.get_username()}"
\ No newline at end of file
+        return f"Profile for {self.user.get_username()}"
+
+
+class SavedEventStamp(models.Model):
+    """When a member saved an event (the saved_events through table has no timestamp)."""
+
+    member = models.ForeignKey(MemberProfile, on_delete=models.CASCADE, related_name="+")
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="+")
+    saved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["member", "event"], name="saved_event_stamp_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.member_id} saved {self.event_id}"
@@ -0,0 +1,141 @@
+# society/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Q
+from ninja.errors import HttpError
+
+
+# Cursors are opaque to clients: base64(json) of the keyset position plus direction.
+# Keyset = (start_date, id), so a page costs the same however deep you scroll.
+
+NEXT = "next"
+PREV = "prev"
+
+# ids are bigint: anything past it would fail in the query (500) instead of here (400)
+_MAX_ID = 2**63 - 1
+
+
+def encode_cursor(start_date: datetime, pk: int, direction: str = NEXT) -> str:
+    payload = {"d": start_date.isoformat(), "i": pk, "dir": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        start_date = datetime.fromisoformat(payload["d"])
+        pk = int(payload["i"])
+        direction = payload.get("dir", NEXT)
+    except (ValueError, KeyError, TypeError):
+        raise HttpError(400, "Invalid cursor")
+
+    # cursors carry the aware start_date of a row; anything else was edited
+    if direction not in (NEXT, PREV) or start_date.tzinfo is None or not 0 < pk <= _MAX_ID:
+        raise HttpError(400, "Invalid cursor")
+    return start_date, pk, direction
+
+
+def encode_id_cursor(pk: int) -> str:
+    raw = json.dumps({"i": pk}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_id_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        pk = int(json.loads(base64.urlsafe_b64decode(padded.encode()))["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HttpError(400, "Invalid cursor")
+    if not 0 < pk <= _MAX_ID:
+        raise HttpError(400, "Invalid cursor")
+    return pk
+
+
+def id_page(qs, cursor: Optional[str], limit: int, pk_field: str = "id"):
+    """Forward-only keyset on the primary key: returns (rows, next_cursor)."""
+    if cursor:
+        qs = qs.filter(**{f"{pk_field}__gt": decode_id_cursor(cursor)})
+    rows = list(qs.order_by(pk_field)[: limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not has_more:
+        return rows, None
+    last = rows[-1]
+    pk = last[pk_field] if isinstance(last, dict) else getattr(last, pk_field)
+    return rows, encode_id_cursor(pk)
+
+
+def keyset_filter(qs, cursor: Optional[str], ascending: bool, date_field: str = "start_date", pk_field: str = "id"):
+    """
+    Applies the cursor position + ordering. Returns (qs, direction).
+
+    - ascending=True  -> upcoming order (oldest first)
+    - ascending=False -> past order (newest first)
+    - cursor=None     -> first page
+    """
+    direction = NEXT
+    if cursor:
+        start_date, pk, direction = decode_cursor(cursor)
+
+        # Walking backwards = flip the comparison (and the ordering below)
+        forward = ascending if direction == NEXT else not ascending
+        op = "gt" if forward else "lt"
+        # The redundant bound on date_field alone gives the planner a range start on the
+        # (date_field, pk_field) index; the OR by itself doesn't
+        qs = qs.filter(
+            Q(**{f"{date_field}__{op}e": start_date}),
+            Q(**{f"{date_field}__{op}": start_date}) | Q(**{date_field: start_date, f"{pk_field}__{op}": pk}),
+        )
+
+    walk_asc = ascending if direction == NEXT else not ascending
+    if walk_asc:
+        qs = qs.order_by(date_field, pk_field)
+    else:
+        qs = qs.order_by(f"-{date_field}", f"-{pk_field}")
+
+    return qs, direction
+
+
+def keyset_page(qs, cursor: Optional[str], limit: int, ascending: bool, date_field: str = "start_date", pk_field: str = "id"):
+    """
+    Returns (rows, next_cursor, prev_cursor) for a queryset ordered by (date_field, pk_field).
+    Fetches limit + 1 rows to know if there is another page, no COUNT needed.
+    """
+    qs, direction = keyset_filter(qs, cursor, ascending, date_field, pk_field)
+    return keyset_rows(list(qs[: limit + 1]), cursor, direction, limit, date_field, pk_field)
+
+
+def keyset_rows(rows, cursor: Optional[str], direction: str, limit: int, date_field: str = "start_date", pk_field: str = "id"):
+    """
+    The limit + 1 rows fetched from keyset_filter()'s queryset -> (rows, next_cursor, prev_cursor).
+    Split out so the async views can fetch the rows themselves.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if direction == PREV:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    def _key(row):
+        if isinstance(row, dict):
+            return row[date_field], row[pk_field]
+        return getattr(row, date_field), getattr(row, pk_field)
+
+    first, last = _key(rows[0]), _key(rows[-1])
+
+    if direction == NEXT:
+        next_cursor = encode_cursor(*last, NEXT) if has_more else None
+        prev_cursor = encode_cursor(*first, PREV) if cursor else None
+    else:
+        next_cursor = encode_cursor(*last, NEXT)
+        prev_cursor = encode_cursor(*first, PREV) if has_more else None
+
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,138 @@
+# society/popularity.py
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable, List, Optional, Tuple
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import Event, SavedEventStamp
+
+
+# Event.saved_count / Event.trending_score, maintained from the saved_events m2m signals.
+#
+# trending_score is an exponentially decayed save count with half-life HALF_LIFE:
+#
+#     score(now) = sum over saves of 2 ** -((now - saved_at) / HALF_LIFE)
+#
+# The now-part is the same factor for every event, so the ranking only needs
+#
+#     sum of 2 ** ((saved_at - EPOCH) / HALF_LIFE)
+#
+# which never changes once a save happened. That grows without bound, so the column
+# stores its log2: a new save at x = (saved_at - EPOCH) / HALF_LIFE is
+# log2(2**score + 2**x) = max + log2(1 + 2**-(|score - x|)), one UPDATE, no reads.
+# Unsaves (and anything else that can't be applied incrementally) recompute the
+# affected events from SavedEventStamp; `manage.py reconcile_popularity` fixes drift.
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HALF_LIFE = timedelta(days=3)
+
+RECOMPUTE_BATCH = 5000
+
+
+def exponent(saved_at: datetime) -> float:
+    return (saved_at - EPOCH) / HALF_LIFE
+
+
+def combine(score: float, count: int, x: float) -> float:
+    """trending_score after one more save at exponent x (what _ADD_SQL does, in Python)."""
+    if count == 0:
+        return x
+    return max(score, x) + math.log2(1 + 2 ** -abs(score - x))
+
+
+_ADD_SQL = """
+UPDATE society_event AS e SET
+    trending_score = CASE
+        WHEN e.saved_count = 0 THEN d.x
+        ELSE GREATEST(e.trending_score, d.x) + LN(1 + POWER(2, -ABS(e.trending_score - d.x))) / LN(2)
+    END,
+    saved_count = e.saved_count + d.k
+FROM (
+    SELECT UNNEST(%s::bigint[]) AS id, UNNEST(%s::float8[]) AS x, UNNEST(%s::int[]) AS k
+) AS d
+WHERE e.id = d.id
+"""
+
+# Exact values from the stamps, log-sum-exp around the newest save so POWER() can't overflow
+_RECOMPUTE_SQL = """
+WITH ids AS (
+    SELECT UNNEST(%(ids)s::bigint[]) AS id
+), saves AS (
+    SELECT s.event_id, EXTRACT(EPOCH FROM s.saved_at - %(epoch)s) / %(half_life)s AS x
+    FROM society_savedeventstamp AS s
+    WHERE s.event_id IN (SELECT id FROM ids)
+), newest AS (
+    SELECT event_id, MAX(x) AS mx FROM saves GROUP BY event_id
+), totals AS (
+    SELECT saves.event_id, COUNT(*) AS n, newest.mx + LN(SUM(POWER(2, saves.x - newest.mx))) / LN(2) AS score
+    FROM saves JOIN newest USING (event_id)
+    GROUP BY saves.event_id, newest.mx
+)
+UPDATE society_event AS e
+SET saved_count = COALESCE(totals.n, 0), trending_score = COALESCE(totals.score, 0)
+FROM ids LEFT JOIN totals ON totals.event_id = ids.id
+WHERE e.id = ids.id
+"""
+
+
+def saves_added(pairs: Iterable[Tuple[int, int]], saved_at: Optional[datetime] = None) -> None:
+    """(member_id, event_id) pairs that were just saved."""
+    pairs = list(pairs)
+    if not pairs:
+        return
+    saved_at = saved_at or timezone.now()
+
+    SavedEventStamp.objects.bulk_create(
+        [SavedEventStamp(member_id=m, event_id=e, saved_at=saved_at) for m, e in pairs],
+        ignore_conflicts=True,
+    )
+
+    # k saves at the same instant = one save at x + log2(k)
+    counts = Counter(e for _, e in pairs)
+    x = exponent(saved_at)
+    ids = sorted(counts)
+    with connection.cursor() as cursor:
+        cursor.execute(_ADD_SQL, [ids, [x + math.log2(counts[i]) for i in ids], [counts[i] for i in ids]])
+
+
+def saves_removed(pairs: Iterable[Tuple[int, int]]) -> None:
+    pairs = list(pairs)
+    if not pairs:
+        return
+
+    by_member = defaultdict(list)
+    for m, e in pairs:
+        by_member[m].append(e)
+    for m, events in by_member.items():
+        SavedEventStamp.objects.filter(member_id=m, event_id__in=events).delete()
+
+    recompute({e for _, e in pairs})
+
+
+def recompute(event_ids: Optional[Iterable[int]] = None, batch_size: int = RECOMPUTE_BATCH) -> int:
+    """Exact saved_count / trending_score for event_ids (None = every event). Returns how many."""
+    if event_ids is None:
+        ids = Event.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=batch_size)
+    else:
+        ids = sorted(set(event_ids))
+
+    done = 0
+    batch: List[int] = []
+    for pk in ids:
+        batch.append(pk)
+        if len(batch) >= batch_size:
+            done += _recompute_batch(batch)
+            batch = []
+    if batch:
+        done += _recompute_batch(batch)
+    return done
+
+
+def _recompute_batch(ids: List[int]) -> int:
+    params = {"ids": ids, "epoch": EPOCH, "half_life": HALF_LIFE.total_seconds()}
+    with connection.cursor() as cursor:
+        cursor.execute(_RECOMPUTE_SQL, params)
+    return len(ids)
@@ -0,0 +1,212 @@
+# society/querybudget.py
+import functools
+import inspect
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+# Query budget per route + N+1 detection.
+#
+# - @query_budget(n) under @router.get(...) declares how many queries the route may run
+#   (on a cache miss; a hit runs none).
+# - QueryBudgetMiddleware counts queries / DB time per request through
+#   connection.execute_wrapper, adds a Server-Timing header and logs requests that go
+#   over budget or run the same SQL shape over and over (N+1).
+# - Connections are per thread, and the async views run their queries in sync_to_async
+#   threads. So every connection gets one wrapper (_dispatch) for good, and it finds the
+#   recorders of the current request through a ContextVar, which sync_to_async carries
+#   over into its thread.
+# - assert_query_budget() does the same check in tests and raises instead of logging:
+#
+#       with assert_query_budget():
+#           client.get("/api/society/events?country_code=DE")
+
+logger = logging.getLogger("society.querybudget")
+
+# Same statement shape this many times in one request = N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+# Open recording frames (middleware, test helper); the decorated route records its
+# (name, budget) into each. Mutable lists, so it also comes back out of sync_to_async.
+_frames: ContextVar[Tuple[list, ...]] = ContextVar("society_query_budget", default=())
+
+# Open QueryRecorders, innermost last
+_recorders: ContextVar[Tuple["QueryRecorder", ...]] = ContextVar("society_query_recorders", default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(n: int):
+    """Declare the route's query budget. Goes below @router.get(...)."""
+
+    def decorator(view):
+        name = view.__name__
+
+        if inspect.iscoroutinefunction(view):
+
+            @functools.wraps(view)
+            async def wrapper(*args, **kwargs):
+                _record(name, n)
+                return await view(*args, **kwargs)
+
+        else:
+
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                _record(name, n)
+                return view(*args, **kwargs)
+
+        wrapper.query_budget = n
+        return wrapper
+
+    return decorator
+
+
+def _record(name: str, n: int) -> None:
+    for frame in _frames.get():
+        frame.append((name, n))
+
+
+@contextmanager
+def _frame():
+    frame = []
+    token = _frames.set(_frames.get() + (frame,))
+    try:
+        yield frame
+    finally:
+        _frames.reset(token)
+
+
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def sql_shape(sql: str) -> str:
+    """The statement with IN lists and inline literals collapsed, to spot repeats."""
+    return _LITERALS.sub("?", _IN_LIST.sub("IN (...)", sql))
+
+
+def _dispatch(execute, sql, params, many, context):
+    recorders = _recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        for recorder in recorders:
+            recorder.add(sql, seconds)
+
+
+def _install(connection, **kwargs):
+    # at the front: connection.execute_wrapper() blocks that are open pop() from the end
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _dispatch)
+
+
+# every connection opened from now on, in any thread
+connection_created.connect(_install)
+
+
+class QueryRecorder:
+    """Counts the queries, DB time and statement shapes of its context (and sync_to_async calls from it)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self._token = None
+
+    def add(self, sql: str, seconds: float) -> None:
+        self.seconds += seconds
+        self.count += 1
+        self.shapes[sql_shape(sql)] += 1
+
+    def __enter__(self):
+        # this thread's connections may predate the signal handler
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        self._token = _recorders.set(_recorders.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _recorders.reset(self._token)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def problems(self, budget: Optional[Tuple[str, int]]):
+        problems = []
+        if budget is not None and self.count > budget[1]:
+            problems.append(f"{budget[0]}: {self.count} queries, budget is {budget[1]}")
+        for shape, n in self.repeated():
+            problems.append(f"possible N+1, {n}x: {shape[:200]}")
+        return problems
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+
+class QueryBudgetMiddleware:
+    # Sync and async, so the async views (society/api_async.py) don't get a thread hop
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with _frame() as frame, QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self._report(request, response, frame, recorder, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with _frame() as frame, QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self._report(request, response, frame, recorder, started)
+
+    def _report(self, request, response, frame, recorder, started):
+        budget = frame[-1] if frame else None
+
+        total_ms = (time.perf_counter() - started) * 1000
+        response["Server-Timing"] = f"{recorder.server_timing()}, app;dur={total_ms:.1f}"
+
+        for problem in recorder.problems(budget):
+            logger.warning("%s %s: %s", request.method, request.path, problem)
+        return response
+
+
+@contextmanager
+def assert_query_budget(budget: Optional[int] = None):
+    """
+    Test helper: fails if the request made inside goes over its route's declared budget
+    (or `budget`), or repeats a statement shape N_PLUS_ONE_THRESHOLD+ times.
+    """
+    with _frame() as frame, QueryRecorder() as recorder:
+        yield recorder
+    declared = frame[-1] if frame else None
+
+    if budget is not None:
+        declared = (declared[0] if declared else "block", budget)
+    problems = recorder.problems(declared)
+    if problems:
+        raise QueryBudgetExceeded("; ".join(problems))
@@ -0,0 +1,100 @@
+# society/readmodel.py
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Event, UpcomingEvent
+from .serializers import EVENT_OUT_FIELDS, event_values
+
+
+# UpcomingEvent: the upcoming slice of Event, flattened to the EventOut columns.
+#
+# - society/signals.py refreshes the rows of every saved / deleted Event and of every
+#   event at a saved Location, in the same transaction as the write.
+# - Bulk writes that skip signals (CSV imports, seeding) call refresh_events() /
+#   rebuild() themselves.
+# - Rows whose start_date passed are still in the table until
+#   `manage.py refresh_upcoming_events` deletes them (cron, every few minutes); readers
+#   filter start_date >= now anyway, so that only costs index space.
+
+REFRESH_BATCH = 2000
+
+_COLUMNS = [name for name in EVENT_OUT_FIELDS if name != "id"] + ["updated_at"]
+
+
+def enabled() -> bool:
+    return getattr(settings, "SOCIETY_UPCOMING_READ_MODEL", True)
+
+
+def _batches(ids: Iterable[int], size: int):
+    ids = iter(ids)
+    while True:
+        batch = list(islice(ids, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _upsert(events) -> int:
+    """Event queryset -> its upcoming rows written to UpcomingEvent. Returns how many."""
+    events = events.filter(start_date__gte=timezone.now()).annotate(changed_at=Greatest("updated_at", "location__updated_at"))
+    rows = [UpcomingEvent(updated_at=values.pop("changed_at"), **values) for values in event_values(events, "changed_at")]
+    UpcomingEvent.objects.bulk_create(rows, update_conflicts=True, unique_fields=["id"], update_fields=_COLUMNS)
+    return len(rows)
+
+
+def refresh_events(event_ids: Iterable[int], batch_size: int = REFRESH_BATCH) -> int:
+    """
+    Re-sync the rows of these events: deleted or past ones are dropped, the others
+    rewritten from Event + Location. Returns how many rows were written.
+    """
+    written = 0
+    with transaction.atomic():
+        for batch in _batches(event_ids, batch_size):
+            UpcomingEvent.objects.filter(id__in=batch).delete()
+            written += _upsert(Event.objects.filter(id__in=batch))
+    return written
+
+
+def refresh_locations(location_ids: Iterable[int]) -> int:
+    """Location name / category / coordinates changed: rewrite their upcoming events."""
+    location_ids = list(location_ids)
+    if not location_ids:
+        return 0
+    ids = Event.objects.filter(location_id__in=location_ids, start_date__gte=timezone.now()).values_list("id", flat=True)
+    return refresh_events(list(ids))
+
+
+def expire(now: Optional[datetime] = None) -> int:
+    """Delete the rows of events that have started. Returns how many."""
+    deleted, _ = UpcomingEvent.objects.filter(start_date__lt=now or timezone.now()).delete()
+    return deleted
+
+
+# rebuild() in one statement; the migration that created the table backfills with the same
+_REBUILD_SQL = """
+INSERT INTO society_upcomingevent (
+    id, title, sub_title_thai, description, description_thai, banner_image, event_type, start_date, end_date,
+    location_id, location_name, location_category, location_address, location_website, country_code, lat, lng,
+    hightlight, hightlight_thai, organizer_name, contact_info, event_website, updated_at
+)
+SELECT
+    e.id, e.title, e.sub_title_thai, e.description, e.description_thai, e.banner_image, e.event_type, e.start_date, e.end_date,
+    l.id, l.name, l.category, l.address, l.website, l.country_code, ST_Y(l.coordinates::geometry), ST_X(l.coordinates::geometry),
+    e.hightlight, e.hightlight_thai, e.organizer_name, e.contact_info, e.event_website, GREATEST(e.updated_at, l.updated_at)
+FROM society_event AS e JOIN society_location AS l ON l.id = e.location_id
+WHERE e.start_date >= %s
+"""
+
+
+def rebuild() -> int:
+    """Rewrite the whole table from Event (after raw SQL / COPY writes, or to fix drift)."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {UpcomingEvent._meta.db_table}")
+        cursor.execute(_REBUILD_SQL, [timezone.now()])
+        return cursor.rowcount
@@ -0,0 +1,41 @@
+# society/renderers.py
+from typing import Any
+
+import orjson
+from django.http import HttpResponse
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+
+_encoder = NinjaJSONEncoder()
+
+
+def _default(o: Any) -> Any:
+    # datetimes are passed through so they are formatted exactly like before
+    # (DjangoJSONEncoder: milliseconds, "Z" for UTC); pydantic models, Url, Decimal etc. too.
+    return _encoder.default(o)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Drop-in for ninja's JSONRenderer on top of orjson. Same values, compact separators,
+    UTF-8 instead of \\u escapes.
+    """
+
+    media_type = "application/json"
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, request, data: Any, *, response_status: int) -> bytes:
+        return orjson.dumps(data, default=_default, option=self.options)
+
+
+renderer = ORJSONRenderer()
+
+
+def render(data: Any) -> bytes:
+    return renderer.render(None, data, response_status=200)
+
+
+def json_response(content: bytes, status: int = 200) -> HttpResponse:
+    """Already rendered JSON -> response (what ninja would build, minus the validation)."""
+    return HttpResponse(content, status=status, content_type=f"{renderer.media_type}; charset={renderer.charset}")
@@ -51,14 +51,71 @@ class EventOut(Schema):
     # only set by /events/nearby
     distance_km: Optional[float] = None
 
+# /events/trending
+class TrendingEventOut(EventOut):
+    saved_count: int
+    trending_score: float  # log2 of the decayed save count, only meaningful for ranking
+
+
 class PaginatedEventsOut(Schema):
     items: List[EventOut]
+    count: Optional[int] = None  # None when with_count=false / count_strategy=none
+    count_is_estimate: bool = False  # count_strategy=estimated on a large result
+    limit: int
+    offset: int
+    next_offset: Optional[int] = None
+
+    # opaque keyset cursors, pass back as ?cursor=
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+# /events/changes, see society/changes.py
+class EventChangesOut(Schema):
+    events: List[EventOut]  # created or updated since the token, current state
+    deleted_event_ids: List[int]
+    deleted_location_ids: List[int]
+    next_token: str  # pass back as ?since=
+    has_more: bool  # more changes queued, call again right away
+    reset: bool = False  # token unknown or too old: refetch /events, then sync from next_token
+
+
+class PaginatedLocationsOut(Schema):
+    items: List[LocationOut]
     count: int
     limit: int
     offset: int
     next_offset: Optional[int] = None
 
 
+# /events/in_bbox and /locations/in_bbox (cursor only, no count)
+class CursorEventsOut(Schema):
+    items: List[EventOut]
+    limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class CursorLocationsOut(Schema):
+    items: List[LocationOut]
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+# /locations/clusters and /events/clusters
+class ClusterOut(Schema):
+    cell: str  # geohash prefix, stable id for the cluster at this zoom
+    count: int
+    lat: float  # centroid
+    lng: float
+
+
+class LocationClusterOut(ClusterOut):
+    category: str  # most common category in the cluster
+
+
+class EventClusterOut(ClusterOut):
+    event_type: str  # most common event_type in the cluster
 
 
 class MemberProfileOut(Schema):
@@ -69,3 +126,19 @@ class MemberProfileOut(Schema):
     saved_event_ids: List[int]
 
 
+# compact event embedded in /member_profiles?expand=saved_events
+class EventCompactOut(Schema):
+    id: int
+    title: str
+    sub_title_thai: Optional[str] = None
+    banner_image: str
+    event_type: str
+    start_date: datetime
+    end_date: Optional[datetime] = None
+    location_id: int
+    location_name: str
+    country_code: str
+
+
+class MemberProfileExpandedOut(MemberProfileOut):
+    saved_events: Optional[List[EventCompactOut]] = None  # only with expand=saved_events
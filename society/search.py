@@ -0,0 +1,79 @@
+# society/search.py
+from typing import Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramSimilarity
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Location
+
+
+# Search over the trigger-maintained search_vector columns (migration 0008) plus the pg_trgm
+# indexes declared on the models.
+#
+# - English text goes through the 'english' config (stemming: "festivals" finds "festival").
+# - Names and Thai go through 'simple'. Thai is written without spaces, so a whole phrase is
+#   one lexeme; substring matches on the Thai columns (UPPER(...) gin_trgm_ops) cover that.
+
+# pg_trgm can only use the index for patterns of 3+ characters
+MIN_TRIGRAM_LENGTH = 3
+
+# similarity() threshold for resolve_location's fuzzy fallback
+FUZZY_LOCATION_THRESHOLD = 0.4
+
+
+def search_vector(table: str) -> RawSQL:
+    return RawSQL(f'"{table}"."search_vector"', [], output_field=SearchVectorField())
+
+
+def search_query(q: str) -> SearchQuery:
+    return SearchQuery(q, config="english", search_type="websearch") | SearchQuery(
+        q, config="simple", search_type="websearch"
+    )
+
+
+def search_events(qs, q: str):
+    """Events matching q, best first (ties: soonest, then id)."""
+    query = search_query(q)
+    match = Q(sv=query)
+    if len(q) >= MIN_TRIGRAM_LENGTH:
+        match |= Q(title__icontains=q) | Q(sub_title_thai__icontains=q) | Q(description_thai__icontains=q)
+
+    return (
+        qs.alias(sv=search_vector("society_event"))
+        .filter(match)
+        .annotate(rank=SearchRank(F("sv"), query) + TrigramSimilarity("title", q))
+        .order_by("-rank", "start_date", "id")
+    )
+
+
+def search_locations(qs, q: str):
+    """Locations matching q by words, substring or similar spelling, best first."""
+    query = search_query(q)
+    match = Q(sv=query) | Q(name__trigram_similar=q)
+    if len(q) >= MIN_TRIGRAM_LENGTH:
+        match |= Q(name__icontains=q)
+
+    return (
+        qs.alias(sv=search_vector("society_location"))
+        .filter(match)
+        .annotate(rank=SearchRank(F("sv"), query) + TrigramSimilarity("name", q))
+        .order_by("-rank", "name", "id")
+    )
+
+
+def fuzzy_location(name: str) -> Optional[Location]:
+    """
+    Best Location whose name is spelled like `name` (pg_trgm, uses location_name_trgm),
+    or None if nothing is close enough or the best two are tied.
+    """
+    matches = list(
+        Location.objects.annotate(similarity=TrigramSimilarity("name", name))
+        .filter(name__trigram_similar=name, similarity__gte=FUZZY_LOCATION_THRESHOLD)
+        .order_by("-similarity")[:2]
+    )
+    if not matches:
+        return None
+    if len(matches) == 2 and matches[0].similarity == matches[1].similarity:
+        return None
+    return matches[0]
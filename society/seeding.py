@@ -0,0 +1,390 @@
+# society/seeding.py
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import changes, popularity, readmodel
+from .geo import encode_geohash
+from .models import Event, Location, MemberProfile, SavedEventStamp
+
+
+# Deterministic synthetic data (same seed -> same rows) for plan checks, benchmarks
+# and load tests. Locations are clustered around cities with Thai communities in the EU/UK.
+
+# (city, country_code, lat, lng, weight)
+CITIES = [
+    ("London", "UK", 51.5072, -0.1276, 10),
+    ("Manchester", "UK", 53.4808, -2.2426, 3),
+    ("Birmingham", "UK", 52.4862, -1.8904, 3),
+    ("Edinburgh", "UK", 55.9533, -3.1883, 2),
+    ("Berlin", "DE", 52.5200, 13.4050, 6),
+    ("Munich", "DE", 48.1351, 11.5820, 4),
+    ("Frankfurt", "DE", 50.1109, 8.6821, 4),
+    ("Hamburg", "DE", 53.5511, 9.9937, 3),
+    ("Cologne", "DE", 50.9375, 6.9603, 2),
+    ("Paris", "FR", 48.8566, 2.3522, 6),
+    ("Lyon", "FR", 45.7640, 4.8357, 2),
+    ("Stockholm", "SE", 59.3293, 18.0686, 5),
+    ("Gothenburg", "SE", 57.7089, 11.9746, 3),
+    ("Malmo", "SE", 55.6050, 13.0038, 2),
+    ("Oslo", "NO", 59.9139, 10.7522, 3),
+    ("Copenhagen", "DK", 55.6761, 12.5683, 3),
+    ("Helsinki", "FI", 60.1699, 24.9384, 2),
+    ("Amsterdam", "NL", 52.3676, 4.9041, 3),
+    ("Brussels", "BE", 50.8503, 4.3517, 2),
+    ("Zurich", "CH", 47.3769, 8.5417, 3),
+    ("Geneva", "CH", 46.2044, 6.1432, 1),
+    ("Vienna", "AT", 48.2082, 16.3738, 2),
+    ("Budapest", "HU", 47.4979, 19.0402, 1),
+    ("Madrid", "ES", 40.4168, -3.7038, 1),
+    ("Rome", "IT", 41.9028, 12.4964, 1),
+]
+
+LOCATION_PREFIXES = {
+    Location.Category.TEMPLE: ["Wat", "Wat Buddha", "Wat Thai", "Wat Dhamma"],
+    Location.Category.MARKET: ["Thai Market", "Somtam Street Food", "Asia Market"],
+    Location.Category.EXHIBITION: ["Thai Cultural Center", "Siam Hall", "Lanna Stage"],
+    Location.Category.PARTNER: ["Baan Thai", "Somtam House", "Thai Kitchen"],
+}
+LOCATION_SUFFIXES = ["Ratanaram", "Padipa", "Santi", "Siam", "Lotus", "Mongkol", "Sukhothai", "Chiang Mai", "Isan", "Suvarnabhumi"]
+
+EVENT_TITLES = {
+    Event.EventType.RELIGIOUS: ["Makha Bucha Day Ceremony", "Visakha Bucha Candlelight", "Kathina Robe Offering", "Asalha Bucha Merit Making"],
+    Event.EventType.CONCERT: ["Luk Thung Night", "Mor Lam Concert", "Thai Pop Live", "Classical Thai Music Evening"],
+    Event.EventType.MARKET: ["Songkran Food Festival", "Loy Krathong Night Market", "Thai Street Food Weekend", "Somtam Festival"],
+    Event.EventType.COMMUNITY: ["Thai Community Picnic", "Thai Language Day", "Muay Thai Open Day", "Thai Cooking Workshop"],
+}
+THAI_TITLES = ["วันมาฆบูชา", "สงกรานต์", "ลอยกระทง", "ตลาดนัดอาหารไทย", "คอนเสิร์ตลูกทุ่ง", "ทำบุญตักบาตร", "งานวัด", "เทศกาลส้มตำ"]
+THAI_SENTENCES = [
+    "ขอเชิญชาวไทยทุกท่านร่วมงานบุญประจำปี",
+    "มีอาหารไทยและขนมไทยจำหน่ายตลอดงาน",
+    "ร่วมเวียนเทียนรอบอุโบสถในช่วงค่ำ",
+    "กิจกรรมสำหรับครอบครัวและเด็ก",
+    "เข้าร่วมฟรี ไม่มีค่าใช้จ่าย",
+]
+DESCRIPTIONS = [
+    "Thai Buddhist community gathering with alms giving and a Dhamma talk.",
+    "Traditional Thai food stalls, live music and cultural performances.",
+    "Family friendly event with Thai dance, games and a community lunch.",
+    "Evening candlelight procession around the temple, everyone welcome.",
+    "Workshops, market stands and performances from local Thai artists.",
+]
+
+# Roughly: most events are in the coming months, a tail in the past
+PAST_SHARE = 0.3
+
+
+def _weighted_cities(rng: random.Random, n: int):
+    weights = [c[4] for c in CITIES]
+    return rng.choices(CITIES, weights=weights, k=n)
+
+
+def generate_locations(n: int, seed: int = 42, start: int = 0) -> Iterator[dict]:
+    """`start` only offsets the numbers in names / external ids (for appending to seeded data)."""
+    rng = random.Random(seed)
+    categories = list(LOCATION_PREFIXES)
+    for i, (city, cc, lat, lng, _) in enumerate(_weighted_cities(rng, n), start):
+        category = rng.choices(categories, weights=[5, 2, 1, 2])[0]
+        # clustered around the city centre (~5-10 km)
+        plat = lat + rng.gauss(0, 0.05)
+        plng = lng + rng.gauss(0, 0.08)
+        name = f"{rng.choice(LOCATION_PREFIXES[category])} {rng.choice(LOCATION_SUFFIXES)} {city} {i}"
+        yield {
+            "name": name,
+            "category": str(category),
+            "address": f"{rng.randint(1, 200)} {rng.choice(LOCATION_SUFFIXES)} Str., {city}",
+            "lat": plat,
+            "lng": plng,
+            "geohash": encode_geohash(plat, plng),
+            "website": "https://www.stm-society.com",
+            "country_code": cc,
+            "related_store_external_id": f"SEED-{cc}-{i:07d}",
+        }
+
+
+def generate_events(n: int, location_ids: Sequence[int], seed: int = 42, now: datetime = None, start: int = 0) -> Iterator[dict]:
+    """`start` only offsets the numbers in external ids (for appending to seeded data)."""
+    rng = random.Random(seed + 1)
+    now = now or timezone.now()
+    types = list(EVENT_TITLES)
+    for i in range(start, start + n):
+        event_type = rng.choices(types, weights=[4, 2, 3, 3])[0]
+        if rng.random() < PAST_SHARE:
+            start_date = now - timedelta(days=rng.expovariate(1 / 120))
+        else:
+            start_date = now + timedelta(days=rng.expovariate(1 / 60))
+        start_date = start_date.replace(minute=0, second=0, microsecond=0)
+        end_date = start_date + timedelta(hours=rng.choice([2, 4, 6, 8, 24, 48]))
+        yield {
+            "event_external_id": f"SEED-EVT-{i:08d}",
+            "title": rng.choice(EVENT_TITLES[event_type]),
+            "sub_title_thai": rng.choice(THAI_TITLES),
+            "hightlight": "",
+            "hightlight_thai": "",
+            "organizer_name": "Somtam Society",
+            "contact_info": "EMAIL",
+            "event_website": "https://www.somtamevent.com",
+            "location_id": rng.choice(location_ids),
+            "start_date": start_date,
+            "end_date": end_date,
+            "event_type": str(event_type),
+            "description": rng.choice(DESCRIPTIONS),
+            "description_thai": " ".join(rng.sample(THAI_SENTENCES, 2)),
+            "banner_image": "",
+            "design_template_external_id": "",
+        }
+
+
+def seed_with_orm(locations: int, events: int, seed: int = 42, batch_size: int = 2000):
+    """Small/medium datasets through bulk_create. Returns (location_ids, event_count)."""
+    with transaction.atomic():
+        objs = []
+        for values in generate_locations(locations, seed):
+            lat, lng = values.pop("lat"), values.pop("lng")
+            objs.append(Location(coordinates=Point(lng, lat, srid=4326), **values))
+        created = Location.objects.bulk_create(objs, batch_size=batch_size)
+        location_ids = [loc.pk for loc in created]
+        changes.record_locations(location_ids)
+
+        created = Event.objects.bulk_create(
+            (Event(**values) for values in generate_events(events, location_ids, seed)),
+            batch_size=batch_size,
+        )
+        readmodel.refresh_events([event.pk for event in created], batch_size=batch_size)
+        changes.record_events([event.pk for event in created])
+
+    return location_ids, events
+
+
+def generate_members(n: int, seed: int = 42, start: int = 0) -> Iterator[dict]:
+    rng = random.Random(seed + 2)
+    types = list(EVENT_TITLES)
+    for i, (city, *_) in enumerate(_weighted_cities(rng, n), start):
+        yield {
+            "username": f"seed_member_{i:08d}",
+            "home_city": city,
+            "interests": [str(t) for t in rng.sample(types, rng.randint(0, 2))],
+        }
+
+
+def generate_saves(n_events: int, per_member: int, rng: random.Random) -> List[int]:
+    """Event indexes (0..n_events-1) one member saved. Skewed: a few events get most saves."""
+    k = min(rng.randint(0, 2 * per_member), n_events)
+    picked = set()
+    while len(picked) < k:
+        picked.add(int(n_events * rng.random() ** 3))
+    return sorted(picked)
+
+
+# -- COPY loader ------------------------------------------------------------------------
+#
+# seed_with_orm() is fine up to ~100k rows. For load tests with millions of rows
+# seed_with_copy() streams the same generators into COPY ... FROM STDIN in chunks, with
+# explicit ids (the tables are locked meanwhile, the sequences are moved past them at the
+# end) so saves can point at events without reading anything back. New ids start past both
+# the table and its sequence: ids handed out before (deleted rows, rolled back inserts) are
+# never reused, and the sequence never moves backwards.
+
+NULL = r"\N"
+
+
+def _csv_value(value):
+    if value is None:
+        return NULL
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence], chunk_size: int) -> int:
+    """COPY rows (tuples in `columns` order) into table, chunk_size rows per round trip."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')"
+    rows = iter(rows)
+    total = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return total
+        buf = io.StringIO()
+        csv.writer(buf).writerows([_csv_value(v) for v in row] for row in chunk)
+        buf.seek(0)
+        cursor.copy_expert(sql, buf)
+        total += len(chunk)
+
+
+def _last_id_sql(table: str) -> str:
+    # pg_sequence_last_value() is NULL until the sequence is first used
+    return (
+        f"GREATEST((SELECT MAX(id) FROM {table}), "
+        f"pg_sequence_last_value(pg_get_serial_sequence('{table}', 'id')::regclass), 0)"
+    )
+
+
+def _next_id(cursor, table: str) -> int:
+    cursor.execute(f"SELECT {_last_id_sql(table)} + 1")
+    return cursor.fetchone()[0]
+
+
+def _columns(model, names: Sequence[str]) -> List[str]:
+    return [model._meta.get_field(name).column for name in names]
+
+
+LOCATION_COLUMNS = (
+    "id", "name", "category", "address", "coordinates", "website", "country_code", "related_store_external_id", "geohash",
+    "updated_at",
+)
+EVENT_COLUMNS = (
+    "id", "event_external_id", "title", "sub_title_thai", "hightlight", "hightlight_thai", "organizer_name",
+    "contact_info", "event_website", "location", "start_date", "end_date", "event_type", "description",
+    "description_thai", "banner_image", "design_template_external_id", "updated_at",
+)
+USER_COLUMNS = ("id", "password", "is_superuser", "username", "first_name", "last_name", "email", "is_staff", "is_active", "date_joined")
+MEMBER_COLUMNS = ("id", "user", "home_city", "interests")
+
+
+def seed_with_copy(
+    locations: int,
+    events: int,
+    members: int = 0,
+    saves_per_member: int = 8,
+    seed: int = 42,
+    chunk_size: int = 50_000,
+    log: Optional[Callable[[str], None]] = None,
+) -> Dict[str, int]:
+    """
+    Appends locations, events, members (auth users + profiles) and their saved events
+    with COPY, in one transaction. saved_count / trending_score are filled in as well.
+    Returns rows written per table.
+    """
+    User = get_user_model()
+    if User._meta.label != "auth.User":
+        raise ValueError(f"seed_with_copy writes auth.User rows, AUTH_USER_MODEL is {User._meta.label}")
+
+    through = MemberProfile.saved_events.through
+    tables = [Location, Event, User, MemberProfile, through, SavedEventStamp]
+    now = timezone.now()
+    written = {}
+    timings = {}
+
+    def copy(label, model, columns, rows):
+        started = time.perf_counter()
+        n = copy_rows(cursor, model._meta.db_table, columns, rows, chunk_size)
+        written[label] = written.get(label, 0) + n
+        timings[label] = timings.get(label, 0.0) + time.perf_counter() - started
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {', '.join(m._meta.db_table for m in tables)} IN EXCLUSIVE MODE")
+        first = {model: _next_id(cursor, model._meta.db_table) for model in tables}
+
+        # Locations
+        if locations:
+            location_ids = range(first[Location], first[Location] + locations)
+            copy(
+                "locations",
+                Location,
+                _columns(Location, LOCATION_COLUMNS),
+                (
+                    (
+                        pk, v["name"], v["category"], v["address"], f"SRID=4326;POINT({v['lng']} {v['lat']})",
+                        v["website"], v["country_code"], v["related_store_external_id"], v["geohash"], now,
+                    )
+                    for pk, v in zip(location_ids, generate_locations(locations, seed, start=first[Location]))
+                ),
+            )
+        else:
+            location_ids = list(Location.objects.values_list("id", flat=True))
+            if not location_ids:
+                raise ValueError("No locations to attach events to")
+
+        # Events, popularity is filled in below once the saves are known
+        event_ids = range(first[Event], first[Event] + events)
+        keys = ["location_id" if name == "location" else name for name in EVENT_COLUMNS[1:-1]]
+        copy(
+            "events",
+            Event,
+            _columns(Event, EVENT_COLUMNS),
+            (
+                (pk, *(v[key] for key in keys), now)
+                for pk, v in zip(event_ids, generate_events(events, location_ids, seed, now=now, start=first[Event]))
+            ),
+        )
+
+        # Members: auth user + profile, then their saves (through table + stamps)
+        if members and events:
+            user_ids = range(first[User], first[User] + members)
+            member_ids = range(first[MemberProfile], first[MemberProfile] + members)
+            # two passes over the (deterministic) generator instead of holding every profile
+            profiles = lambda: generate_members(members, seed, start=first[MemberProfile])  # noqa: E731
+            copy(
+                "users",
+                User,
+                _columns(User, USER_COLUMNS),
+                ((pk, "!", False, p["username"], "", "", "", False, True, now) for pk, p in zip(user_ids, profiles())),
+            )
+            copy(
+                "members",
+                MemberProfile,
+                _columns(MemberProfile, MEMBER_COLUMNS),
+                ((pk, user_id, p["home_city"], p["interests"]) for pk, user_id, p in zip(member_ids, user_ids, profiles())),
+            )
+
+            rng = random.Random(seed + 3)
+            through_columns = ["id", through._meta.get_field("memberprofile").column, through._meta.get_field("event").column]
+            stamp_columns = _columns(SavedEventStamp, ("id", "member", "event", "saved_at"))
+            next_pk = first[through]
+            next_stamp = first[SavedEventStamp]
+            scores = {}  # event_id -> (saved_count, trending_score)
+
+            members_per_chunk = max(1, chunk_size // max(saves_per_member, 1))
+            for offset in range(0, members, members_per_chunk):
+                saves = [
+                    (member_id, event_ids[index], now - timedelta(hours=rng.expovariate(1 / 72)))
+                    for member_id in member_ids[offset : offset + members_per_chunk]
+                    for index in generate_saves(events, saves_per_member, rng)
+                ]
+                copy("saved_events", through, through_columns, ((next_pk + i, m, e) for i, (m, e, _) in enumerate(saves)))
+                copy("saved_event_stamps", SavedEventStamp, stamp_columns, ((next_stamp + i, *save) for i, save in enumerate(saves)))
+                next_pk += len(saves)
+                next_stamp += len(saves)
+
+                for _, e, saved_at in saves:
+                    count, score = scores.get(e, (0, 0.0))
+                    scores[e] = (count + 1, popularity.combine(score, count, popularity.exponent(saved_at)))
+
+            # Same numbers popularity.recompute() would produce, in one UPDATE
+            cursor.execute("CREATE TEMP TABLE seed_popularity (id bigint, n int, score float8) ON COMMIT DROP")
+            copy_rows(cursor, "seed_popularity", ("id", "n", "score"), ((e, *v) for e, v in scores.items()), chunk_size)
+            cursor.execute(
+                f"UPDATE {Event._meta.db_table} AS e SET saved_count = p.n, trending_score = p.score "
+                "FROM seed_popularity AS p WHERE e.id = p.id"
+            )
+
+        readmodel.rebuild()
+        if locations:
+            changes.record_locations(Location.objects.filter(id__gte=location_ids.start, id__lt=location_ids.stop))
+        changes.record_events(Event.objects.filter(id__gte=event_ids.start, id__lt=event_ids.stop))
+
+        # Explicit ids don't advance the sequences
+        for model in tables:
+            table = model._meta.db_table
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence(%s, 'id'), GREATEST({_last_id_sql(table)}, 1))", [table])
+
+    with connection.cursor() as cursor:
+        for model in tables:
+            cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    if log:
+        for label, n in written.items():
+            seconds = timings[label]
+            log(f"{label}: {n} rows in {seconds:.1f}s ({n / seconds if seconds else 0:.0f} rows/s)")
+    return written
@@ -0,0 +1,212 @@
+# society/serializers.py
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.db.models import F
+from ninja.errors import HttpError
+
+from .geo import Lat, Lng
+from .models import UpcomingEvent
+
+
+# Fast path for list endpoints: one .values() query (location columns joined, lat/lng
+# extracted by PostGIS) straight into dicts shaped like EventOut / LocationOut.
+# No model instances, no GEOS points, no pydantic: the renderer takes the dicts as-is.
+#
+# The dicts must stay identical to what event_to_out() + the EventOut schema produce
+# (same keys, same order, same "" coercions), check with `manage.py bench_event_serialization`.
+#
+# Sparse fieldsets: ?fields=title,start_date / ?exclude=description,... narrow both the
+# SELECT and the dicts (see parse_fields). "id" is always included.
+#
+# event_values() also takes UpcomingEvent querysets (society/readmodel.py): same names,
+# but every EventOut field is a plain column there.
+
+# Event's own columns
+EVENT_FIELDS = (
+    "id",
+    "title",
+    "sub_title_thai",
+    "description",
+    "description_thai",
+    "banner_image",
+    "event_type",
+    "start_date",
+    "end_date",
+    "location_id",
+    "hightlight",
+    "hightlight_thai",
+    "organizer_name",
+    "contact_info",
+    "event_website",
+)
+
+# Joined from the location
+EVENT_EXPRESSIONS = {
+    "location_name": F("location__name"),
+    "location_category": F("location__category"),
+    "location_address": F("location__address"),
+    "location_website": F("location__website"),
+    "country_code": F("location__country_code"),
+    "lat": Lat("location__coordinates"),
+    "lng": Lng("location__coordinates"),
+}
+
+# EventOut key order
+EVENT_OUT_FIELDS = (
+    "id",
+    "title",
+    "sub_title_thai",
+    "description",
+    "description_thai",
+    "banner_image",
+    "event_type",
+    "start_date",
+    "end_date",
+    "location_id",
+    "location_name",
+    "location_category",
+    "location_address",
+    "location_website",
+    "country_code",
+    "lat",
+    "lng",
+    "hightlight",
+    "hightlight_thai",
+    "organizer_name",
+    "contact_info",
+    "event_website",
+)
+
+# event_to_out() turns these into "" when empty
+EVENT_BLANK_AS_EMPTY = frozenset(
+    {
+        "sub_title_thai",
+        "description",
+        "description_thai",
+        "banner_image",
+        "hightlight",
+        "hightlight_thai",
+        "organizer_name",
+        "contact_info",
+        "event_website",
+    }
+)
+
+# EventCompactOut (events embedded in member profiles)
+EVENT_COMPACT_FIELDS = (
+    "id",
+    "title",
+    "sub_title_thai",
+    "banner_image",
+    "event_type",
+    "start_date",
+    "end_date",
+    "location_id",
+    "location_name",
+    "country_code",
+)
+
+LOCATION_FIELDS = ("id", "name", "category", "address", "website", "country_code", "related_store_external_id")
+
+LOCATION_EXPRESSIONS = {
+    "lat": Lat("coordinates"),
+    "lng": Lng("coordinates"),
+}
+
+LOCATION_OUT_FIELDS = LOCATION_FIELDS + ("lat", "lng")
+
+LOCATION_BLANK_AS_EMPTY = frozenset({"address", "related_store_external_id"})
+
+# distance_km isn't a column, event_row() fills it in (only /events/nearby has one)
+EVENT_SELECTABLE = EVENT_OUT_FIELDS + ("distance_km",)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def parse_fields(fields: Optional[str], exclude: Optional[str], available: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """
+    ?fields= / ?exclude= -> the selected names in schema order, or None for everything.
+    Unknown names are a 400 so typos don't silently return less.
+    """
+    wanted, excluded = _split(fields), _split(exclude)
+    if not wanted and not excluded:
+        return None
+
+    unknown = sorted(set(wanted + excluded) - set(available))
+    if unknown:
+        raise HttpError(400, f"Unknown field(s): {', '.join(unknown)}")
+    if "id" in excluded:
+        raise HttpError(400, "id can't be excluded")
+
+    keep = set(wanted) if wanted else set(available)
+    keep = (keep - set(excluded)) | {"id"}
+    return tuple(name for name in available if name in keep)
+
+
+def parse_event_fields(fields: Optional[str], exclude: Optional[str]) -> Optional[Tuple[str, ...]]:
+    return parse_fields(fields, exclude, EVENT_SELECTABLE)
+
+
+def parse_location_fields(fields: Optional[str], exclude: Optional[str]) -> Optional[Tuple[str, ...]]:
+    return parse_fields(fields, exclude, LOCATION_OUT_FIELDS)
+
+
+def _values(qs, names, extra, plain, expressions):
+    # Only the selected columns are read; the joined/extracted ones only when asked for
+    selected = [name for name in names if name in plain or name in expressions]
+    selected += [name for name in extra if name not in selected]
+    return qs.values(
+        *(name for name in selected if name not in expressions),
+        **{name: expressions[name] for name in selected if name in expressions},
+    )
+
+
+def event_values(qs, *extra: str, fields: Optional[Sequence[str]] = None):
+    """
+    qs -> .values() with the EventOut columns (all, or just `fields`), plus `extra`
+    columns/annotations by name (e.g. "start_date" for cursors, "distance").
+    Filters, ordering and slicing on qs are kept.
+    """
+    names = EVENT_OUT_FIELDS if fields is None else fields
+    if qs.model is UpcomingEvent:
+        return _values(qs, names, extra, EVENT_OUT_FIELDS, {})
+    return _values(qs, names, extra, EVENT_FIELDS, EVENT_EXPRESSIONS)
+
+
+def event_row(values: Dict, distance_km: Optional[float] = None, fields: Optional[Sequence[str]] = None) -> Dict:
+    row = {}
+    for name in EVENT_SELECTABLE if fields is None else fields:
+        if name == "distance_km":
+            value = distance_km
+        else:
+            value = values[name]
+            if name in EVENT_BLANK_AS_EMPTY:
+                value = value or ""
+        row[name] = value
+    return row
+
+
+def event_rows(rows, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """event_values() queryset (or already fetched rows) -> EventOut dicts."""
+    return [event_row(v, fields=fields) for v in rows]
+
+
+def location_values(qs, fields: Optional[Sequence[str]] = None):
+    names = LOCATION_OUT_FIELDS if fields is None else fields
+    return _values(qs, names, (), LOCATION_FIELDS, LOCATION_EXPRESSIONS)
+
+
+def location_row(values: Dict, fields: Optional[Sequence[str]] = None) -> Dict:
+    row = {}
+    for name in LOCATION_OUT_FIELDS if fields is None else fields:
+        value = values[name]
+        if name in LOCATION_BLANK_AS_EMPTY:
+            value = value or ""
+        row[name] = value
+    return row
+
+
+def location_rows(rows, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    return [location_row(v, fields=fields) for v in rows]
@@ -0,0 +1,104 @@
+# society/signals.py
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import cache, changes, popularity, readmodel, spatial, tiles
+from .models import Event, Location, MemberProfile
+
+
+# Invalidate after commit, otherwise a concurrent read could cache the old rows again
+# before the write is visible.
+
+def _invalidate_on_commit(*namespaces):
+    transaction.on_commit(lambda: cache.invalidate(*namespaces))
+
+
+@receiver(pre_save, sender=Location)
+def location_saving(sender, instance, **kwargs):
+    # A move makes the map tiles at the old position stale too
+    old = Location.objects.filter(pk=instance.pk).values_list("coordinates", flat=True) if instance.pk else []
+    instance._old_coordinates = next(iter(old), None)
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, **kwargs):
+    # Events embed location name/category/coordinates, so both go stale
+    readmodel.refresh_locations([instance.pk])
+    changes.record_locations([instance.pk])
+    changes.record_location_events([instance.pk])
+    _invalidate_on_commit(cache.LOCATIONS, cache.EVENTS)
+    points = [instance.coordinates, getattr(instance, "_old_coordinates", None)]
+    transaction.on_commit(lambda: tiles.invalidate_points(points))
+    transaction.on_commit(lambda: spatial.index.location_saved(instance))
+
+
+@receiver(post_delete, sender=Location)
+def location_deleted(sender, instance, **kwargs):
+    # its events were recorded as deleted by the cascade already
+    changes.record_location_deletes([instance.pk])
+    # members too: the cascade drops saved_events rows without m2m_changed
+    _invalidate_on_commit(cache.LOCATIONS, cache.EVENTS, cache.MEMBERS)
+    point = instance.coordinates
+    transaction.on_commit(lambda: tiles.invalidate_points([point]))
+    pk = instance.pk
+    transaction.on_commit(lambda: spatial.index.location_deleted(pk))
+
+
+@receiver(pre_save, sender=Event)
+def event_saving(sender, instance, **kwargs):
+    # Moving an event changes the upcoming count on the map at both locations
+    old = Event.objects.filter(pk=instance.pk).values_list("location_id", flat=True) if instance.pk else []
+    instance._old_location_id = next(iter(old), None)
+
+
+@receiver([post_save, post_delete], sender=Event)
+def event_changed(sender, instance, signal, **kwargs):
+    # Location deletes cascade through here too (one post_delete per event)
+    readmodel.refresh_events([instance.pk])
+    changes.record_events([instance.pk], changes.DELETE if signal is post_delete else changes.UPSERT)
+    if signal is post_delete:
+        # the cascade drops its saved_events rows without m2m_changed, so the profiles'
+        # saved_event_ids (/member_profiles, /member_profiles/{id}) go stale too
+        _invalidate_on_commit(cache.EVENTS, cache.MEMBERS)
+    else:
+        _invalidate_on_commit(cache.EVENTS)
+    location_ids = [instance.location_id, getattr(instance, "_old_location_id", None)]
+    transaction.on_commit(lambda: tiles.invalidate_locations(location_ids))
+
+
+@receiver([post_save, post_delete], sender=MemberProfile)
+def member_profile_changed(sender, **kwargs):
+    _invalidate_on_commit(cache.MEMBERS)
+
+
+@receiver(m2m_changed, sender=MemberProfile.saved_events.through)
+def saved_events_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # profile.saved_events.add(...) or event.interested_members.add(...)
+    def pairs(pks):
+        return [(pk, instance.pk) for pk in pks] if reverse else [(instance.pk, pk) for pk in pks]
+
+    if action == "pre_clear":
+        # post_clear doesn't say what was removed
+        related = instance.interested_members if reverse else instance.saved_events
+        instance._cleared_saved_pks = list(related.values_list("pk", flat=True))
+    elif action == "post_add":
+        popularity.saves_added(pairs(pk_set))
+    elif action == "post_remove":
+        popularity.saves_removed(pairs(pk_set))
+    elif action == "post_clear":
+        popularity.saves_removed(pairs(getattr(instance, "_cleared_saved_pks", [])))
+
+    if action in ("post_add", "post_remove", "post_clear"):
+        _invalidate_on_commit(cache.MEMBERS)
+
+
+@receiver(pre_delete, sender=MemberProfile)
+def member_profile_deleting(sender, instance, **kwargs):
+    # The cascade removes the through rows without m2m_changed
+    instance._saved_event_pks = list(instance.saved_events.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=MemberProfile)
+def member_profile_deleted(sender, instance, **kwargs):
+    popularity.recompute(getattr(instance, "_saved_event_pks", []))
@@ -0,0 +1,199 @@
+# society/spatial.py
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from . import cache
+from .geo import Lat, Lng
+
+
+logger = logging.getLogger(__name__)
+
+# In-process spatial index for /events/nearby.
+#
+# The whole Location table fits in memory, so "location ids within R km" is answered
+# from a lat/lng cell grid + haversine instead of a PostGIS Distance() per request.
+# Enable with SOCIETY_SPATIAL_INDEX=true. While the index is cold (first request,
+# stale after a write in another process, TTL expired) callers get None and use PostGIS;
+# the rebuild happens in a background thread.
+#
+# Staleness: the grid remembers the LOCATIONS namespace version it was built at plus the
+# number of bumps this process made itself (each local save/delete bumps it once, and
+# is applied to the grid). Any other bump -> another process (or a bulk import) wrote.
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class LocationGrid:
+    """Points bucketed into cell_deg x cell_deg cells. Upsert/remove are O(1)."""
+
+    def __init__(self, cell_deg: float = 0.5):
+        self.cell_deg = cell_deg
+        self.columns = int(round(360 / cell_deg))
+        self.cells: Dict[Tuple[int, int], Dict[int, Tuple[float, float]]] = defaultdict(dict)
+        self.points: Dict[int, Tuple[float, float]] = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        row = math.floor(lat / self.cell_deg)
+        col = math.floor((lng + 180) / self.cell_deg) % self.columns
+        return row, col
+
+    def upsert(self, pk: int, lat: float, lng: float) -> None:
+        self.remove(pk)
+        self.points[pk] = (lat, lng)
+        self.cells[self._cell(lat, lng)][pk] = (lat, lng)
+
+    def remove(self, pk: int) -> None:
+        old = self.points.pop(pk, None)
+        if old is None:
+            return
+        key = self._cell(*old)
+        bucket = self.cells.get(key)
+        if bucket is not None:
+            bucket.pop(pk, None)
+            if not bucket:
+                del self.cells[key]
+
+    def within(self, lat: float, lng: float, km: float) -> List[Tuple[int, float]]:
+        """[(pk, distance_km)] within km of (lat, lng), nearest first."""
+        dlat = km / KM_PER_DEG_LAT
+        lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        row_lo, row_hi = math.floor(lat_lo / self.cell_deg), math.floor(lat_hi / self.cell_deg)
+
+        # Longitude span grows towards the poles; give up and scan all columns there
+        max_abs_lat = max(abs(lat_lo), abs(lat_hi))
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if cos_lat < 1e-6 or dlat / cos_lat >= 180:
+            cols = range(self.columns)
+        else:
+            dlng = dlat / cos_lat
+            col_lo = math.floor((lng - dlng + 180) / self.cell_deg)
+            col_hi = math.floor((lng + dlng + 180) / self.cell_deg)
+            cols = [c % self.columns for c in range(col_lo, col_hi + 1)]
+
+        hits = []
+        for row in range(row_lo, row_hi + 1):
+            for col in cols:
+                for pk, (plat, plng) in self.cells.get((row, col), {}).items():
+                    d = haversine_km(lat, lng, plat, plng)
+                    if d <= km:
+                        hits.append((pk, d))
+        hits.sort(key=lambda h: (h[1], h[0]))
+        return hits
+
+
+class SpatialIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grid: Optional[LocationGrid] = None
+        self._version = None
+        self._local_bumps = 0
+        self._built_at = 0.0
+        self._building = False
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "SOCIETY_SPATIAL_INDEX", False)
+
+    def _current_version(self):
+        return cache.namespace_versions(cache.LOCATIONS)[0]
+
+    def _is_fresh(self) -> bool:
+        if self._grid is None:
+            return False
+        ttl = getattr(settings, "SOCIETY_SPATIAL_INDEX_TTL", 600)
+        if time.monotonic() - self._built_at > ttl:
+            return False
+        current = self._current_version()
+        with self._lock:
+            # Another process wrote Locations (shared cache backend) -> rebuild
+            return self._version is not None and self._version + self._local_bumps == current
+
+    def within(self, lat: float, lng: float, km: float) -> Optional[List[Tuple[int, float]]]:
+        """Location hits, or None when disabled/cold (caller falls back to PostGIS)."""
+        if not self.enabled:
+            return None
+        if not self._is_fresh():
+            self.warm()
+            return None
+        with self._lock:
+            # location_saved() / _deleted() change the grid from other threads
+            return self._grid.within(lat, lng, km)
+
+    def warm(self) -> None:
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build, name="society-spatial-index", daemon=True).start()
+
+    def rebuild(self) -> None:
+        """Synchronous full build (used by warm() in a thread)."""
+        from .models import Location
+
+        version = self._current_version()
+        grid = LocationGrid(getattr(settings, "SOCIETY_SPATIAL_INDEX_CELL_DEG", 0.5))
+        rows = (
+            Location.objects.filter(coordinates__isnull=False)
+            .annotate(lat=Lat("coordinates"), lng=Lng("coordinates"))
+            .values_list("id", "lat", "lng")
+        )
+        for pk, lat, lng in rows.iterator(chunk_size=5000):
+            grid.upsert(pk, lat, lng)
+
+        with self._lock:
+            self._grid = grid
+            self._version = version
+            self._local_bumps = 0
+            self._built_at = time.monotonic()
+
+    def _build(self):
+        close_old_connections()
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Spatial index build failed, /events/nearby stays on PostGIS")
+        finally:
+            self._building = False
+            connection.close()
+
+    # Incremental updates from society/signals.py (after commit, this process only), each
+    # after the save's own cache.invalidate(LOCATIONS)
+
+    def location_saved(self, loc) -> None:
+        with self._lock:
+            if self._grid is None:
+                return
+            if loc.coordinates:
+                self._grid.upsert(loc.pk, loc.coordinates.y, loc.coordinates.x)
+            else:
+                self._grid.remove(loc.pk)
+            self._local_bumps += 1
+
+    def location_deleted(self, pk: int) -> None:
+        with self._lock:
+            if self._grid is None:
+                return
+            self._grid.remove(pk)
+            self._local_bumps += 1
+
+
+index = SpatialIndex()
@@ -1,3 +1,768 @@
-from django.test import TestCase
+import base64
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from ninja.renderers import JSONRenderer
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from config.db.pooled_postgis import pool as db_pool
+
+from . import cache, popularity, spatial
+from .api import router
+from .api_async import router as async_router
+from .models import Event, EventChange, Location, MemberProfile
+from .pagination import encode_cursor
+from .querybudget import assert_query_budget
+from .renderers import render
+from .schemas import LocationOut
+
+
+# One request per budgeted route: route path -> URL (Berlin, where the test data is)
+BUDGETED_URLS = {
+    "/health": "/api/society/health",
+    "/health/db": "/api/society/health/db",
+    "/locations": "/api/society/locations?country_code=de",
+    "/events": "/api/society/events?country_code=DE",
+    "/events/export": "/api/society/events/export?format=csv",
+    "/events/paged": "/api/society/events/paged?limit=2",
+    "/events/changes": "/api/society/events/changes?since=1.0",
+    "/tiles/{z}/{x}/{y}.mvt": "/api/society/tiles/12/2200/1343.mvt",
+    "/events/trending": "/api/society/events/trending",
+    "/events/nearby": "/api/society/events/nearby?lat=52.52&lng=13.405&km=25",
+    "/events/search": "/api/society/events/search?q=songkran",
+    "/locations/search": "/api/society/locations/search?q=temple",
+    "/events/in_bbox": "/api/society/events/in_bbox?min_lat=52&min_lng=13&max_lat=53&max_lng=14",
+    "/locations/in_bbox": "/api/society/locations/in_bbox?min_lat=52&min_lng=13&max_lat=53&max_lng=14",
+    "/locations/clusters": "/api/society/locations/clusters?min_lat=52&min_lng=13&max_lat=53&max_lng=14&zoom=10",
+    "/events/clusters": "/api/society/events/clusters?min_lat=52&min_lng=13&max_lat=53&max_lng=14&zoom=10",
+    "/member_profiles": "/api/society/member_profiles?ids={profile_id}",
+    "/member_profiles/{profile_id}": "/api/society/member_profiles/{profile_id}",
+}
+
+
+def _budgeted(api_router) -> set:
+    return {
+        path
+        for path, view in api_router.path_operations.items()
+        for operation in view.operations
+        if hasattr(operation.view_func, "query_budget")
+    }
+
+
+# The cache would turn every second request into 0 queries; budgets are for the DB path
+@override_settings(SOCIETY_CACHE_ENABLED=False, SOCIETY_SPATIAL_INDEX=False)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        locations = [
+            Location.objects.create(
+                name=f"Wat Thai Temple {i}",
+                category=Location.Category.TEMPLE,
+                coordinates=Point(13.405 + i * 0.01, 52.52 + i * 0.01, srid=4326),
+                country_code="DE",
+            )
+            for i in range(3)
+        ]
+        # several events per location, so a per-row query would show up as N+1
+        events = [
+            Event.objects.create(
+                event_external_id=f"TEST-EVT-{i}",
+                title=f"Songkran Festival {i}",
+                location=locations[i % len(locations)],
+                start_date=now + timedelta(days=i + 1),
+                event_type=Event.EventType.RELIGIOUS,
+                description="Water blessing ceremony",
+            )
+            for i in range(9)
+        ]
+        user = get_user_model().objects.create_user(username="member", password="x")
+        cls.profile = MemberProfile.objects.create(user=user, home_city="Berlin", interests=["temple"])
+        cls.profile.saved_events.add(*events[:5])
+
+    def test_every_budgeted_route_is_covered(self):
+        self.assertEqual(_budgeted(router), set(BUDGETED_URLS))
+        # the async versions answer the same paths (config/urls_async.py)
+        self.assertEqual(_budgeted(async_router), set(async_router.path_operations))
+        self.assertLessEqual(_budgeted(async_router), set(BUDGETED_URLS))
+
+    def test_routes_stay_within_budget(self):
+        for path, url in BUDGETED_URLS.items():
+            with self.subTest(path=path):
+                with assert_query_budget():
+                    response = self.client.get(url.format(profile_id=self.profile.pk))
+                    if response.streaming:
+                        # the export runs its query while streaming
+                        b"".join(response.streaming_content)
+                self.assertLess(response.status_code, 400, response.content if not response.streaming else "")
+
+    @override_settings(ROOT_URLCONF="config.urls_async")
+    async def test_async_routes_stay_within_budget(self):
+        for path in async_router.path_operations:
+            with self.subTest(path=path):
+                with assert_query_budget() as recorder:
+                    response = await self.async_client.get(BUDGETED_URLS[path])
+                self.assertLess(response.status_code, 400, response.content)
+                # the ORM runs in sync_to_async threads, their queries count too
+                self.assertGreater(recorder.count, 0)
+
+
+def _b64(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+@override_settings(SOCIETY_CACHE_ENABLED=False)
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        location = Location.objects.create(
+            name="Wat Dhamma", coordinates=Point(13.405, 52.52, srid=4326), country_code="DE"
+        )
+        start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        # runs of three on the same start_date, so ties straddle the page boundaries (limit=4)
+        events = [
+            Event.objects.create(
+                event_external_id=f"PAGE-EVT-{i}",
+                title=f"Temple Fair {i}",
+                location=location,
+                start_date=start + timedelta(hours=i // 3),
+                event_type=Event.EventType.COMMUNITY,
+                description="Temple fair",
+            )
+            for i in range(10)
+        ]
+        cls.ascending = [e.pk for e in sorted(events, key=lambda e: (e.start_date, e.pk))]
+
+    def page(self, **params):
+        response = self.client.get("/api/society/events/paged", {"limit": 4, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_next_cursors_visit_every_event_once(self):
+        for upcoming_only, expected in ((True, self.ascending), (False, self.ascending[::-1])):
+            with self.subTest(upcoming_only=upcoming_only):
+                body = self.page(upcoming_only=upcoming_only)
+                seen = [item["id"] for item in body["items"]]
+                while body["next_cursor"]:
+                    body = self.page(upcoming_only=upcoming_only, cursor=body["next_cursor"])
+                    seen += [item["id"] for item in body["items"]]
+                self.assertEqual(seen, expected)
+                # the last page: 10 = 4 + 4 + 2, and nothing after it
+                self.assertEqual(len(body["items"]), 2)
+                self.assertIsNone(body["next_cursor"])
+
+    def test_prev_cursor_goes_back_a_page(self):
+        first = self.page()
+        second = self.page(cursor=first["next_cursor"])
+        third = self.page(cursor=second["next_cursor"])
+
+        back = self.page(cursor=third["prev_cursor"])
+        self.assertEqual(back["items"], second["items"])
+        back = self.page(cursor=back["prev_cursor"])
+        self.assertEqual(back["items"], first["items"])
+        # at the start of the list
+        self.assertIsNone(back["prev_cursor"])
+        self.assertEqual(self.page(cursor=back["next_cursor"])["items"], second["items"])
+
+    def test_tampered_cursors_are_rejected(self):
+        date = timezone.now().isoformat()
+        cursors = [
+            "not-a-cursor",
+            "!!!!",
+            _b64("[]"),
+            _b64('{"d": "next week", "i": 1}'),
+            _b64(f'{{"d": "{date}"}}'),
+            _b64(f'{{"d": "{date}", "i": "x"}}'),
+            _b64(f'{{"d": "{date}", "i": 1, "dir": "sideways"}}'),
+            _b64(f'{{"d": "{date}", "i": {2**63}}}'),
+            _b64('{"d": "2026-01-01T00:00:00", "i": 1}'),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/society/events/paged", {"cursor": cursor})
+                self.assertEqual(response.status_code, 400, response.content)
+        # a well-formed cursor past the end is just an empty page
+        response = self.client.get("/api/society/events/paged", {"cursor": encode_cursor(timezone.now() + timedelta(days=3650), 1)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"], [])
+
+
+@override_settings(SOCIETY_CACHE_ENABLED=True)
+class MemberProfileCacheTests(TestCase):
+    def test_deleted_event_leaves_cached_profiles(self):
+        location = Location.objects.create(
+            name="Wat Buddha", coordinates=Point(13.405, 52.52, srid=4326), country_code="DE"
+        )
+        event = Event.objects.create(
+            event_external_id="TEST-EVT-DEL",
+            title="Kathina",
+            location=location,
+            start_date=timezone.now() + timedelta(days=3),
+            event_type=Event.EventType.RELIGIOUS,
+            description="Robe offering",
+        )
+        user = get_user_model().objects.create_user(username="saver", password="x")
+        profile = MemberProfile.objects.create(user=user)
+        profile.saved_events.add(event)
+
+        urls = [f"/api/society/member_profiles/{profile.pk}", f"/api/society/member_profiles?ids={profile.pk}"]
+        saved = lambda body: (body[0] if isinstance(body, list) else body)["saved_event_ids"]  # noqa: E731
+        for url in urls:
+            self.assertEqual(saved(self.client.get(url).json()), [event.pk])
+
+        # the cascade removes the saved_events row without m2m_changed
+        with self.captureOnCommitCallbacks(execute=True):
+            event.delete()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(saved(self.client.get(url).json()), [])
+
+
+# The feed only serves committed transactions (below the snapshot xmin), so these tests
+# commit for real instead of running inside TestCase's transaction.
+@override_settings(SOCIETY_CACHE_ENABLED=False)
+class ChangesFeedTests(TransactionTestCase):
+    def setUp(self):
+        self.location = Location.objects.create(
+            name="Wat Pah", coordinates=Point(13.405, 52.52, srid=4326), country_code="DE"
+        )
+
+    def changes(self, since, **params):
+        response = self.client.get("/api/society/events/changes", {"since": since, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def sync_token(self):
+        body = self.changes("0")
+        self.assertTrue(body["reset"])
+        return body["next_token"]
+
+    def add_event(self, i):
+        return Event.objects.create(
+            event_external_id=f"SYNC-EVT-{i}",
+            title=f"Loy Krathong {i}",
+            location=self.location,
+            start_date=timezone.now() + timedelta(days=i + 1),
+            event_type=Event.EventType.COMMUNITY,
+            description="Lantern festival",
+        )
+
+    def test_token_round_trip(self):
+        token = self.sync_token()
+        self.assertEqual(self.changes(token)["events"], [])
+
+        created = [self.add_event(i).pk for i in range(3)]
+        seen = []
+        body = {"has_more": True, "next_token": token}
+        while body["has_more"]:
+            body = self.changes(body["next_token"], limit=2)
+            self.assertFalse(body["reset"])
+            seen += [event["id"] for event in body["events"]]
+        self.assertEqual(sorted(seen), created)
+
+        # nothing new: same token back, no rows
+        again = self.changes(body["next_token"])
+        self.assertEqual(again["events"], [])
+        self.assertEqual(again["next_token"], body["next_token"])
+
+        # a later edit comes through once
+        event = Event.objects.get(pk=created[0])
+        event.title = "Loy Krathong (moved)"
+        event.save()
+        body = self.changes(again["next_token"])
+        self.assertEqual([event["title"] for event in body["events"]], ["Loy Krathong (moved)"])
+
+    def test_deletes_are_tombstones(self):
+        kept, gone = self.add_event(0), self.add_event(1)
+        token = self.sync_token()
+
+        gone.delete()
+        body = self.changes(token)
+        self.assertEqual(body["events"], [])
+        self.assertEqual(body["deleted_event_ids"], [gone.pk])
+
+        # created and deleted between two syncs: only the delete is served
+        brief = self.add_event(2)
+        brief_id = brief.pk
+        brief.delete()
+        body = self.changes(body["next_token"])
+        self.assertEqual(body["events"], [])
+        self.assertEqual(body["deleted_event_ids"], [brief_id])
+
+        # a location delete cascades to its events
+        location_id = self.location.pk
+        self.location.delete()
+        body = self.changes(body["next_token"])
+        self.assertEqual(body["deleted_location_ids"], [location_id])
+        self.assertEqual(body["deleted_event_ids"], [kept.pk])
+
+    def test_token_behind_pruned_horizon_resets(self):
+        self.add_event(0)
+        stale = self.sync_token()
+        self.add_event(1)
+        current = self.changes(stale)["next_token"]
+
+        EventChange.objects.update(changed_at=timezone.now() - timedelta(days=60))
+        call_command("prune_event_changes", "--days=30", stdout=StringIO())
+
+        for token in (stale, current):
+            with self.subTest(token=token):
+                self.assertTrue(self.changes(token)["reset"])
+
+        # the token handed out by the reset syncs normally (no reset loop on an empty log)
+        token = self.sync_token()
+        self.assertFalse(self.changes(token)["reset"])
+        event = self.add_event(2)
+        body = self.changes(token)
+        self.assertFalse(body["reset"])
+        self.assertEqual([e["id"] for e in body["events"]], [event.pk])
+
+    def test_invalid_token(self):
+        for since in ("abc", "1", "1.x", "-1.5"):
+            with self.subTest(since=since):
+                response = self.client.get("/api/society/events/changes", {"since": since})
+                self.assertEqual(response.status_code, 400)
+
+
+class PopularityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        location = Location.objects.create(
+            name="Wat Yai", coordinates=Point(13.405, 52.52, srid=4326), country_code="DE"
+        )
+        cls.events = [
+            Event.objects.create(
+                event_external_id=f"POP-EVT-{i}",
+                title=f"Visakha Bucha {i}",
+                location=location,
+                start_date=timezone.now() + timedelta(days=7),
+                event_type=Event.EventType.RELIGIOUS,
+                description="Candle procession",
+            )
+            for i in range(2)
+        ]
+        cls.members = [
+            MemberProfile.objects.create(user=get_user_model().objects.create_user(username=f"member{i}", password="x"))
+            for i in range(4)
+        ]
+
+    def save_at(self, when, add):
+        with mock.patch.object(popularity.timezone, "now", return_value=when):
+            add()
+
+    def scores(self):
+        return dict(Event.objects.values_list("id", "trending_score"))
+
+    def counts(self):
+        return dict(Event.objects.values_list("id", "saved_count"))
+
+    def assertScoresEqual(self, actual, expected):
+        self.assertEqual(actual.keys(), expected.keys())
+        for pk, score in expected.items():
+            self.assertAlmostEqual(actual[pk], score, places=9, msg=f"event {pk}")
+
+    def test_incremental_score_matches_recompute(self):
+        a, b = self.events
+        m0, m1, m2, m3 = self.members
+        start = datetime(2026, 4, 13, 9, 0, tzinfo=dt_timezone.utc)
+        saves = {a.pk: [], b.pk: []}
+
+        self.save_at(start, lambda: m0.saved_events.add(a, b))
+        saves[a.pk].append(start)
+        saves[b.pk].append(start)
+        later = start + timedelta(days=2, hours=5)
+        self.save_at(later, lambda: m1.saved_events.add(a))
+        saves[a.pk].append(later)
+        # two saves in one add (the x + log2(k) path), from the reverse side
+        latest = start + timedelta(days=9)
+        self.save_at(latest, lambda: a.interested_members.add(m2, m3))
+        saves[a.pk] += [latest, latest]
+
+        # the log-sum-exp in Python, the way combine() is applied save by save
+        expected = {}
+        for pk, stamps in saves.items():
+            score = count = 0
+            for saved_at in stamps:
+                score, count = popularity.combine(score, count, popularity.exponent(saved_at)), count + 1
+            expected[pk] = score
+        incremental = self.scores()
+        self.assertScoresEqual(incremental, expected)
+        self.assertEqual(self.counts(), {a.pk: 4, b.pk: 1})
+
+        # the full recompute lands on the same values
+        call_command("reconcile_popularity", stdout=StringIO())
+        self.assertScoresEqual(self.scores(), incremental)
+        self.assertEqual(self.counts(), {a.pk: 4, b.pk: 1})
+
+        # an unsave recomputes a's score from what is left
+        m1.saved_events.remove(a)
+        left = [start, latest, latest]
+        unsaved = self.scores()
+        self.assertAlmostEqual(
+            unsaved[a.pk], math.log2(sum(2 ** popularity.exponent(t) for t in left)), places=9
+        )
+        call_command("reconcile_popularity", stdout=StringIO())
+        self.assertScoresEqual(self.scores(), unsaved)
+        self.assertEqual(self.counts(), {a.pk: 3, b.pk: 1})
+
+        # and saves after it combine onto the recomputed score
+        newest = latest + timedelta(hours=1)
+        self.save_at(newest, lambda: m1.saved_events.add(a))
+        resaved = self.scores()
+        self.assertAlmostEqual(
+            resaved[a.pk], math.log2(sum(2 ** popularity.exponent(t) for t in left + [newest])), places=9
+        )
+        call_command("reconcile_popularity", stdout=StringIO())
+        self.assertScoresEqual(self.scores(), resaved)
+
+
+def _brute_force(points, lat, lng, km):
+    hits = [(pk, spatial.haversine_km(lat, lng, plat, plng)) for pk, (plat, plng) in points.items()]
+    return sorted((h for h in hits if h[1] <= km), key=lambda h: (h[1], h[0]))
+
+
+class LocationGridTests(SimpleTestCase):
+    def grid(self, points, cell_deg=0.5):
+        grid = spatial.LocationGrid(cell_deg)
+        for pk, (lat, lng) in points.items():
+            grid.upsert(pk, lat, lng)
+        return grid
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        points = {}
+        for pk in range(1, 3001):
+            if pk % 3:
+                # clusters around Berlin and Bangkok, plus the antimeridian and the poles
+                lat, lng = rng.choice([(52.52, 13.405), (13.75, 100.5), (-16.5, 179.9), (89.5, 0.0), (-89.5, 0.0)])
+                points[pk] = (max(-90.0, min(90.0, lat + rng.uniform(-1, 1))), (lng + rng.uniform(-1, 1) + 180) % 360 - 180)
+            else:
+                points[pk] = (rng.uniform(-90, 90), rng.uniform(-180, 180))
+        queries = [
+            (52.52, 13.405), (13.75, 100.5), (-16.5, 179.95), (-16.5, -179.95), (89.9, 45.0), (-90.0, 0.0), (0.0, 0.0)
+        ]
+        for cell_deg in (0.5, 2.0):
+            grid = self.grid(points, cell_deg)
+            for lat, lng in queries:
+                for km in (1, 25, 150, 2000):
+                    with self.subTest(cell_deg=cell_deg, lat=lat, lng=lng, km=km):
+                        self.assertEqual(grid.within(lat, lng, km), _brute_force(points, lat, lng, km))
+
+    def test_points_on_cell_boundaries(self):
+        # on the 0.5 degree edges, the corners where four cells meet, and the antimeridian
+        points = {1: (52.5, 13.5), 2: (52.5, 13.0), 3: (53.0, 13.5), 4: (52.0, 14.0), 5: (0.0, 180.0), 6: (0.0, -180.0)}
+        grid = self.grid(points)
+        for lat, lng in list(points.values()) + [(52.5, 13.25), (52.75, 13.5), (0.0, 179.999)]:
+            for km in (0.001, 10, 60):
+                with self.subTest(lat=lat, lng=lng, km=km):
+                    self.assertEqual(grid.within(lat, lng, km), _brute_force(points, lat, lng, km))
+
+    def test_upsert_moves_and_remove(self):
+        grid = self.grid({1: (52.52, 13.405)})
+        grid.upsert(1, 13.75, 100.5)
+        self.assertEqual(grid.within(52.52, 13.405, 50), [])
+        self.assertEqual([pk for pk, _ in grid.within(13.75, 100.5, 1)], [1])
+        grid.remove(1)
+        grid.remove(1)
+        self.assertEqual(len(grid), 0)
+        self.assertEqual(grid.cells, {})
+
+
+@override_settings(SOCIETY_SPATIAL_INDEX=True)
+class SpatialIndexFreshnessTests(SimpleTestCase):
+    def setUp(self):
+        cache.get_cache().clear()
+        self.index = spatial.SpatialIndex()
+        # what rebuild() leaves behind, without the database
+        grid = spatial.LocationGrid()
+        grid.upsert(1, 52.52, 13.405)
+        self.index._grid = grid
+        self.index._version = self.index._current_version()
+        self.index._built_at = time.monotonic()
+        warm = mock.patch.object(self.index, "warm")
+        self.warm = warm.start()
+        self.addCleanup(warm.stop)
+
+    def ids(self, lat=52.52, lng=13.405, km=50):
+        hits = self.index.within(lat, lng, km)
+        return None if hits is None else [pk for pk, _ in hits]
+
+    def test_built_index_answers(self):
+        self.assertEqual(self.ids(), [1])
+        self.warm.assert_not_called()
+
+    def test_local_save_and_delete_stay_fresh(self):
+        # signals.py order: the save's invalidate(), then the on_commit index update
+        cache.invalidate(cache.LOCATIONS)
+        self.index.location_saved(SimpleNamespace(pk=2, coordinates=Point(13.41, 52.53, srid=4326)))
+        self.assertEqual(self.ids(), [1, 2])
+
+        cache.invalidate(cache.LOCATIONS)
+        self.index.location_deleted(1)
+        self.assertEqual(self.ids(), [2])
+        self.warm.assert_not_called()
+
+    def test_foreign_bump_rebuilds(self):
+        # another process (or a bulk import) wrote locations
+        cache.invalidate(cache.LOCATIONS)
+        self.assertIsNone(self.ids())
+        self.warm.assert_called_once()
+
+    def test_foreign_bump_next_to_a_local_one_rebuilds(self):
+        cache.invalidate(cache.LOCATIONS)
+        cache.invalidate(cache.LOCATIONS)
+        self.index.location_saved(SimpleNamespace(pk=2, coordinates=Point(13.41, 52.53, srid=4326)))
+        self.assertIsNone(self.ids())
+        self.warm.assert_called_once()
+
+    @override_settings(SOCIETY_SPATIAL_INDEX_TTL=0)
+    def test_expired_index_rebuilds(self):
+        self.index._built_at -= 1
+        self.assertIsNone(self.ids())
+        self.warm.assert_called_once()
+
+    @override_settings(SOCIETY_SPATIAL_INDEX=False)
+    def test_disabled(self):
+        self.assertIsNone(self.ids())
+        self.warm.assert_not_called()
+
+
+@skipUnless(getattr(connection.ops, "postgis", False), "compares against PostGIS distances")
+class SpatialIndexPostGISTests(TestCase):
+    def test_radius_matches_postgis(self):
+        rng = random.Random(11)
+        for i in range(300):
+            Location.objects.create(
+                name=f"Wat {i}",
+                coordinates=Point(13.405 + rng.uniform(-2, 2), 52.52 + rng.uniform(-1.5, 1.5), srid=4326),
+                country_code="DE",
+            )
+        index = spatial.SpatialIndex()
+        index.rebuild()
+
+        center = Point(13.405, 52.52, srid=4326)
+        for km in (5, 25, 100):
+            with self.subTest(km=km):
+                hits = dict(index._grid.within(52.52, 13.405, km))
+                postgis = set(
+                    Location.objects.filter(coordinates__distance_lte=(center, D(km=km))).values_list("id", flat=True)
+                )
+                # haversine (sphere) vs the spheroid: only points right at the radius may disagree
+                rings = {
+                    pk
+                    for pk, (lat, lng) in index._grid.points.items()
+                    if abs(spatial.haversine_km(52.52, 13.405, lat, lng) - km) <= km * 0.005
+                }
+                self.assertEqual(set(hits) - rings, postgis - rings)
+
+
+@skipUnless(getattr(connection.ops, "postgis", False), "EXPLAIN checks need PostGIS")
+class QueryPlanTests(TestCase):
+    def test_no_plan_regressions(self):
+        # enough rows that the planner has to pick the indexes (seeded and rolled back by the command)
+        out = StringIO()
+        try:
+            call_command("check_query_plans", seed_locations=2000, seed_events=20000, stdout=out)
+        except CommandError as e:
+            self.fail(f"{e}\n{out.getvalue()}")
+
+
+class RendererTests(SimpleTestCase):
+    # ORJSONRenderer isn't byte-identical to ninja's JSONRenderer (compact separators,
+    # UTF-8 instead of \\u escapes); clients parse the same values out of both
+    def test_parses_like_ninja_json_renderer(self):
+        payload = {
+            "utc": datetime(2026, 4, 13, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "offset": datetime(2026, 4, 13, 16, 30, tzinfo=dt_timezone(timedelta(hours=7))),
+            "naive": datetime(2026, 4, 13, 9, 30),
+            "date": datetime(2026, 4, 13).date(),
+            "thai": "สงกรานต์ 🎉",
+            "quotes": 'He said "hi" \\ </script>',
+            "numbers": [0, -1, 2**53, 1.5, 0.1, 1e-7, Decimal("12.50")],
+            "empty": [None, "", [], {}],
+            1: "non-str key",
+            "location": LocationOut(
+                id=1, name="Wat Thai", category="temple", country_code="DE", related_store_external_id="X1", lat=52.52
+            ),
+        }
+        expected = JSONRenderer().render(None, payload, response_status=200)
+        self.assertEqual(json.loads(render(payload)), json.loads(expected))
+
+
+class _FakeRaw:
+    """Just enough of a psycopg2 connection for the pool."""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False  # SELECT 1 / rollback fail
+        self.info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.info.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        raw = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                if raw.broken:
+                    raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+        return Cursor()
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **options):
+        self.opened = []
+
+        def connect():
+            raw = _FakeRaw()
+            self.opened.append(raw)
+            return raw
+
+        self.connect = connect
+        return db_pool.ConnectionPool("test", {"CHECK_INTERVAL": 30.0, **options})
+
+    def test_reuses_released_connections(self):
+        pool = self.make_pool()
+        raw = pool.acquire(self.connect)
+        pool.release(raw)
+        self.assertIs(pool.acquire(self.connect), raw)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()["in_use"], 1)
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.make_pool(MAX_SIZE=1, TIMEOUT=0.05)
+        raw = pool.acquire(self.connect)
+        with self.assertRaises(db_pool.PoolTimeout):
+            pool.acquire(self.connect)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        # the slot is still usable once it comes back
+        pool.release(raw)
+        self.assertIs(pool.acquire(self.connect), raw)
+
+    def test_waiter_gets_the_released_connection(self):
+        pool = self.make_pool(MAX_SIZE=1, TIMEOUT=5.0)
+        raw = pool.acquire(self.connect)
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire(self.connect)))
+        waiter.start()
+        while not pool.stats()["waiting"]:
+            time.sleep(0.001)
+        pool.release(raw)
+        waiter.join(5)
+        self.assertEqual(got, [raw])
+        self.assertEqual(len(self.opened), 1)
+
+    def test_broken_connection_is_discarded_on_release(self):
+        pool = self.make_pool(MAX_SIZE=1)
+        raw = pool.acquire(self.connect)
+        # returned mid-transaction, and the rollback fails
+        raw.info.transaction_status = TRANSACTION_STATUS_INTRANS
+        raw.broken = True
+        pool.release(raw)
+        self.assertTrue(raw.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+        # its slot is free again
+        self.assertIsNot(pool.acquire(self.connect), raw)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_closed_connection_is_discarded_on_release(self):
+        pool = self.make_pool()
+        raw = pool.acquire(self.connect)
+        raw.close()
+        pool.release(raw)
+        self.assertEqual(pool.stats()["idle"], 0)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_failed_health_check_opens_a_new_connection(self):
+        clock = _Clock()
+        with mock.patch.object(db_pool, "time", clock):
+            pool = self.make_pool(CHECK_INTERVAL=10.0)
+            raw = pool.acquire(self.connect)
+            pool.release(raw)
+            raw.broken = True  # server went away while it sat idle
+            clock.now += 11
+            fresh = pool.acquire(self.connect)
+        self.assertIsNot(fresh, raw)
+        self.assertTrue(raw.closed)
+        self.assertEqual(pool.stats()["failed_checks"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_connections_are_recycled_after_max_lifetime(self):
+        clock = _Clock()
+        with mock.patch.object(db_pool, "time", clock):
+            pool = self.make_pool(MAX_LIFETIME=100.0)
+            old = pool.acquire(self.connect)
+            clock.now += 101
+            # too old when it comes back
+            pool.release(old)
+            self.assertTrue(old.closed)
+
+            idle = pool.acquire(self.connect)
+            pool.release(idle)
+            clock.now += 101
+            # too old when it's picked up again
+            fresh = pool.acquire(self.connect)
+        self.assertTrue(idle.closed)
+        self.assertNotIn(fresh, (old, idle))
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_idle_connections_above_min_size_are_trimmed(self):
+        clock = _Clock()
+        with mock.patch.object(db_pool, "time", clock):
+            pool = self.make_pool(MIN_SIZE=1, MAX_IDLE=10.0)
+            first, second = pool.acquire(self.connect), pool.acquire(self.connect)
+            pool.release(first)
+            clock.now += 11
+            pool.release(second)
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_failed_connect_frees_the_slot(self):
+        pool = self.make_pool(MAX_SIZE=1, TIMEOUT=0.05)
+
+        def refuse():
+            raise psycopg2.OperationalError("could not connect to server")
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.acquire(refuse)
+        self.assertEqual(pool.stats()["size"], 0)
+        pool.acquire(self.connect)
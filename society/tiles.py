@@ -0,0 +1,184 @@
+# society/tiles.py
+import math
+import time
+from typing import Iterable, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from ninja.errors import HttpError
+
+from . import cache, readmodel
+from .db_router import pin_primary
+from .models import Event, Location, UpcomingEvent
+
+
+# Mapbox Vector Tiles of the locations for the map (/tiles/{z}/{x}/{y}.mvt).
+#
+# One layer, "locations": a point per location with id (feature id), name, category and
+# upcoming_events (events that haven't started yet). Built by PostGIS ST_AsMVT.
+#
+# Tile bodies are stored in the "tiles" cache (on disk by default), keyed by z/x/y + a
+# global version (bumped by bulk writes) + a per-tile version. The versions live in the
+# "society" cache, which is the one shared by every host when it points at redis or
+# memcached: a write on one host then moves the keys all hosts read, and each host's
+# stale bodies just age out. A location or event write bumps only the tiles around the
+# points it touched (old and new position), every zoom up to TILE_MAX_ZOOM, neighbours
+# included when the point is in their buffer: one set_many() per write. upcoming_events
+# drifts as events start; the tile cache TTL bounds that.
+
+CACHE_ALIAS = "tiles"
+CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+TILE_MAX_ZOOM = 16  # clients overzoom past it
+EXTENT = 4096
+BUFFER = 64
+
+# A bulk write touching more points than this bumps every tile (the global version) instead
+INVALIDATE_MAX_POINTS = 500
+
+# Web Mercator stops here
+MAX_LAT = 85.0511287798
+
+Tile = Tuple[int, int, int]
+
+_TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS tile,
+           ST_Transform(ST_TileEnvelope(%(z)s, %(x)s, %(y)s, margin => %(margin)s), 4326) AS area
+),
+features AS (
+    SELECT l.id, l.name, l.category,
+           (SELECT count(*) FROM {events} AS e WHERE e.location_id = l.id AND e.start_date >= %(now)s) AS upcoming_events,
+           ST_AsMVTGeom(ST_Transform(l.coordinates::geometry, 3857), bounds.tile, %(extent)s, %(buffer)s, true) AS geom
+    FROM {locations} AS l, bounds
+    WHERE l.coordinates::geometry && bounds.area
+)
+SELECT ST_AsMVT(features, 'locations', %(extent)s, 'geom', 'id') FROM features WHERE geom IS NOT NULL
+"""
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def check_tile(z: int, x: int, y: int) -> None:
+    if not 0 <= z <= TILE_MAX_ZOOM:
+        raise HttpError(400, f"z must be between 0 and {TILE_MAX_ZOOM}")
+    if not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise HttpError(400, f"x and y must be between 0 and {2**z - 1} at z={z}")
+
+
+_ALL = "all"
+
+
+def _version_key(name: str) -> str:
+    return f"society:tile:v:{name}"
+
+
+def _tile_name(z: int, x: int, y: int) -> str:
+    return f"{z}/{x}/{y}"
+
+
+def _versions(names) -> list:
+    store = cache.get_cache()
+    keys = [_version_key(name) for name in names]
+    found = store.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Seed from the clock (like cache.namespace_versions()), so an evicted version
+            # never comes back with a value old tiles were stored under
+            store.add(key, time.time_ns(), timeout=None)
+            found[key] = store.get(key)
+    return [found[key] for key in keys]
+
+
+def _bump(names) -> None:
+    # a fresh clock value instead of incr: one round trip for all of them
+    pin_primary()
+    now = time.time_ns()
+    cache.get_cache().set_many({_version_key(name): now for name in names}, timeout=None)
+
+
+def render_tile(z: int, x: int, y: int) -> bytes:
+    """The tile from PostGIS, b"" when no location falls in it."""
+    # upcoming counts from the read model when it's on (same rows, narrower index)
+    events = UpcomingEvent if readmodel.enabled() else Event
+    sql = _TILE_SQL.format(events=events._meta.db_table, locations=Location._meta.db_table)
+    params = {
+        "z": z,
+        "x": x,
+        "y": y,
+        "margin": BUFFER / EXTENT,
+        "extent": EXTENT,
+        "buffer": BUFFER,
+        "now": timezone.now(),
+    }
+    with connections[Location.objects.all().db].cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b""
+
+
+def get_tile(z: int, x: int, y: int) -> bytes:
+    """render_tile() through the tile cache (empty tiles are cached too)."""
+    if not settings.SOCIETY_CACHE_ENABLED:
+        return render_tile(z, x, y)
+
+    store = get_cache()
+    name = _tile_name(z, x, y)
+    versions = ".".join(str(v) for v in _versions([_ALL, name]))
+    key = f"society:tile:{name}:{versions}"
+    data = store.get(key)
+    if data is None:
+        data = render_tile(z, x, y)
+        store.set(key, data)
+    return data
+
+
+def point_tiles(lat: float, lng: float, max_zoom: int = TILE_MAX_ZOOM) -> Set[Tile]:
+    """Every tile (z <= max_zoom) that draws a point at lat/lng, buffers included."""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    fx = (lng + 180) / 360
+    fy = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2
+    margin = BUFFER / EXTENT
+
+    tiles = set()
+    for z in range(max_zoom + 1):
+        n = 2**z
+        tx, ty = fx * n, fy * n
+        # the point's tile, plus the neighbours whose buffer it is in (clamped at the edges)
+        xs = {int(min(max(tx + d, 0), n - 1e-9)) for d in (-margin, 0, margin)}
+        ys = {int(min(max(ty + d, 0), n - 1e-9)) for d in (-margin, 0, margin)}
+        tiles.update((z, x, y) for x in xs for y in ys)
+    return tiles
+
+
+def invalidate_points(points: Iterable[Optional[object]]) -> None:
+    """points: Point geometries (None skipped), e.g. a location's old and new coordinates."""
+    points = {(p.y, p.x) for p in points if p is not None}
+    if not points:
+        return
+    if len(points) > INVALIDATE_MAX_POINTS:
+        invalidate_all()
+        return
+    tiles = set()
+    for lat, lng in points:
+        tiles |= point_tiles(lat, lng)
+    _bump(_tile_name(*tile) for tile in tiles)
+
+
+def invalidate_locations(location_ids: Iterable[int]) -> None:
+    """Their events changed (upcoming_events), redraw the tiles around them."""
+    location_ids = {pk for pk in location_ids if pk is not None}
+    if len(location_ids) > INVALIDATE_MAX_POINTS:
+        invalidate_all()
+    elif location_ids:
+        # the primary: the write that got us here may not be on a replica yet
+        locations = Location.objects.db_manager(DEFAULT_DB_ALIAS).filter(pk__in=location_ids)
+        invalidate_points(locations.values_list("coordinates", flat=True))
+
+
+def invalidate_all() -> None:
+    _bump([_ALL])
@@ -1,7 +1,15 @@
 # society/urls.py
+from django.conf import settings
 from django.urls import path
-from config.api import api
+from config.api import api, async_api
 
-urlpatterns = [
-    path("", api.urls),
+# ninja hands out each API's urls once
+api_urls = path("", api.urls)
+
+# async views first, the sync router answers everything they don't have
+async_urlpatterns = [
+    path("", async_api.urls),
+    api_urls,
 ]
+
+urlpatterns = async_urlpatterns if settings.SOCIETY_ASYNC_VIEWS else [api_urls]